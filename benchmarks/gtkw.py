@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark GTKWave save-file generation from GHDL wave option files with synthetic signal hierarchies.
+
+    python benchmarks/gtkw.py [--signals N] [--fanout F] [--legacy-max N]
+
+Writes a wave.opt file with N signals in a balanced hierarchy (F instances per level, F signals per
+instance), then times reading it (iter_wave_opt_signals) and generating the .gtkw file (gen_gtkw).
+For comparison, the original recursive list-slicing implementation is timed on hierarchies of up
+to --legacy-max signals.
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator, List
+
+from vcd import gtkw
+
+from xeda.gtkwave import gen_gtkw, iter_wave_opt_signals
+from xeda.utils import common_root
+
+
+def synthetic_signals(n: int, fanout: int) -> Iterator[str]:
+    """n signal paths of a hierarchy with `fanout` instances per level and `fanout` signals per instance"""
+    depth = 1
+    while fanout ** (depth + 1) < n:
+        depth += 1
+    for i in range(n):
+        scopes = []
+        x = i // fanout
+        for _ in range(depth):
+            scopes.append(f"u{x % fanout}")
+            x //= fanout
+        yield "/tb/dut/" + "/".join(reversed(scopes)) + f"/sig{i % fanout}"
+
+
+def write_wave_opt(path: Path, n: int, fanout: int) -> None:
+    with open(path, "w") as f:
+        f.write("$ version 1.1\n\n# Signals in entities :\n")
+        for sig in synthetic_signals(n, fanout):
+            f.write(sig + "\n")
+
+
+def legacy_add_sig(g: gtkw.GTKWSave, root_group: List[str], signals) -> int:
+    i = 0
+    while i < len(signals):
+        sig = signals[i]
+        if sig[: len(root_group)] == root_group:
+            if len(sig) - len(root_group) > 1:
+                new_group = sig[len(root_group)]
+                with g.group(new_group, closed=True):
+                    i += legacy_add_sig(g, root_group + [new_group], signals[i:])
+            else:
+                g.trace(".".join(sig))
+                i += 1
+        else:
+            break
+    return i
+
+
+def time_new(wave_opt: Path, dump_file: Path) -> float:
+    start = time.perf_counter()
+    gen_gtkw(dump_file, iter_wave_opt_signals(wave_opt, "top"))
+    return time.perf_counter() - start
+
+
+def time_legacy(wave_opt: Path) -> float:
+    start = time.perf_counter()
+    with open(wave_opt) as f:
+        signals = [
+            ["top", *line.strip()[1:].split("/")]
+            for line in f.read().splitlines()
+            if line.strip().startswith("/")
+        ]
+    legacy_add_sig(gtkw.GTKWSave(io.StringIO()), common_root(signals), signals)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--signals", type=int, default=1_000_000)
+    parser.add_argument("--fanout", type=int, default=16)
+    parser.add_argument("--legacy-max", type=int, default=100_000)
+    args = parser.parse_args()
+
+    sizes = []
+    n = 1000
+    while n < args.signals:
+        sizes.append(n)
+        n *= 10
+    sizes.append(args.signals)
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10_000))
+    print(f"{'signals':>10} {'gen_gtkw':>10} {'legacy':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            wave_opt = Path(tmp) / f"wave_{n}.opt"
+            write_wave_opt(wave_opt, n, args.fanout)
+            elapsed = time_new(wave_opt, Path(tmp) / f"wave_{n}.ghw")
+            legacy = f"{time_legacy(wave_opt):9.3f}s" if n <= args.legacy_max else "-"
+            print(f"{n:>10} {elapsed:9.3f}s {legacy:>10}")
+            os.remove(wave_opt)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
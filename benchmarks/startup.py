@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark the start-up time of the xeda command-line interface.
+
+    python benchmarks/startup.py [--repeat N] [--max-seconds T]
+
+Reports the best wall-clock time of `xeda --help` (in a fresh interpreter), the modules with the
+largest cumulative import times (python -X importtime), and any flow modules that were imported
+eagerly. Exits with a non-zero code if the best time exceeds --max-seconds or flow modules were imported.
+"""
+import argparse
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+HELP_CMD = [sys.executable, "-c", "from xeda.cli import cli; cli(['--help'])"]
+EAGER_FLOW_MODULES = (
+    "import sys, xeda.cli; "
+    "print('\\n'.join(m for m in sys.modules if m.startswith('xeda.flows.') "
+    "and m not in ('xeda.flows.flow', 'xeda.flows.cocotb')))"
+)
+
+
+def best_time(cmd: List[str], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def import_times(top: int) -> List[Tuple[int, str]]:
+    """(cumulative microseconds, package) of the slowest packages imported by xeda.cli"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import xeda.cli"],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    packages: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        package = name.strip().split(".")[0]
+        packages[package] = max(packages.get(package, 0), int(cumulative))
+    return sorted(((t, p) for p, t in packages.items()), reverse=True)[:top]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-seconds", type=float, default=None)
+    args = parser.parse_args()
+
+    interpreter = best_time([sys.executable, "-c", "pass"], args.repeat)
+    help_time = best_time(HELP_CMD, args.repeat)
+    print(f"python startup: {interpreter:.3f}s")
+    print(f"xeda --help:    {help_time:.3f}s (best of {args.repeat})")
+    print("\nslowest packages imported by xeda.cli (cumulative):")
+    for usec, name in import_times(args.top):
+        print(f"{usec / 1e6:8.3f}s  {name}")
+
+    eager = subprocess.run(
+        [sys.executable, "-c", EAGER_FLOW_MODULES],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    failed = False
+    if eager:
+        print(f"\nERROR: flow modules imported at start-up: {', '.join(eager)}")
+        failed = True
+    if args.max_seconds is not None and help_time > args.max_seconds:
+        print(f"\nERROR: start-up time exceeds {args.max_seconds:.3f}s")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
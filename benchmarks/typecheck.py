@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Benchmark the overhead of runtime type checking (typeguard), enabled with XEDA_TYPECHECK=1.
+
+    python benchmarks/typecheck.py [--repeat N] [--report-lines N] [--runs N]
+
+Runs the same workloads in fresh interpreters with and without XEDA_TYPECHECK and prints the best
+times of each: regex parsing of a synthetic timing/utilization report, the utility functions used
+on results and settings (try_convert, unique, _semantic_hash), and FlowRunner runs of a trivial flow.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+EXAMPLES_DIR = Path(__file__).resolve().parent.parent / "examples"
+
+REPORT_PATTERNS = [
+    r"^\s*WNS\(ns\)\s+TNS\(ns\).*\n\s*-+.*\n\s*(?P<wns>\-?\d+(?:\.\d+)?)\s+(?P<_tns>\-?\d+(?:\.\d+)?)",
+    r"^\|\s*Slice LUTs\s*\|\s*(?P<lut>\d+)\s*\|",
+    r"^\|\s*Slice Registers\s*\|\s*(?P<ff>\d+)\s*\|",
+    r"^\|\s*Block RAM Tile\s*\|\s*(?P<bram_tile>\d+)\s*\|",
+    r"^\|\s*DSPs\s*\|\s*(?P<dsp>\d+)\s*\|",
+]
+
+
+def synthetic_report(lines: int) -> str:
+    """a report with the interesting bits at the end, after `lines` lines of filler"""
+    filler = "\n".join(
+        f"| cell_{i:07d} | LUT6 | {i % 97} | {i % 13}.{i % 7} |" for i in range(lines)
+    )
+    return (
+        f"{filler}\n"
+        "    WNS(ns)      TNS(ns)  TNS Failing Endpoints\n"
+        "    -------      -------  ---------------------\n"
+        "      0.123        0.000                      0\n"
+        "| Slice LUTs      | 1234 |\n"
+        "| Slice Registers | 2345 |\n"
+        "| Block RAM Tile  |   12 |\n"
+        "| DSPs            |    3 |\n"
+    )
+
+
+def best_of(repeat: int, fn: Callable[[], None]) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def child(args: argparse.Namespace) -> None:
+    """run the workloads in this interpreter and print their timings as JSON"""
+    # pylint: disable=import-outside-toplevel
+    import logging
+
+    logging.disable(logging.WARNING)
+
+    from xeda import Design
+    from xeda.flow_runner import DefaultRunner, _semantic_hash
+    from xeda.flows.flow import Flow
+    from xeda.utils import try_convert, unique
+
+    class ReportFlow(Flow):
+        """writes and parses a synthetic report"""
+
+        class Settings(Flow.Settings):
+            report_lines: int = 1000
+
+        def run(self) -> None:
+            assert isinstance(self.settings, self.Settings)
+            Path("report.txt").write_text(synthetic_report(self.settings.report_lines))
+
+        def parse_reports(self) -> bool:
+            return self.parse_report_regex(
+                "report.txt", *REPORT_PATTERNS, required=True
+            )
+
+    design = Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+    timings: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        runner = DefaultRunner(tmp, display_results=False)
+        flow = runner.run_flow(ReportFlow, design, {"report_lines": 10})
+        assert flow.succeeded, "ReportFlow failed"
+        report = Path(tmp) / "report.txt"
+        report.write_text(synthetic_report(args.report_lines))
+
+        def parse() -> None:
+            assert flow.parse_report_regex(report, *REPORT_PATTERNS, required=True)
+
+        timings["parse_report_regex"] = best_of(args.repeat, parse)
+
+        values = [str(i) if i % 3 else f"{i}.5" for i in range(20_000)]
+
+        def convert() -> None:
+            for v in values:
+                try_convert(v)
+
+        timings["try_convert (20k)"] = best_of(args.repeat, convert)
+        items = [i % 1000 for i in range(20_000)]
+        timings["unique (20k)"] = best_of(args.repeat, lambda: unique(items))
+        settings = flow.settings.dict()
+        timings["_semantic_hash (x100)"] = best_of(
+            args.repeat, lambda: [_semantic_hash(settings) for _ in range(100)]
+        )
+
+        def run_flows() -> None:
+            for _ in range(args.runs):
+                runner.run_flow(
+                    ReportFlow, design, {"report_lines": args.report_lines // 10}
+                )
+
+        timings[f"FlowRunner ({args.runs} runs)"] = best_of(args.repeat, run_flows)
+    print(json.dumps(timings))
+
+
+def run_child(typecheck: bool, argv: List[str]) -> Dict[str, float]:
+    env = {**os.environ, "XEDA_TYPECHECK": "1" if typecheck else "0"}
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", *argv],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--report-lines", type=int, default=200_000)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args)
+        return 0
+    argv = [
+        f"--repeat={args.repeat}",
+        f"--report-lines={args.report_lines}",
+        f"--runs={args.runs}",
+    ]
+    fast = run_child(False, argv)
+    checked = run_child(True, argv)
+    print(f"{'workload':<28} {'default':>10} {'typecheck':>10} {'overhead':>9}")
+    for name, t in fast.items():
+        tc = checked[name]
+        print(f"{name:<28} {t:>9.4f}s {tc:>9.4f}s {tc / t:>8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
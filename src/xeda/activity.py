@@ -0,0 +1,462 @@
+"""Switching activity (toggle counts, high/low times, glitches) of VCD/FST waveform dumps, for power estimation"""
+import gzip
+import io
+import json
+import logging
+import os
+import shutil
+import subprocess
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from vcd.reader import TokenKind, tokenize
+
+from .tool import ExecutableNotFound
+from .version import __version__
+
+__all__ = [
+    "ActivityAnalyzer",
+    "ActivityReport",
+    "analyze_vcd",
+]
+
+log = logging.getLogger(__name__)
+
+X = 2  # unknown, high-impedance, or uninitialized
+_STATES = {"0": 0, "1": 1, "l": 0, "h": 1, "L": 0, "H": 1}
+_SCALAR_STATES = {ord(k): v for k, v in _STATES.items()}
+_SCALAR_CHARS = frozenset(b"01xXzZuUwWlLhH-")
+
+
+def _bits(value: Union[int, str], size: int) -> List[int]:
+    """states of a vector value, LSB first"""
+    if isinstance(value, int):
+        return [(value >> i) & 1 for i in range(size)]
+    value = value[-size:]
+    if len(value) < size:
+        # left-extend with 0 for 0/1, otherwise with the leftmost state (VCD, IEEE 1364 18.2.3.5)
+        pad = "0" if value[:1] in ("0", "1") else value[:1] or "x"
+        value = pad * (size - len(value)) + value
+    return [_STATES.get(c, X) for c in reversed(value)]
+
+
+class _Var:
+    __slots__ = ("base", "size", "mask", "last")
+
+    def __init__(self, base: int, size: int) -> None:
+        self.base = base
+        self.size = size
+        self.mask = (1 << size) - 1
+        self.last: Union[None, int, List[int]] = None
+
+
+class _Net:
+    """a VCD variable (or one of its aliases), mapped onto bits [base, base + size)"""
+
+    __slots__ = ("scope", "name", "base", "size", "indices")
+
+    def __init__(
+        self, scope: Tuple[str, ...], name: str, base: int, size: int, bit_index: Any
+    ) -> None:
+        self.scope = scope
+        self.name = name
+        self.base = base
+        self.size = size
+        if isinstance(bit_index, tuple):
+            msb, lsb = bit_index
+            step = 1 if msb >= lsb else -1
+            self.indices: Optional[List[int]] = [lsb + step * i for i in range(size)]
+        elif isinstance(bit_index, int):
+            self.indices = [bit_index]
+        elif size > 1:
+            self.indices = list(range(size))
+        else:
+            self.indices = None
+
+    def bit_names(self) -> Iterator[Tuple[str, int]]:
+        """(name, bit) of each bit, LSB first"""
+        if self.indices is None:
+            yield self.name, self.base
+        else:
+            for i, idx in enumerate(self.indices):
+                yield f"{self.name}[{idx}]", self.base + i
+
+
+class ActivityReport:
+    """
+    Per-bit switching activity over the duration of a simulation (in `timescale` units):
+    T0, T1, TX: time spent at 0, 1, and unknown (X, Z, U, ...) states
+    TC: number of 0<->1 transitions
+    IG: number of glitches, i.e. changes at the same time step as the previous change of that bit
+    """
+
+    def __init__(
+        self,
+        nets: List[_Net],
+        timescale: str,
+        duration: int,
+        stats: Dict[str, np.ndarray],
+    ) -> None:
+        self.nets = nets
+        self.timescale = timescale
+        self.duration = duration
+        self.stats = stats
+
+    def bit(self, name: str) -> Dict[str, int]:
+        """statistics of a single bit, e.g. 'tb.uut.data[3]'"""
+        for net in self.nets:
+            prefix = ".".join(net.scope + ("",))
+            if name.startswith(prefix):
+                for bit_name, bit in net.bit_names():
+                    if prefix + bit_name == name:
+                        return {k: int(v[bit]) for k, v in self.stats.items()}
+        raise KeyError(name)
+
+    def signals(self, per_bit: bool = False) -> Dict[str, Dict[str, Any]]:
+        """statistics of each signal, summed over its bits"""
+        signals: Dict[str, Dict[str, Any]] = {}
+        duration = max(self.duration, 1)
+        for net in self.nets:
+            sl = slice(net.base, net.base + net.size)
+            sig: Dict[str, Any] = {"width": net.size}
+            for k, v in self.stats.items():
+                sig[k] = int(v[sl].sum())
+            sig["toggle_rate"] = sig["TC"] / (net.size * duration)
+            sig["static_probability"] = sig["T1"] / (net.size * duration)
+            if per_bit and net.size > 1:
+                sig["bits"] = {
+                    bit_name: {k: int(v[bit]) for k, v in self.stats.items()}
+                    for bit_name, bit in net.bit_names()
+                }
+            signals[".".join(net.scope + (net.name,))] = sig
+        return signals
+
+    def totals(self) -> Dict[str, int]:
+        return {k: int(v.sum()) for k, v in self.stats.items()}
+
+    def write_json(self, path: Union[str, os.PathLike], per_bit: bool = False) -> None:
+        with open(path, "w") as f:
+            json.dump(
+                dict(
+                    timescale=self.timescale,
+                    duration=self.duration,
+                    totals=self.totals(),
+                    signals=self.signals(per_bit),
+                ),
+                f,
+                indent=1,
+            )
+
+    def write_saif(self, path: Union[str, os.PathLike]) -> None:
+        """write a backward SAIF file (version 2.0), with one instance per VCD scope"""
+        tree: Dict[str, Any] = {}
+        for net in self.nets:
+            node = tree
+            for s in net.scope:
+                node = node.setdefault(s, {})
+            node.setdefault(None, []).append(net)
+        magnitude, unit = self.timescale.split()
+        with open(path, "w") as f:
+            f.write("(SAIFILE\n")
+            f.write('(SAIFVERSION "2.0")\n(DIRECTION "backward")\n(DESIGN )\n')
+            f.write(f'(DATE "{datetime.now().strftime("%a %b %d %H:%M:%S %Y")}")\n')
+            f.write(
+                f'(VENDOR "Xeda")\n(PROGRAM_NAME "xeda")\n(VERSION "{__version__}")\n'
+            )
+            f.write(f"(DIVIDER / )\n(TIMESCALE {magnitude} {unit})\n")
+            f.write(f"(DURATION {self.duration})\n")
+            self._write_instances(f, tree, 0)
+            f.write(")\n")
+
+    def _write_instances(self, f: IO[str], tree: Dict[Any, Any], depth: int) -> None:
+        indent = "  " * depth
+        for name, node in tree.items():
+            if name is None:
+                continue
+            f.write(f"{indent}(INSTANCE {_saif_escape(name)}\n")
+            nets = node.get(None, [])
+            if nets:
+                f.write(f"{indent}  (NET\n")
+                for net in nets:
+                    for bit_name, bit in net.bit_names():
+                        t0, t1, tx, tc, ig = (
+                            int(self.stats[k][bit])
+                            for k in ("T0", "T1", "TX", "TC", "IG")
+                        )
+                        f.write(
+                            f"{indent}    ({_saif_escape(bit_name)}\n"
+                            f"{indent}      (T0 {t0}) (T1 {t1}) (TX {tx})\n"
+                            f"{indent}      (TC {tc}) (IG {ig})\n"
+                            f"{indent}    )\n"
+                        )
+                f.write(f"{indent}  )\n")
+            self._write_instances(f, node, depth + 1)
+            f.write(f"{indent})\n")
+
+
+def _saif_escape(name: str) -> str:
+    for c in "\\[]()/.":
+        name = name.replace(c, "\\" + c)
+    return name
+
+
+class ActivityAnalyzer:
+    """
+    Computes switching activity of a VCD stream in a single pass.
+    Bit-level value changes are buffered and processed with NumPy in chunks of `chunk_size` events,
+    so memory use is bounded by the number of signal bits and the chunk size, not by the length of the dump.
+    Only variables under `scope` (e.g. 'tb.uut') are analyzed, if specified.
+    """
+
+    BLOCK_SIZE = 1 << 22
+
+    def __init__(self, scope: Optional[str] = None, chunk_size: int = 1 << 20) -> None:
+        self.scope = tuple(scope.split(".")) if scope else ()
+        self.chunk_size = chunk_size
+        self.timescale = "1 s"
+        self.vars: Dict[str, _Var] = {}
+        self.nets: List[_Net] = []
+        self.nbits = 0
+        self.time = 0
+        self._bit = array("q")
+        self._time = array("q")
+        self._value = array("b")
+        self.stats: Dict[str, np.ndarray] = {}
+
+    def _declare(self, scope: Tuple[str, ...], var: Any) -> None:
+        if scope[: len(self.scope)] != self.scope:
+            return
+        if var.type_.value in ("real", "realtime", "string", "event"):
+            return
+        v = self.vars.get(var.id_code)
+        if v is None:
+            v = self.vars[var.id_code] = _Var(self.nbits, var.size)
+            self.nbits += var.size
+        self.nets.append(_Net(scope, var.reference, v.base, v.size, var.bit_index))
+
+    def _start(self) -> None:
+        n = self.nbits
+        self.stats = {
+            k: np.zeros(n, dtype=np.int64) for k in ("T0", "T1", "TX", "TC", "IG")
+        }
+        self._state_v = np.full(n, X, dtype=np.int8)
+        self._state_t = np.zeros(n, dtype=np.int64)
+        self._seen = np.zeros(n, dtype=bool)
+
+    def _change(self, var: _Var, value: Union[int, str]) -> None:
+        t = self.time
+        old = var.last
+        if var.size == 1:
+            # scalar changes are already states (0, 1, X)
+            v = _STATES.get(value[-1:], X) if isinstance(value, str) else value
+            if v != old:
+                self._bit.append(var.base)
+                self._time.append(t)
+                self._value.append(v)
+                var.last = v
+            return
+        if isinstance(value, int) and isinstance(old, int):
+            diff = old ^ value
+            while diff:
+                low = diff & -diff
+                i = low.bit_length() - 1
+                self._bit.append(var.base + i)
+                self._time.append(t)
+                self._value.append((value >> i) & 1)
+                diff ^= low
+            var.last = value
+            return
+        new = _bits(value, var.size)
+        prev = _bits(old, var.size) if isinstance(old, int) else old
+        for i, b in enumerate(new):
+            if prev is None or prev[i] != b:
+                self._bit.append(var.base + i)
+                self._time.append(t)
+                self._value.append(b)
+        var.last = value if isinstance(value, int) else new
+
+    def _flush(self) -> None:
+        if not self._bit:
+            return
+        bits = np.frombuffer(self._bit, dtype=np.int64)
+        # a stable sort keeps the time order of each bit's events
+        order = np.argsort(bits, kind="stable")
+        b = bits[order]
+        t = np.frombuffer(self._time, dtype=np.int64)[order]
+        v = np.frombuffer(self._value, dtype=np.int8)[order]
+        first = np.ones(len(b), dtype=bool)
+        first[1:] = b[1:] != b[:-1]
+        prev_v = np.empty_like(v)
+        prev_v[1:] = v[:-1]
+        prev_v[first] = self._state_v[b[first]]
+        prev_t = np.empty_like(t)
+        prev_t[1:] = t[:-1]
+        prev_t[first] = self._state_t[b[first]]
+        prev_real = np.ones(len(b), dtype=bool)
+        prev_real[first] = self._seen[b[first]]
+        self._accumulate_time(b, t - prev_t, prev_v)
+        n = self.nbits
+        binary = (prev_v != X) & (v != X)
+        self.stats["TC"] += np.bincount(b[binary & (prev_v != v)], minlength=n)
+        glitch = (t == prev_t) & prev_real & (prev_v != v)
+        self.stats["IG"] += np.bincount(b[glitch], minlength=n)
+        last = np.ones(len(b), dtype=bool)
+        last[:-1] = b[:-1] != b[1:]
+        self._state_v[b[last]] = v[last]
+        self._state_t[b[last]] = t[last]
+        self._seen[b[last]] = True
+        self._bit = array("q")
+        self._time = array("q")
+        self._value = array("b")
+
+    def _accumulate_time(
+        self, b: np.ndarray, dur: np.ndarray, state: np.ndarray
+    ) -> None:
+        for state_value, key in ((0, "T0"), (1, "T1"), (X, "TX")):
+            m = state == state_value
+            self.stats[key] += np.bincount(
+                b[m], weights=dur[m], minlength=self.nbits
+            ).astype(np.int64)
+
+    def _read_header(self, stream: IO[bytes]) -> bytes:
+        """parse the declarations using pyvcd's tokenizer and return the start of the value change section"""
+        buf = b""
+        pos = -1
+        while pos < 0:
+            block = stream.read(self.BLOCK_SIZE)
+            if not block:
+                break
+            buf += block
+            pos = buf.find(b"$enddefinitions")
+            if pos >= 0:
+                end = buf.find(b"$end", pos + len(b"$enddefinitions"))
+                while end < 0:
+                    block = stream.read(self.BLOCK_SIZE)
+                    if not block:
+                        break
+                    buf += block
+                    end = buf.find(b"$end", pos + len(b"$enddefinitions"))
+                pos = end + len(b"$end") if end >= 0 else len(buf)
+        if pos < 0:
+            pos = len(buf)
+        scope: List[str] = []
+        for token in tokenize(io.BytesIO(buf[:pos])):
+            kind = token.kind
+            data: Any = token.data
+            if kind is TokenKind.SCOPE:
+                scope.append(data.ident)
+            elif kind is TokenKind.UPSCOPE:
+                scope.pop()
+            elif kind is TokenKind.VAR:
+                self._declare(tuple(scope), data)
+            elif kind is TokenKind.TIMESCALE:
+                self.timescale = str(data)
+        return buf[pos:]
+
+    def _body_tokens(self, stream: IO[bytes], head: bytes) -> Iterator[bytes]:
+        """whitespace-separated tokens of the value change section, read in blocks"""
+        rest = head
+        while True:
+            block = stream.read(self.BLOCK_SIZE)
+            data = rest + block
+            if not block:
+                yield from data.split()
+                return
+            # the last token might continue in the next block
+            cut = max(data.rfind(b"\n"), data.rfind(b" "))
+            if cut < 0:
+                rest = data
+                continue
+            rest = data[cut:]
+            yield from data[:cut].split()
+
+    def analyze(
+        self, stream: IO[bytes], duration: Optional[int] = None
+    ) -> ActivityReport:
+        """analyze a VCD stream; duration (in timescale units) defaults to the last time step"""
+        head = self._read_header(stream)
+        self._start()
+        vars_ = {k.encode(): v for k, v in self.vars.items()}
+        change = self._change
+        bits = self._bit
+        tokens = self._body_tokens(stream, head)
+        for tok in tokens:
+            c = tok[0]
+            if c == 35:  # '#'
+                self.time = int(tok[1:])
+            elif c in _SCALAR_CHARS:
+                var = vars_.get(tok[1:])
+                if var is not None:
+                    change(var, _SCALAR_STATES.get(c, X))
+            elif c in (98, 66):  # 'b', 'B'
+                var = vars_.get(next(tokens))
+                if var is not None:
+                    try:
+                        change(var, int(tok[1:], 2) & var.mask)
+                    except ValueError:
+                        change(var, tok[1:].decode())
+            elif c in (114, 82, 115, 83):  # real or string: 'r', 'R', 's', 'S'
+                next(tokens)
+            elif tok == b"$comment":
+                for tok in tokens:
+                    if tok == b"$end":
+                        break
+            # other keywords: $dumpvars, $dumpall, $dumpon, $dumpoff, $end
+            if len(bits) >= self.chunk_size:
+                self._flush()
+                bits = self._bit
+        self._flush()
+        end = max(self.time, duration or 0)
+        # the time from the last change of each bit until the end
+        all_bits = np.arange(self.nbits)
+        self._accumulate_time(all_bits, end - self._state_t, self._state_v)
+        log.info(
+            "Analyzed activity of %d nets (%d bits) over %d %s",
+            len(self.nets),
+            self.nbits,
+            end,
+            self.timescale,
+        )
+        return ActivityReport(self.nets, self.timescale, end, self.stats)
+
+
+class _Fst2Vcd:
+    """stdout of GTKWave's fst2vcd, converting an FST dump to VCD on the fly"""
+
+    def __init__(self, fst: Path) -> None:
+        exe = shutil.which("fst2vcd")
+        if exe is None:
+            raise ExecutableNotFound("fst2vcd", "GTKWave", os.environ.get("PATH", ""))
+        self.proc = subprocess.Popen(  # pylint: disable=consider-using-with
+            [exe, "--fstname", str(fst)], stdout=subprocess.PIPE
+        )
+        assert self.proc.stdout is not None
+        self.stdout = self.proc.stdout
+
+    def close(self) -> None:
+        self.stdout.close()
+        if self.proc.wait() not in (0, -13):  # SIGPIPE if not read to the end
+            log.warning("fst2vcd exited with %d", self.proc.returncode)
+
+
+def analyze_vcd(
+    dump_file: Union[str, os.PathLike],
+    scope: Optional[str] = None,
+    duration: Optional[int] = None,
+    chunk_size: int = 1 << 20,
+) -> ActivityReport:
+    """Switching activity of a .vcd, .vcd.gz, or .fst (using fst2vcd) waveform dump"""
+    dump_file = Path(dump_file)
+    analyzer = ActivityAnalyzer(scope, chunk_size)
+    if dump_file.suffix == ".fst":
+        fst2vcd = _Fst2Vcd(dump_file)
+        try:
+            return analyzer.analyze(fst2vcd.stdout, duration)  # type: ignore
+        finally:
+            fst2vcd.close()
+    opener: Any = gzip.open if dump_file.suffix == ".gz" else open
+    with opener(dump_file, "rb") as f:
+        return analyzer.analyze(f, duration)
@@ -9,7 +9,7 @@ import os
 import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 import click
 import coloredlogs
@@ -17,8 +17,8 @@ from click.shell_completion import get_completion_class
 from rich import box
 from rich.style import Style
 from rich.table import Table
+from rich.text import Text
 from simple_term_menu import TerminalMenu
-from typeguard.importhook import install_import_hook
 
 from .cli_utils import (
     ClickMutex,
@@ -26,24 +26,33 @@ from .cli_utils import (
     XedaHelpGroup,
     XedaOptions,
     discover_flow_class,
+    parse_search_space,
     print_flow_settings,
     settings_to_dict,
 )
 from .console import console
 from .design import Design, DesignValidationError
-from .flow_runner import DefaultRunner
+from .flow_runner import DefaultRunner, get_flow_class
+from .flow_runner.batch import Batch, select_designs
+from .flow_runner.dse import Dse, FmaxSearch
+from .flow_runner.results_db import (
+    RESULTS_DB_ENV,
+    ResultsDB,
+    parse_filter,
+    parse_since,
+)
 from .flows.flow import (
     Flow,
     FlowException,
     FlowFatalError,
     FlowSettingsError,
-    registered_flows,
+    SynthFlow,
 )
+from .flows import FLOW_MANIFEST, flow_names
 from .tool import ExecutableNotFound, NonZeroExitCode
+from .utils import TYPECHECK_ENV, enable_typecheck
 from .xedaproject import XedaProject
 
-install_import_hook("xeda")
-
 log = logging.getLogger(__name__)
 
 
@@ -52,15 +61,10 @@ def load_design_from_toml(design_file) -> Design:
 
 
 def get_available_flows():
-    """alternative method using inspect"""
-    mod = "xeda.flows"
-    fc = inspect.getmembers(
-        sys.modules[mod],
-        lambda cls: inspect.isclass(cls)
-        and issubclass(cls, Flow)
-        and not inspect.isabstract(cls),
-    )
-    return {n: (mod, cls) for n, cls in fc}
+    """all available flows, importing their modules"""
+    return {
+        n: (FLOW_MANIFEST[n].split(":")[0], get_flow_class(n)) for n in FLOW_MANIFEST
+    }
 
 
 CONTEXT_SETTINGS = dict(
@@ -87,10 +91,19 @@ def log_to_file(logdir: Path):
 @click.option("--verbose", is_flag=True, help="Enables verbose mode.")
 @click.option("--quiet", is_flag=True, help="Enable quiet mode.")
 @click.option("--debug", show_envvar=True, is_flag=True)
+@click.option(
+    "--typecheck",
+    envvar=TYPECHECK_ENV,
+    show_envvar=True,
+    is_flag=True,
+    help="Enable runtime type checking (slow). Set XEDA_TYPECHECK=1 to also check modules loaded at start-up.",
+)
 @click.version_option(message="Xeda v%(version)s")
 @click.pass_context
 def cli(ctx: click.Context, **kwargs):
     ctx.obj = XedaOptions(**kwargs)
+    if ctx.obj.typecheck:
+        enable_typecheck()
     log_level = (
         logging.WARNING
         if ctx.obj.quiet
@@ -106,15 +119,83 @@ def cli(ctx: click.Context, **kwargs):
     )
 
 
+def load_design_and_flows_config(
+    xedaproject: Optional[str] = None,
+    design_name: Optional[str] = None,
+    design_file: Optional[str] = None,
+) -> Tuple[Design, Dict[str, Any]]:
+    """Load the design from design_file or xedaproject (default: ./xedaproject.toml), together with the flow settings of the project"""
+    # TODO get default flow configs?
+    flows_config = {}
+    if design_file:
+        try:
+            design = Design.from_toml(design_file)
+        except DesignValidationError as e:
+            log.critical("%s", e)
+            sys.exit(1)
+    else:
+        if not xedaproject:
+            xedaproject = "xedaproject.toml"
+            if not Path(xedaproject).exists():
+                sys.exit(
+                    "No design file or project files were specified and no `xedaproject.toml` was found in the working directory."
+                )
+        try:
+            xeda_project = XedaProject.from_file(xedaproject)
+        except DesignValidationError as e:
+            log.critical("%s", e)
+            sys.exit(1)
+        except FileNotFoundError:
+            sys.exit(
+                f"Cannot open project file: {xedaproject}. Please run from the project directory with xedaproject.toml or specify the correct path using the --xedaproject flag"
+            )
+        flows_config = xeda_project.flows
+        designs = xeda_project.designs
+        assert isinstance(xeda_project.design_names, list)  # type checker
+        log.info(
+            "Available designs in xedaproject: %s",
+            ", ".join(xeda_project.design_names),
+        )
+        design = xeda_project.get_design(design_name)
+        if design_name:
+            if not design:
+                log.critical(
+                    'Design "%s" not found in %s. Available designs are: %s',
+                    design_name,
+                    xedaproject,
+                    ", ".join(xeda_project.design_names),
+                )
+                sys.exit(1)
+        else:
+            if console.is_interactive:
+                terminal_menu = TerminalMenu(
+                    xeda_project.design_names, title="Please select a design: "
+                )
+                idx = terminal_menu.show()
+                if idx is None or not isinstance(idx, int) or idx < 0:
+                    sys.exit("Invalid design choice!")
+                design = designs[idx]
+            else:
+                design_name = click.prompt(
+                    "Please enter design name: ",
+                    type=click.Choice(xeda_project.design_names),
+                )
+                if not design_name or design_name not in xeda_project.design_names:
+                    sys.exit("Invalid design name!")
+                design = xeda_project.get_design(design_name)
+        if not design:
+            sys.exit("[ERROR] design is empty?!")
+
+    return design, flows_config
+
+
 @cli.command(
     context_settings=CONTEXT_SETTINGS,
     short_help="Run a flow.",
     help="Run the flow identified by FLOW_NAME. A snake_case styled FLOW_NAME (e.g. ghdl_sim) is converted to a CamelCase class name (e.g. GhdlSim).",
     no_args_is_help=False,
 )
-@click.argument(
-    "flow", metavar="FLOW_NAME", type=click.Choice(sorted(list(registered_flows)))
-)
+@click.argument("flow", metavar="FLOW_NAME", type=click.Choice(flow_names()))
 @click.option(
     "--xeda-run-dir",
     type=click.Path(
@@ -137,12 +218,48 @@ def cli(ctx: click.Context, **kwargs):
     is_flag=True,
     help="Don't run dependency flows if a previous successfull run on the same design and flow settings exists.",
 )
+@click.option(
+    "--cache-dir",
+    type=click.Path(
+        file_okay=False,
+        dir_okay=True,
+        writable=True,
+        readable=True,
+        resolve_path=True,
+        path_type=Path,
+    ),
+    envvar="XEDA_CACHE_DIR",
+    help="Restore results and artifacts of identical flow runs (same design, settings, and tool versions) from this directory, and store new ones in it.",
+    show_envvar=True,
+)
+@click.option(
+    "--results-db",
+    type=click.Path(
+        file_okay=True,
+        dir_okay=False,
+        writable=True,
+        resolve_path=True,
+        path_type=Path,
+    ),
+    envvar=RESULTS_DB_ENV,
+    help="Record all flow runs in this SQLite database, which can be queried with `xeda results`.",
+    show_envvar=True,
+)
 @click.option(
     "--run_in_existing_dir",
     is_flag=True,
     help="DO NOT USE!",
     hidden=True,
 )
+@click.option(
+    "--max-cpus",
+    default=max(1, multiprocessing.cpu_count()),
+    type=int,
+    help="Maximum total number of logical CPU cores used by independent flows running in parallel.",
+    show_default=True,
+    envvar="XEDA_MAX_CPUS",
+    show_envvar=True,
+)
 # @click.option(
 #     "--force-run",
 #     is_flag=True,
@@ -206,6 +323,9 @@ def run(
     flow: str,
     cached_dependencies: bool = False,
     run_in_existing_dir: bool = False,
+    max_cpus: Optional[int] = None,
+    cache_dir: Optional[Path] = None,
+    results_db: Optional[Path] = None,
     # force_run: bool = False,
     xeda_run_dir: Optional[Path] = None,
     xedaproject: Optional[str] = None,
@@ -217,66 +337,9 @@ def run(
     options: XedaOptions = ctx.obj or XedaOptions()
     assert xeda_run_dir
     log_to_file(xeda_run_dir / "Logs")
-    # TODO get default flow configs?
-    flows_config = {}
-    if design_file:
-        try:
-            design = Design.from_toml(design_file)
-        except DesignValidationError as e:
-            log.critical("%s", e)
-            sys.exit(1)
-    else:
-        if not xedaproject:
-            xedaproject = "xedaproject.toml"
-            if not Path(xedaproject).exists():
-                sys.exit(
-                    "No design file or project files were specified and no `xedaproject.toml` was found in the working directory."
-                )
-        try:
-            xeda_project = XedaProject.from_file(xedaproject)
-        except DesignValidationError as e:
-            log.critical("%s", e)
-            sys.exit(1)
-        except FileNotFoundError:
-            sys.exit(
-                f"Cannot open project file: {xedaproject}. Please run from the project directory with xedaproject.toml or specify the correct path using the --xedaproject flag"
-            )
-        flows_config = xeda_project.flows
-        designs = xeda_project.designs
-        assert isinstance(xeda_project.design_names, list)  # type checker
-        log.info(
-            "Available designs in xedaproject: %s",
-            ", ".join(xeda_project.design_names),
-        )
-        design = xeda_project.get_design(design_name)
-        if design_name:
-            if not design:
-                log.critical(
-                    'Design "%s" not found in %s. Available designs are: %s',
-                    design_name,
-                    xedaproject,
-                    ", ".join(xeda_project.design_names),
-                )
-                sys.exit(1)
-        else:
-            if console.is_interactive:
-                terminal_menu = TerminalMenu(
-                    xeda_project.design_names, title="Please select a design: "
-                )
-                idx = terminal_menu.show()
-                if idx is None or not isinstance(idx, int) or idx < 0:
-                    sys.exit("Invalid design choice!")
-                design = designs[idx]
-            else:
-                design_name = click.prompt(
-                    "Please enter design name: ",
-                    type=click.Choice(xeda_project.design_names),
-                )
-                if not design_name or design_name not in xeda_project.design_names:
-                    sys.exit("Invalid design name!")
-                design = xeda_project.get_design(design_name)
-        if not design:
-            sys.exit("[ERROR] design is empty?!")
+    design, flows_config = load_design_and_flows_config(
+        xedaproject, design_name, design_file
+    )
 
     flow_overrides = settings_to_dict(flow_settings)
     log.debug("flow_overrides: %s", flow_overrides)
@@ -287,6 +350,9 @@ def run(
         debug=options.debug,
         cached_dependencies=cached_dependencies,
         run_in_existing_dir=run_in_existing_dir,
+        max_cpus=max_cpus,
+        artifact_cache=cache_dir,
+        results_db=results_db,
     )
     try:
         runner.run_flow(flow_class, design, flow_overrides)
@@ -337,7 +403,8 @@ def list_flows():
     table.add_column("Description")
     table.add_column("Class", style="dim")
     super_flow_doc = inspect.getdoc(Flow)
-    for cls_name, (_mod, cls) in sorted(registered_flows.items()):
+    for cls_name in flow_names():
+        cls = get_flow_class(cls_name)
         doc = inspect.getdoc(cls)
         if doc == super_flow_doc:
             doc = "<no description>"
@@ -355,7 +422,7 @@ def list_flows():
 @click.argument(
     "flow",
     metavar="FLOW_NAME",
-    type=click.Choice(sorted(list(registered_flows))),
+    type=click.Choice(flow_names()),
     required=True,
 )
 @click.pass_context
@@ -366,19 +433,564 @@ def list_settings(ctx: click.Context, flow):
 @cli.command(
     context_settings=CONTEXT_SETTINGS,
     short_help="Design-space exploration: run several instances of a flow to find optimal parameters and results",
+    help="Run all combinations of the settings values specified with --explore, in parallel. Results of each variant are printed as soon as it completes.",
+)
+@click.argument("flow", metavar="FLOW_NAME", type=click.Choice(flow_names()))
+@click.option(
+    "--explore",
+    metavar="KEY=VALUE1,VALUE2,...",
+    multiple=True,
+    help="Values of a flow setting to explore. Can be repeated for multiple settings. KEY can be a hierarchical name using dot notation. Example: --explore clock_period=4,4.5,5 --explore synth.strategy=Default,AreaOptimized_high",
+)
+@click.option(
+    "--fmax",
+    is_flag=True,
+    help="Search for the maximum frequency of a synthesis flow by running candidate clock periods in parallel, narrowing them down using the measured worst negative slack (WNS).",
+)
+@click.option(
+    "--init-period",
+    type=float,
+    help="Initial clock period (ns) of the fmax search. Default: clock_period from flow settings.",
+)
+@click.option(
+    "--tolerance",
+    type=float,
+    default=0.05,
+    show_default=True,
+    help="Stop the fmax search when the clock period is known to this precision (ns).",
+)
+@click.option(
+    "--candidates",
+    type=int,
+    help="Number of clock periods tried in parallel in each round of the fmax search. Default: min(4, max-cpus)",
+)
+@click.option(
+    "--max-rounds",
+    type=int,
+    default=8,
+    show_default=True,
+    help="Maximum number of rounds of the fmax search.",
 )
-@click.argument("flow")
 @click.option(
     "--max-cpus",
     default=max(1, multiprocessing.cpu_count()),
     type=int,
     help="Maximum total number of logical CPU cores to use.",
     show_default=True,
+    envvar="XEDA_MAX_CPUS",
+    show_envvar=True,
+)
+@click.option(
+    "--metric",
+    "metrics",
+    multiple=True,
+    help="Result to display for each variant. Can be repeated.",
+)
+@click.option(
+    "--optimize",
+    help="Result to maximize, e.g. Fmax. The best variant is reported at the end.",
+)
+@click.option(
+    "--minimize",
+    is_flag=True,
+    help="Minimize (instead of maximize) the --optimize result.",
+)
+@click.option(
+    "--xeda-run-dir",
+    type=click.Path(
+        file_okay=False,
+        dir_okay=True,
+        writable=True,
+        readable=True,
+        resolve_path=True,
+        allow_dash=True,
+        path_type=Path,
+    ),
+    envvar="XEDA_RUN_DIR",
+    help="Parent folder for execution of xeda commands.",
+    default="xeda_run",
+    show_default=True,
     show_envvar=True,
 )
+@click.option(
+    "--cache-dir",
+    type=click.Path(
+        file_okay=False,
+        dir_okay=True,
+        writable=True,
+        readable=True,
+        resolve_path=True,
+        path_type=Path,
+    ),
+    envvar="XEDA_CACHE_DIR",
+    help="Restore results and artifacts of identical flow runs (same design, settings, and tool versions) from this directory, and store new ones in it.",
+    show_envvar=True,
+)
+@click.option(
+    "--results-db",
+    type=click.Path(
+        file_okay=True,
+        dir_okay=False,
+        writable=True,
+        resolve_path=True,
+        path_type=Path,
+    ),
+    envvar=RESULTS_DB_ENV,
+    help="Record all flow runs in this SQLite database, which can be queried with `xeda results`.",
+    show_envvar=True,
+)
+@click.option(
+    "--xedaproject",
+    type=click.Path(
+        exists=True,
+        file_okay=True,
+        dir_okay=False,
+        readable=True,
+        resolve_path=True,
+        path_type=Path,
+    ),
+    cls=ClickMutex,
+    mutually_exclusive_with=["design_file"],
+    help="Path to Xeda project file.",
+)
+@click.option(
+    "--design-name",
+    cls=ClickMutex,
+    mutually_exclusive_with=["design_file"],
+    help="Specify design.name in case multiple designs are available in a xedaproject.",
+)
+@click.option(
+    "--design-file",
+    "--design",
+    type=click.Path(
+        exists=True,
+        file_okay=True,
+        dir_okay=False,
+        readable=True,
+        resolve_path=True,
+        path_type=Path,
+    ),
+    cls=ClickMutex,
+    mutually_exclusive_with=["xedaproject"],
+    help="Path to Xeda design file containing the description of a single design.",
+)
+@click.option(
+    "--flow-settings",
+    "--settings",
+    metavar="KEY=VALUE...",
+    type=tuple,
+    cls=OptionEatAll,
+    help="Override setting values for all variants of the flow.",
+)
 @click.pass_context
-def dse(ctx, flow, max_cpus):  # pylint: disable=unused-argument
+def dse(
+    ctx: click.Context,
+    flow: str,
+    explore: Tuple[str, ...] = tuple(),
+    fmax: bool = False,
+    init_period: Optional[float] = None,
+    tolerance: float = 0.05,
+    candidates: Optional[int] = None,
+    max_rounds: int = 8,
+    max_cpus: Optional[int] = None,
+    metrics: Tuple[str, ...] = tuple(),
+    optimize: Optional[str] = None,
+    minimize: bool = False,
+    xeda_run_dir: Optional[Path] = None,
+    cache_dir: Optional[Path] = None,
+    results_db: Optional[Path] = None,
+    xedaproject: Optional[str] = None,
+    design_name: Optional[str] = None,
+    design_file: Optional[str] = None,
+    flow_settings: Optional[Tuple[str, ...]] = None,
+):
     """Design-space exploration (e.g. fmax)"""
+    options: XedaOptions = ctx.obj or XedaOptions()
+    assert xeda_run_dir
+    log_to_file(xeda_run_dir / "Logs")
+    try:
+        search_space = parse_search_space(explore)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--explore") from None
+    if fmax and search_space:
+        raise click.UsageError("--explore can't be used with --fmax")
+    if not fmax and not search_space:
+        raise click.UsageError("No settings to explore. Use --explore KEY=VALUE1,...")
+    design, flows_config = load_design_and_flows_config(
+        xedaproject, design_name, design_file
+    )
+    base_settings = {**flows_config.get(flow, {}), **settings_to_dict(flow_settings)}
+    runner = DefaultRunner(
+        xeda_run_dir,
+        debug=options.debug,
+        display_results=False,
+        max_cpus=max_cpus,
+        artifact_cache=cache_dir,
+        results_db=results_db,
+    )
+    flow_class = discover_flow_class(flow)
+    try:
+        if fmax:
+            if not issubclass(flow_class, SynthFlow):
+                raise click.UsageError(f"{flow} is not a synthesis flow")
+            try:
+                fmax_search = FmaxSearch(
+                    runner,
+                    flow_class,
+                    design,
+                    base_settings,
+                    metrics=list(metrics),
+                    init_period=init_period,
+                    tolerance=tolerance,
+                    candidates=candidates,
+                    max_rounds=max_rounds,
+                )
+            except ValueError as e:
+                raise click.UsageError(f"{e}. Use --init-period") from None
+            if fmax_search.search() is None:
+                sys.exit(1)
+        else:
+            explorer = Dse(
+                runner,
+                flow_class,
+                design,
+                base_settings,
+                metrics=list(metrics),
+                optimize=optimize,
+                minimize=minimize,
+            )
+            flows = explorer.run(search_space)
+            if not any(f.succeeded for f in flows):
+                sys.exit(1)
+    except FlowSettingsError as e:
+        log.critical("%s", e)
+        sys.exit(1)
+
+
+DEFAULT_RESULT_METRICS = ("Fmax", "wns", "lut", "ff", "runtime")
+
+
+def _format_value(v: Any) -> str:
+    if v is None:
+        return "-"
+    if isinstance(v, float):
+        return str(int(v)) if v.is_integer() else f"{v:.3f}"
+    return str(v)
+
+
+@cli.command(
+    context_settings=CONTEXT_SETTINGS,
+    short_help="Query the results database",
+    help="List, filter and compare flow runs recorded in the results database (see `xeda run --results-db`).",
+)
+@click.option(
+    "--results-db",
+    type=click.Path(
+        exists=True,
+        file_okay=True,
+        dir_okay=False,
+        resolve_path=True,
+        path_type=Path,
+    ),
+    envvar=RESULTS_DB_ENV,
+    required=True,
+    help="Path to the SQLite results database.",
+    show_envvar=True,
+)
+@click.option("--design", "design_name", help="Only show runs of this design.")
+@click.option("--flow", help="Only show runs of this flow.")
+@click.option(
+    "--since",
+    help="Only show runs since this time, either relative (e.g. 12h, 7d, 2w) or an ISO date (e.g. 2022-10-01).",
+)
+@click.option(
+    "--where",
+    "filters",
+    metavar="METRIC<op>VALUE",
+    multiple=True,
+    help="Filter on a numeric result or run property. Can be repeated. Example: --where 'Fmax>=200' --where 'lut<1000'",
+)
+@click.option(
+    "--metric",
+    "metrics",
+    multiple=True,
+    help=f"Result column to display. Can be repeated. Default: {', '.join(DEFAULT_RESULT_METRICS)}",
+)
+@click.option("--sort", help="Sort by this result (largest first, unless --ascending).")
+@click.option("--ascending", is_flag=True, help="Sort in ascending order.")
+@click.option("--all", "show_all", is_flag=True, help="Include failed runs.")
+@click.option("--limit", type=int, default=20, show_default=True)
+@click.option(
+    "--compare",
+    metavar="RUN_ID",
+    type=int,
+    multiple=True,
+    help="Compare the settings and results of two or more runs, side by side.",
+)
+def results(
+    results_db: Path,
+    design_name: Optional[str] = None,
+    flow: Optional[str] = None,
+    since: Optional[str] = None,
+    filters: Tuple[str, ...] = tuple(),
+    metrics: Tuple[str, ...] = tuple(),
+    sort: Optional[str] = None,
+    ascending: bool = False,
+    show_all: bool = False,
+    limit: int = 20,
+    compare: Tuple[int, ...] = tuple(),
+):
+    """Query the results database"""
+    db = ResultsDB(results_db)
+    if compare:
+        runs = []
+        for run_id in compare:
+            run = db.get(run_id)
+            if run is None:
+                raise click.BadParameter(
+                    f"No run with id {run_id}", param_hint="--compare"
+                )
+            runs.append(run)
+        table = Table(box=box.ROUNDED, show_lines=False)
+        table.add_column("", style="bold")
+        for run in runs:
+            table.add_column(f"#{run['id']}", justify="right")
+        for col in ("design", "flow", "timestamp", "success"):
+            table.add_row(col, *(_format_value(run[col]) for run in runs))
+        names = sorted(set().union(*(run["metrics"] for run in runs)))
+        for name in names:
+            table.add_row(
+                name, *(_format_value(run["metrics"].get(name)) for run in runs)
+            )
+        settings = [ResultsDB.flat_settings(run["settings"]) for run in runs]
+        for key in sorted(set().union(*settings)):
+            values = [s.get(key) for s in settings]
+            if any(v != values[0] for v in values):
+                table.add_row(
+                    Text(key, style="yellow"), *(_format_value(v) for v in values)
+                )
+        console.print(table)
+        return
+    try:
+        parsed_filters = [parse_filter(f) for f in filters]
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--where") from None
+    try:
+        since_time = parse_since(since) if since else None
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--since") from None
+    columns = list(metrics or DEFAULT_RESULT_METRICS)
+    runs = db.query(
+        design=design_name,
+        flow=flow,
+        since=since_time,
+        success=None if show_all else True,
+        filters=parsed_filters,
+        metrics=columns,
+        sort=sort,
+        descending=not ascending,
+        limit=limit,
+    )
+    table = Table(box=box.ROUNDED, show_lines=False)
+    table.add_column("Id", justify="right", style="dim")
+    table.add_column("Time")
+    table.add_column("Design", style="bold")
+    table.add_column("Flow")
+    if show_all:
+        table.add_column("Status")
+    for col in columns:
+        table.add_column(col, justify="right")
+    for run in runs:
+        status = (
+            [
+                Text("OK", style="green")
+                if run["success"]
+                else Text("FAILED", style="red")
+            ]
+            if show_all
+            else []
+        )
+        table.add_row(
+            str(run["id"]),
+            run["timestamp"].replace("T", " "),
+            run["design"],
+            run["flow"],
+            *status,
+            *(_format_value(run[col]) for col in columns),
+        )
+    console.print(table)
+
+
+@cli.command(
+    context_settings=CONTEXT_SETTINGS,
+    short_help="Run several flows on several designs of a xedaproject",
+    help="Run each of the flows FLOW_NAME... on each design of a xedaproject, in parallel. Flows use the settings of the xedaproject. Failing flows do not stop the others. A combined table of results is printed at the end, and the exit code is non-zero if any of the flows failed.",
+)
+@click.argument(
+    "flows",
+    metavar="FLOW_NAME...",
+    nargs=-1,
+    required=True,
+    type=click.Choice(flow_names()),
+)
+@click.option(
+    "--xedaproject",
+    type=click.Path(
+        exists=True,
+        file_okay=True,
+        dir_okay=False,
+        readable=True,
+        resolve_path=True,
+        path_type=Path,
+    ),
+    default="xedaproject.toml",
+    show_default=True,
+    help="Path to Xeda project file.",
+)
+@click.option(
+    "--design",
+    "design_patterns",
+    metavar="PATTERN",
+    multiple=True,
+    help="Only run designs with a name matching this glob pattern. Can be repeated. Default: all designs of the xedaproject.",
+)
+@click.option(
+    "--max-cpus",
+    default=max(1, multiprocessing.cpu_count()),
+    type=int,
+    help="Maximum total number of logical CPU cores used by flows running in parallel.",
+    show_default=True,
+    envvar="XEDA_MAX_CPUS",
+    show_envvar=True,
+)
+@click.option(
+    "--max-memory",
+    type=float,
+    help="Maximum total memory (GB) used by flows running in parallel, based on the `memory_gb` setting of each flow.",
+    envvar="XEDA_MAX_MEMORY",
+    show_envvar=True,
+)
+@click.option(
+    "--nthreads",
+    type=int,
+    help="Number of threads of each flow, unless set in its settings. Default: max-cpus divided by the number of flows.",
+)
+@click.option(
+    "--metric",
+    "metrics",
+    multiple=True,
+    help=f"Result column to display. Can be repeated. Default: {', '.join(DEFAULT_RESULT_METRICS)}",
+)
+@click.option(
+    "--xeda-run-dir",
+    type=click.Path(
+        file_okay=False,
+        dir_okay=True,
+        writable=True,
+        readable=True,
+        resolve_path=True,
+        allow_dash=True,
+        path_type=Path,
+    ),
+    envvar="XEDA_RUN_DIR",
+    help="Parent folder for execution of xeda commands.",
+    default="xeda_run",
+    show_default=True,
+    show_envvar=True,
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(
+        file_okay=False,
+        dir_okay=True,
+        writable=True,
+        readable=True,
+        resolve_path=True,
+        path_type=Path,
+    ),
+    envvar="XEDA_CACHE_DIR",
+    help="Restore results and artifacts of identical flow runs (same design, settings, and tool versions) from this directory, and store new ones in it.",
+    show_envvar=True,
+)
+@click.option(
+    "--results-db",
+    type=click.Path(
+        file_okay=True,
+        dir_okay=False,
+        writable=True,
+        resolve_path=True,
+        path_type=Path,
+    ),
+    envvar=RESULTS_DB_ENV,
+    help="Record all flow runs in this SQLite database, which can be queried with `xeda results`.",
+    show_envvar=True,
+)
+@click.option(
+    "--flow-settings",
+    "--settings",
+    metavar="FLOW_NAME.KEY=VALUE...",
+    type=tuple,
+    cls=OptionEatAll,
+    help="Override setting values of a flow, e.g. --settings vivado_synth.clock_period=5",
+)
+@click.pass_context
+def batch(
+    ctx: click.Context,
+    flows: Tuple[str, ...],
+    xedaproject: Path,
+    design_patterns: Tuple[str, ...] = tuple(),
+    max_cpus: Optional[int] = None,
+    max_memory: Optional[float] = None,
+    nthreads: Optional[int] = None,
+    metrics: Tuple[str, ...] = tuple(),
+    xeda_run_dir: Optional[Path] = None,
+    cache_dir: Optional[Path] = None,
+    results_db: Optional[Path] = None,
+    flow_settings: Optional[Tuple[str, ...]] = None,
+):
+    """Run several flows on several designs"""
+    options: XedaOptions = ctx.obj or XedaOptions()
+    assert xeda_run_dir
+    log_to_file(xeda_run_dir / "Logs")
+    try:
+        xeda_project = XedaProject.from_file(xedaproject)
+    except DesignValidationError as e:
+        log.critical("%s", e)
+        sys.exit(1)
+    designs = select_designs(xeda_project.designs, design_patterns)
+    if not designs:
+        raise click.BadParameter(
+            f"No matching designs. Available designs are: {', '.join(xeda_project.design_names)}",
+            param_hint="--design",
+        )
+    try:
+        overrides = settings_to_dict(flow_settings)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--settings") from None
+    flows_settings = {
+        flow: {**xeda_project.flows.get(flow, {}), **overrides.get(flow, {})}
+        for flow in flows
+    }
+    runner = DefaultRunner(
+        xeda_run_dir,
+        debug=options.debug,
+        display_results=False,
+        max_cpus=max_cpus,
+        max_memory_gb=max_memory,
+        artifact_cache=cache_dir,
+        results_db=results_db,
+    )
+    jobs = Batch(
+        runner,
+        designs,
+        [discover_flow_class(flow) for flow in dict.fromkeys(flows)],
+        flows_settings,
+        metrics=list(metrics or DEFAULT_RESULT_METRICS),
+        nthreads=nthreads,
+    )
+    jobs.run()
+    jobs.print_results()
+    sys.exit(jobs.exit_code)
 
 
 SHELLS = {
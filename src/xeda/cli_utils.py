@@ -26,6 +26,7 @@ __all__ = [
     "ConsoleLogo",
     "XedaHelpGroup",
     "discover_flow_class",
+    "parse_search_space",
 ]
 
 
@@ -37,6 +38,7 @@ class XedaOptions:
     verbose: bool = False
     quiet: bool = False
     debug: bool = False
+    typecheck: bool = False
 
 
 class ClickMutex(click.Option):
@@ -196,6 +198,22 @@ def settings_to_dict(
     raise TypeError(f"overrides is of unsupported type: {type(settings)}")
 
 
+def parse_search_space(
+    explore: Union[None, List[str], Tuple[str, ...]]
+) -> Dict[str, List[Any]]:
+    """convert a list of KEY=VALUE1,VALUE2,... to a mapping of (hierarchical) setting names to lists of values"""
+    space: Dict[str, List[Any]] = {}
+    for item in explore or []:
+        sp = item.split("=")
+        if len(sp) != 2 or not sp[0] or not sp[1]:
+            raise ValueError(
+                f"'{item}': search space should be in KEY=VALUE1,VALUE2,... format!"
+            )
+        key, values = sp
+        space[key.strip()] = [try_convert(v) for v in values.split(",")]
+    return space
+
+
 def print_flow_settings(flow, options: XedaOptions):
     flow_class = discover_flow_class(flow)
     schema = flow_class.Settings.schema(by_alias=True)
@@ -1,8 +1,18 @@
-import hashlib
 import logging
 import os
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, TypeVar, Union
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 from .dataclass import (
     Extra,
@@ -13,6 +23,7 @@ from .dataclass import (
     validation_errors,
     validator,
 )
+from .file_hash_index import FileHashIndex
 from .utils import WorkingDirectory, toml_load
 
 log = logging.getLogger(__name__)
@@ -85,10 +96,18 @@ class FileResource:
     def hash(self) -> str:
         """return hash of file content"""
         if self._content_hash is None:
-            with open(self.file, "rb") as f:
-                self._content_hash = hashlib.sha256(f.read()).hexdigest()
+            self._content_hash = FileHashIndex.default().digest(self.file)
         return self._content_hash
 
+    @staticmethod
+    def prefetch_hashes(resources: Iterable["FileResource"]) -> None:
+        """compute content hashes of all resources at once, hashing new or modified files in parallel"""
+        pending = [r for r in resources if r._content_hash is None]
+        if pending:
+            digests = FileHashIndex.default().digests(r.file for r in pending)
+            for r in pending:
+                r._content_hash = digests[str(r.file)]
+
     def __eq__(self, other: Any) -> bool:
         if not isinstance(other, FileResource):
             return False
@@ -295,6 +314,10 @@ class Language(XedaBaseModel):
     verilog: LanguageSettings = LanguageSettings()  # type: ignore
 
 
+# module-level: a class attribute would become a (non-picklable) field of the model
+_DesignT = TypeVar("_DesignT", bound="Design")
+
+
 class Design(XedaBaseModel):
     name: str
     rtl: RtlSettings
@@ -336,14 +359,12 @@ class Design(XedaBaseModel):
                 return self.tb.top
         return tuple()
 
-    T = TypeVar("T", bound="Design")
-
     @classmethod
     def from_toml(
-        cls: Type[T],
+        cls: Type[_DesignT],
         design_file: Union[str, os.PathLike],
         design_root: Union[None, str, os.PathLike] = None,
-    ) -> T:
+    ) -> _DesignT:
         """Load and validate a design description from TOML file"""
         if not isinstance(design_file, Path):
             design_file = Path(design_file)
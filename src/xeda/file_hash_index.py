@@ -0,0 +1,180 @@
+"""Persistent index of file content hashes, keyed by the path and stat identity of each file"""
+import hashlib
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .tool_cache import DISABLED_VALUES
+
+__all__ = [
+    "FileHashIndex",
+    "FILE_HASH_INDEX_ENV",
+    "file_digest",
+]
+
+log = logging.getLogger(__name__)
+
+# path of the index database, or one of DISABLED_VALUES to only keep hashes in memory
+FILE_HASH_INDEX_ENV = "XEDA_FILE_HASH_INDEX"
+
+CHUNK_SIZE = 1 << 20
+# hash files on a thread pool if there are at least this many to hash
+PARALLEL_MIN_FILES = 8
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+"""
+
+StatKey = Tuple[int, int, int]
+
+
+def _default_path() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "xeda" / "file_hashes.sqlite"
+
+
+def _stat_key(path: str) -> StatKey:
+    st = os.stat(path)
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def file_digest(path: Union[str, os.PathLike]) -> str:
+    """SHA-256 of the file content, read in chunks"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FileHashIndex:
+    """
+    Content hashes (SHA-256) of files, memoized in memory and in a SQLite database shared by all xeda processes of a user.
+    An entry is only used while the file's inode, size and modification time (ns) are unchanged.
+    """
+
+    _instances: Dict[Optional[Path], "FileHashIndex"] = {}
+
+    def __init__(self, path: Union[None, str, os.PathLike]) -> None:
+        self.path = Path(path) if path else None
+        self._mem: Dict[str, Tuple[StatKey, str]] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        if self.path:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self._connect() as conn:
+                    conn.executescript(SCHEMA)
+            except (OSError, sqlite3.Error) as e:
+                log.debug("File hash index %s is not usable: %s", self.path, e)
+                self.path = None
+
+    @classmethod
+    def default(cls) -> "FileHashIndex":
+        """shared instance, as specified by the XEDA_FILE_HASH_INDEX environment variable"""
+        value = os.environ.get(FILE_HASH_INDEX_ENV)
+        path: Optional[Path]
+        if value is not None and value.strip().lower() in DISABLED_VALUES:
+            path = None
+        else:
+            path = Path(value).expanduser() if value else _default_path()
+        if path not in cls._instances:
+            cls._instances[path] = cls(path)
+        return cls._instances[path]
+
+    def _connect(self) -> sqlite3.Connection:
+        """connection of the current process (not shared with forked children)"""
+        assert self.path
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=30)
+            self._pid = os.getpid()
+        return self._conn
+
+    def digest(self, path: Union[str, os.PathLike]) -> str:
+        return self.digests([path])[str(path)]
+
+    def digests(
+        self,
+        paths: Iterable[Union[str, os.PathLike]],
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, str]:
+        """content hashes of all paths (keyed by str(path)), only (re-)hashing new or modified files"""
+        result: Dict[str, str] = {}
+        stats: Dict[str, StatKey] = {}
+        for p in paths:
+            p = str(p)
+            if p in result or p in stats:
+                continue
+            st = _stat_key(p)
+            mem = self._mem.get(p)
+            if mem and mem[0] == st:
+                result[p] = mem[1]
+            else:
+                stats[p] = st
+        if stats and self.path:
+            self._lookup(stats, result)
+        missing = [p for p in stats if p not in result]
+        if missing:
+            self._hash(missing, stats, result, max_workers)
+        return result
+
+    def _lookup(self, stats: Dict[str, StatKey], result: Dict[str, str]) -> None:
+        try:
+            with self._connect() as conn:
+                for p, st in stats.items():
+                    row = conn.execute(
+                        "SELECT inode, size, mtime_ns, sha256 FROM file_hashes WHERE path = ?",
+                        (p,),
+                    ).fetchone()
+                    if row and tuple(row[:3]) == st:
+                        result[p] = row[3]
+                        self._mem[p] = (st, row[3])
+        except sqlite3.Error as e:
+            log.debug("Failed to read file hash index %s: %s", self.path, e)
+
+    def _hash(
+        self,
+        missing: List[str],
+        stats: Dict[str, StatKey],
+        result: Dict[str, str],
+        max_workers: Optional[int],
+    ) -> None:
+        if len(missing) >= PARALLEL_MIN_FILES and max_workers != 1:
+            # hashlib releases the GIL while hashing large buffers
+            with ThreadPoolExecutor(max_workers) as executor:
+                digests = list(executor.map(file_digest, missing))
+        else:
+            digests = [file_digest(p) for p in missing]
+        rows = []
+        for p, digest in zip(missing, digests):
+            result[p] = digest
+            st = stats[p]
+            if _stat_key(p) == st:  # not modified while being hashed
+                self._mem[p] = (st, digest)
+                rows.append((p, *st, digest))
+        log.debug("Hashed %d file(s)", len(missing))
+        if rows and self.path:
+            try:
+                with self._connect() as conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO file_hashes (path, inode, size, mtime_ns, sha256) VALUES (?, ?, ?, ?, ?)",
+                        rows,
+                    )
+            except sqlite3.Error as e:
+                log.debug("Failed to update file hash index %s: %s", self.path, e)
+
+    def clear(self) -> None:
+        """forget all entries"""
+        self._mem.clear()
+        if self.path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM file_hashes")
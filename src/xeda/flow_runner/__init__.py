@@ -3,13 +3,28 @@ import hashlib
 import importlib
 import json
 import logging
+import multiprocessing
 import os
+import sqlite3
 import time
 from datetime import datetime, timedelta
 from pathlib import Path, PosixPath
-from typing import Any, Dict, Mapping, Optional, Set, Type, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
 
 # fmt: off
+from box import Box
 from pathvalidate import sanitize_filename  # pyright: reportPrivateImportUsage=none
 
 from rich import box, print_json
@@ -19,17 +34,23 @@ from rich.text import Text
 
 from ..console import console
 from ..dataclass import asdict
-from ..design import Design
-from ..flows.flow import Flow, FlowDependencyFailure, registered_flows
-from ..tool import NonZeroExitCode
+from ..design import Design, FileResource
+from ..flows import load_flow_class
+from ..flows.flow import Flow
+from ..tool import NonZeroExitCode, ToolTimeout, ProcessTimeout
 from ..utils import WorkingDirectory, backup_existing, dump_json, snakecase_to_camelcase
 from ..version import __version__
+from .artifact_cache import ArtifactCache, tool_versions
+from .results_db import ResultsDB
+from .scheduler import FlowGraph, FlowNode, FlowScheduler
 
 __all__ = [
     "get_flow_class",
     "FlowNotFoundError",
     "FlowRunner",
     "DefaultRunner",
+    "ArtifactCache",
+    "ResultsDB",
     "print_results",
 ]
 
@@ -92,7 +113,7 @@ class FlowNotFoundError(Exception):
 def get_flow_class(
     flow_name: str, module_name: str = "xeda.flows", package: str = __package__
 ) -> Type[Flow]:
-    _mod, flow_class = registered_flows.get(flow_name, (None, None))
+    flow_class = load_flow_class(flow_name)
     if flow_class is None:
         log.warning(
             "Flow %s was not found in registered flows. Trying to load using importlib.import_module",
@@ -114,7 +135,16 @@ def get_flow_class(
 
 
 def _semantic_hash(data: Any, debug=False) -> str:
+    resources: List[Tuple[Dict[str, Any], FileResource]] = []
+
     def _sorted_dict_str(data: Any) -> Any:
+        if isinstance(data, FileResource):
+            # identified by its attributes and content hash, filled in below
+            attrs = {k: v for k, v in data.__dict__.items() if k != "_content_hash"}
+            attrs["content_hash"] = None
+            node = _sorted_dict_str(attrs)
+            resources.append((node, data))
+            return node
         if isinstance(data, (dict, Mapping)):
             return {k: _sorted_dict_str(data[k]) for k in sorted(data.keys())}
         if isinstance(data, list):
@@ -126,21 +156,40 @@ def _semantic_hash(data: Any, debug=False) -> str:
     def _get_digest(b: bytes) -> str:
         return hashlib.sha256(b).hexdigest()[:16]
 
-    r = repr(_sorted_dict_str(data))
+    tree = _sorted_dict_str(data)
+    # new or modified files are hashed together (in parallel), others come from the FileHashIndex
+    FileResource.prefetch_hashes(r for _, r in resources)
+    for node, resource in resources:
+        node["content_hash"] = resource.hash
+    r = repr(tree)
     if debug:
         print("\nSEMANTIC_HASH:", r)
     return _get_digest(bytes(r, "UTF-8"))
 
 
+def _default_nthreads(
+    flow_settings: Union[None, Dict[str, Any], Flow.Settings], nthreads: int
+) -> Union[Dict[str, Any], Flow.Settings]:
+    """flow_settings with `nthreads` set to nthreads, unless it was explicitly set"""
+    if isinstance(flow_settings, Flow.Settings):
+        if "nthreads" in flow_settings.__fields_set__:
+            return flow_settings
+        return flow_settings.copy(update=dict(nthreads=nthreads))
+    flow_settings = dict(flow_settings or {})
+    flow_settings.setdefault("nthreads", nthreads)
+    return flow_settings
+
+
 class FlowRunner:
     """
     Manage running flows and their dependencies.
     1. Instantiate instance of flow class with proper settings assigned (__init__)
     2. call Flow.init()
-    3. Run all dependency flows (asked by the flow, during Flow.init)
-    3. Run the flow by calling run()
-    4. Run flow's parse_reports() ## TODO parse_reports will be renamed
-    5. Evaluate and print the results
+    3. Recursively prepare all dependency flows (asked by the flow, during Flow.init)
+    4. Run each flow by calling run(), as soon as all of its dependencies are complete.
+       Independent flows run in parallel, limited by their `nthreads` and `max_cpus`.
+    5. Run flow's parse_reports() ## TODO parse_reports will be renamed
+    6. Evaluate and print the results
     """
 
     def __init__(
@@ -152,6 +201,14 @@ class FlowRunner:
         dump_results_json: bool = True,
         cached_dependencies: bool = False,  # do not run dependencies if previous run results exist. Uses flow run_dir names including design and flow.settings hashes
         run_in_existing_dir: bool = False,  # DO NOT USE! Only for development!
+        max_cpus: Optional[int] = None,  # total number of CPUs shared by concurrently running flows
+        max_memory_gb: Optional[float] = None,  # total memory (GB) shared by concurrently running flows, see Flow.Settings.memory_gb
+        artifact_cache: Union[
+            None, str, os.PathLike, ArtifactCache
+        ] = None,  # restore results and artifacts of identical flow runs from this cache, and store new ones into it
+        results_db: Union[
+            None, str, os.PathLike, ResultsDB
+        ] = None,  # record all completed flow runs in this SQLite database
     ) -> None:
         if debug:
             log.setLevel(logging.DEBUG)
@@ -166,6 +223,14 @@ class FlowRunner:
         self.dump_results_json: bool = dump_results_json
         self.dump_settings_json: bool = dump_settings_json
         self.run_in_existing_dir: bool = run_in_existing_dir
+        self.max_cpus: int = max_cpus or multiprocessing.cpu_count()
+        self.max_memory_gb: Optional[float] = max_memory_gb
+        if artifact_cache is not None and not isinstance(artifact_cache, ArtifactCache):
+            artifact_cache = ArtifactCache(artifact_cache)
+        self.artifact_cache: Optional[ArtifactCache] = artifact_cache
+        if results_db is not None and not isinstance(results_db, ResultsDB):
+            results_db = ResultsDB(results_db)
+        self.results_db: Optional[ResultsDB] = results_db
 
     def _get_flow_run_path(
         self,
@@ -173,10 +238,13 @@ class FlowRunner:
         flow_name: str,
         design_hash: Optional[str] = None,
         flowrun_hash: Optional[str] = None,
+        with_hashes: Optional[bool] = None,
     ) -> Path:
         design_subdir = design_name
         flow_subdir = flow_name
-        if self.cached_dependencies:
+        if with_hashes is None:
+            with_hashes = self.cached_dependencies
+        if with_hashes:
             if design_hash:
                 design_subdir += f"_{design_hash}"
             if flowrun_hash:
@@ -195,6 +263,65 @@ class FlowRunner:
     ) -> Flow:
         return self._run_flow(flow_class, design, flow_settings, None)
 
+    def run_flows(
+        self,
+        flows: Sequence[
+            Tuple[
+                Union[str, Type[Flow]],
+                Design,
+                Union[None, Dict[str, Any], Flow.Settings],
+            ]
+        ],
+        keep_going: bool = False,
+        on_complete: Optional[Callable[[Flow], None]] = None,
+        hashed_run_paths: bool = False,
+        on_error: Optional[Callable[[int, Exception], None]] = None,
+    ) -> List[Flow]:
+        """Run multiple (flow_class, design, flow_settings) in parallel, within the max_cpus (and max_memory_gb) budget.
+        Common dependencies are only executed once.
+        If keep_going is set, a failing flow (or a failing dependency) does not stop the execution of independent flows.
+        on_complete is called with each of the flows as soon as it is done (or skipped due to a failed dependency).
+        If hashed_run_paths is set, run directory names always include the design and flow settings hashes.
+        If on_error is set, a flow which can't be prepared (e.g. invalid settings or a failing init()) is left out,
+        and on_error is called with its index in `flows` and the exception. Otherwise, the exception is raised.
+        Unless set in their settings, each flow gets an even share of max_cpus as its `nthreads`.
+        Likewise, dependencies of a flow which don't set `nthreads` get an even share of max_cpus.
+        """
+        graph = FlowGraph(hashed_run_paths)
+        nodes = []
+        nthreads = max(1, self.max_cpus // max(1, len(flows)))
+        for i, (flow_class, design, flow_settings) in enumerate(flows):
+            flow_settings = _default_nthreads(flow_settings, nthreads)
+            try:
+                nodes.append(
+                    self._add_flow(graph, flow_class, design, flow_settings, None)
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                if on_error is None:
+                    raise
+                on_error(i, e)
+        roots = {id(node) for node in nodes}
+
+        def finalize(node: FlowNode) -> None:
+            if not node.skipped:
+                self._finalize_flow(node)
+            if on_complete and id(node) in roots:
+                on_complete(node.flow)
+
+        self._scheduler(finalize, keep_going).run(graph)
+        return [node.flow for node in nodes]
+
+    def _scheduler(
+        self, finalize: Callable[[FlowNode], None], keep_going: bool = False
+    ) -> FlowScheduler:
+        return FlowScheduler(
+            self.max_cpus,
+            self._execute_flow,
+            finalize,
+            keep_going=keep_going,
+            max_memory_gb=self.max_memory_gb,
+        )
+
     def _run_flow(
         self,
         flow_class: Union[str, Type[Flow]],
@@ -202,6 +329,20 @@ class FlowRunner:
         flow_settings: Union[None, Dict[str, Any], Flow.Settings],
         depender: Optional[Flow],
     ) -> Flow:
+        graph = FlowGraph()
+        node = self._add_flow(graph, flow_class, design, flow_settings, depender)
+        self._scheduler(self._finalize_flow).run(graph)
+        return node.flow
+
+    def _add_flow(
+        self,
+        graph: FlowGraph,
+        flow_class: Union[str, Type[Flow]],
+        design: Design,
+        flow_settings: Union[None, Dict[str, Any], Flow.Settings],
+        depender: Optional[Flow],
+    ) -> FlowNode:
+        """Instantiate and initialize the flow and (recursively) all of its dependencies and add them to the graph"""
         if self.run_in_existing_dir:
             log.error(
                 "run_in_existing_dir should only be used during Xeda's development!"
@@ -229,12 +370,24 @@ class FlowRunner:
                 xeda_version=__version__,
             ),
         )
+        key = (flow_name, design_hash, flowrun_hash)
+        if key in graph.nodes:
+            log.debug("%s (%s, %s) is already scheduled", flow_name, *key[1:])
+            return graph.nodes[key]
+
         run_path = self._get_flow_run_path(
             design.name,
             flow_name,
             design_hash,
             flowrun_hash,
+            with_hashes=graph.hashed_run_paths or None,
         )
+        if run_path in graph.run_paths:
+            # a different variant of the same flow and design is also part of this run
+            run_path = self._get_flow_run_path(
+                design.name, flow_name, design_hash, flowrun_hash, with_hashes=True
+            )
+        graph.run_paths[run_path] = key
 
         settings_json = run_path / "settings.json"
         results_json = run_path / "results.json"
@@ -297,41 +450,73 @@ class FlowRunner:
             flow.design_hash = design_hash
             flow.flow_hash = flowrun_hash
             flow.timestamp = datetime.now().strftime("%Y-%m-%d-%H%M%S")
-            # flow execution time includes init() as well as execution of all its dependency flows
             flow.init_time = time.monotonic()
             flow.init()
+            init_seconds = time.monotonic() - flow.init_time
 
+        cache_key = None
+        if self.artifact_cache and not previous_results:
+            cache_key = _semantic_hash(
+                dict(
+                    design_hash=design_hash,
+                    flowrun_hash=flowrun_hash,
+                    tools=tool_versions(flow),
+                )
+            )
+            previous_results = self.artifact_cache.restore(cache_key, flow)
+
+        node = FlowNode(key, flow, previous_results)
+        node.cache_key = cache_key
+        node.init_seconds = init_seconds
+        # unless set in their settings, independent dependencies share max_cpus, so they can run in parallel
+        dep_nthreads = max(1, self.max_cpus // max(1, len(flow.dependencies)))
         for dep_cls, dep_settings in flow.dependencies:
+            dep_settings = _default_nthreads(dep_settings, dep_nthreads)
             # merge with existing self.flows[dep].settings
             # NOTE this allows dependency flow to make changes to 'design'
             log.info(
-                "Running dependency: %s (%s.%s)",
+                "Adding dependency: %s (%s.%s)",
                 dep_cls.name,
                 dep_cls.__module__,
                 dep_cls.__qualname__,
             )
-            completed_dep = self._run_flow(dep_cls, design, dep_settings, depender=flow)
-            if not completed_dep.succeeded:
-                log.critical("Dependency flow: %s failed!", dep_cls.name)
-                raise FlowDependencyFailure()
-            flow.completed_dependencies.append(completed_dep)
-
+            node.dependencies.append(
+                self._add_flow(graph, dep_cls, design, dep_settings, depender=flow)
+            )
+        graph.add(node)
+        return node
+
+    def _execute_flow(self, node: FlowNode) -> None:
+        """Run the flow and parse its reports. Can be executed in a worker process."""
+        flow = node.flow
+        run_path = flow.run_path
+        flow.completed_dependencies = [dep.flow for dep in node.dependencies]
+        # flow execution time includes init() as well as execution of all its dependency flows,
+        # but not the time waiting to be scheduled
+        start_time = node.first_start_time()
+        if start_time is not None:
+            flow.init_time = start_time - node.init_seconds
         flow.results["design"] = flow.design.name
         flow.results["flow"] = flow.name
         success = True
 
-        if previous_results:
-            log.warning("Using previous run results and artifacts from %s", run_path)
-            flow.results = previous_results
+        if node.previous_results:
+            log.warning("Using previous run results and artifacts of %s", flow.name)
+            flow.results = Box(node.previous_results)
         else:
             with WorkingDirectory(run_path):
                 try:
-                    flow.run()
+                    with ProcessTimeout(flow.settings.timeout_seconds):
+                        flow.run()
                 except NonZeroExitCode as e:
                     log.critical(
                         "Execution of %s returned %d", e.command_args[0], e.exit_code
                     )
                     success = False
+                except ToolTimeout as e:
+                    log.critical("%s timed out: %s", flow.name, e)
+                    flow.results.timed_out = True
+                    success = False
                 if flow.init_time is not None:
                     flow.results.runtime = time.monotonic() - flow.init_time
                 try:
@@ -343,9 +528,15 @@ class FlowRunner:
                     success = False
                 if not success:
                     log.error("Failure was reported in the parsed results.")
-                flow.results.success = success
+        flow.results.success = success
+
+    def _finalize_flow(self, node: FlowNode) -> None:
+        """Print the artifacts, dump and display the results of a completed flow"""
+        flow = node.flow
+        results_json = flow.run_path / "results.json"
 
         if flow.artifacts and flow.succeeded:
+
             def default_encoder(x: Any) -> str:
                 if isinstance(x, (PosixPath, os.PathLike)):
                     return str(os.path.relpath(x, flow.run_path))
@@ -354,8 +545,7 @@ class FlowRunner:
             print(f"Generated artifacts in {flow.run_path}:")  # FIXME
             print_json(data=flow.artifacts, default=default_encoder)  # FIXME
 
-        flow.results.success = success
-        if not success:
+        if not flow.succeeded:
             # set success=false if execution failed
             log.critical("%s failed!", flow.name)
 
@@ -363,13 +553,24 @@ class FlowRunner:
             dump_json(flow.results, results_json)
             log.info("Results written to %s", results_json)
 
+        if self.artifact_cache and node.cache_key and not node.previous_results:
+            self.artifact_cache.store(node.cache_key, flow)
+
+        if self.results_db:
+            try:
+                run_id = self.results_db.record(
+                    flow, cached=bool(node.previous_results)
+                )
+                log.info("Recorded as run %d in %s", run_id, self.results_db.path)
+            except sqlite3.Error as e:
+                log.warning("Failed to record results in %s: %s", self.results_db.path, e)
+
         if self.display_results:
             print_results(
                 flow,
                 title=f"{flow.name} Results",
                 skip_if_empty={"artifacts", "reports"},
             )
-        return flow
 
 
 class DefaultRunner(FlowRunner):
@@ -0,0 +1,190 @@
+"""Content-addressed cache of flow results, artifacts and reports"""
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from box import Box
+
+from ..flows.flow import Flow
+from ..tool import Tool, ToolException
+from ..utils import dump_json
+
+__all__ = [
+    "ArtifactCache",
+    "flow_tools",
+    "tool_versions",
+]
+
+log = logging.getLogger(__name__)
+
+
+def flow_tools(flow: Flow) -> List[Tool]:
+    """Tool instances used by the flow, i.e. instance or class attributes of type Tool"""
+    tools: List[Tool] = []
+    namespaces = [vars(flow)] + [vars(cls) for cls in type(flow).__mro__]
+    for ns in namespaces:
+        for name, attr in ns.items():
+            if isinstance(attr, Tool) and not name.startswith("__"):
+                if not any(attr is t for t in tools):
+                    tools.append(attr)
+    return tools
+
+
+def tool_versions(flow: Flow) -> Dict[str, str]:
+    """versions of all tools used by the flow"""
+    versions = {}
+    for tool in flow_tools(flow):
+        try:
+            version = ".".join(tool.version)
+        except (ToolException, AssertionError) as e:
+            log.debug("Could not get the version of %s: %s", tool.executable, e)
+            version = "unknown"
+        versions[tool.executable] = version
+    return versions
+
+
+def _map_paths(data: Any, fn: Callable[[str], Any]) -> Any:
+    if isinstance(data, dict):
+        return {k: _map_paths(v, fn) for k, v in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_map_paths(v, fn) for v in data]
+    if isinstance(data, (str, os.PathLike)):
+        return fn(str(data))
+    return data
+
+
+def _copy(src: Path, dst: Path) -> None:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if src.is_dir():
+        shutil.copytree(src, dst, symlinks=True, dirs_exist_ok=True)
+    else:
+        shutil.copy2(src, dst)
+
+
+class ArtifactCache:
+    """
+    Stores results.json, artifacts and report files of successful flow runs under
+    <root>/<key[:2]>/<key>, where key is a hash of the design, flow settings and tool versions.
+    Any FlowRunner using the same root can restore them into a new run directory.
+    """
+
+    RESULTS_JSON = "results.json"
+    MANIFEST_JSON = "manifest.json"
+    FILES_DIR = "files"
+
+    def __init__(self, root: Union[str, os.PathLike]) -> None:
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def entry_path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def __contains__(self, key: str) -> bool:
+        return (self.entry_path(key) / self.MANIFEST_JSON).exists()
+
+    @staticmethod
+    def _files_of(flow: Flow) -> List[str]:
+        """existing files (or directories) in flow.artifacts and flow.reports, relative to flow.run_path"""
+        files: List[str] = []
+        run_path = flow.run_path.resolve()
+
+        def add(p: str) -> str:
+            path = Path(p)
+            if not path.is_absolute():
+                path = run_path / path
+            try:
+                rel = path.resolve().relative_to(run_path)
+            except ValueError:
+                log.debug("%s is outside of %s and will not be cached", p, run_path)
+                return p
+            if path.exists() and str(rel) not in files:
+                files.append(str(rel))
+            return p
+
+        _map_paths(flow.artifacts, add)
+        _map_paths(flow.reports, add)
+        return files
+
+    def store(self, key: str, flow: Flow) -> Optional[Path]:
+        """Add results, artifacts and reports of a successful flow to the cache"""
+        if not flow.succeeded:
+            return None
+        entry = self.entry_path(key)
+        if key in self:
+            log.debug("%s is already cached in %s", flow.name, entry)
+            return entry
+        run_path = flow.run_path.resolve()
+
+        def relative_artifact(p: str) -> Any:
+            path = Path(p)
+            if path.is_absolute():
+                try:
+                    return {"run_path": str(path.resolve().relative_to(run_path))}
+                except ValueError:
+                    pass
+            return p
+
+        manifest = dict(
+            flow=flow.name,
+            design=flow.design.name,
+            design_hash=flow.design_hash,
+            flowrun_hash=flow.flow_hash,
+            tools=tool_versions(flow),
+            artifacts=_map_paths(flow.artifacts, relative_artifact),
+            files=self._files_of(flow),
+        )
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{key}.", dir=entry.parent))
+        try:
+            for f in manifest["files"]:
+                _copy(run_path / f, tmp_dir / self.FILES_DIR / f)
+            dump_json(flow.results, tmp_dir / self.RESULTS_JSON)
+            dump_json(manifest, tmp_dir / self.MANIFEST_JSON)
+            # atomic, unless another process has already added the same entry
+            tmp_dir.rename(entry)
+        except OSError as e:
+            if key not in self:
+                log.warning("Failed to add %s to the artifact cache: %s", flow.name, e)
+                return None
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        log.info("Added %s results and artifacts to cache: %s", flow.name, entry)
+        return entry
+
+    def restore(self, key: str, flow: Flow) -> Optional[Dict[str, Any]]:
+        """Copy cached files to flow.run_path and restore its artifacts. Returns the cached results, if found."""
+        entry = self.entry_path(key)
+        try:
+            with open(entry / self.MANIFEST_JSON) as f:
+                manifest = json.load(f)
+            with open(entry / self.RESULTS_JSON) as f:
+                results = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            log.warning("Ignoring invalid cache entry %s: %s", entry, e)
+            return None
+        run_path = flow.run_path.resolve()
+        try:
+            for f in manifest.get("files", []):
+                _copy(entry / self.FILES_DIR / f, run_path / f)
+        except OSError as e:
+            log.warning("Failed to restore cached files from %s: %s", entry, e)
+            return None
+
+        def absolute_artifact(data: Any) -> Any:
+            if isinstance(data, dict):
+                if set(data.keys()) == {"run_path"}:
+                    return str(run_path / data["run_path"])
+                return {k: absolute_artifact(v) for k, v in data.items()}
+            if isinstance(data, list):
+                return [absolute_artifact(v) for v in data]
+            return data
+
+        flow.artifacts = Box(absolute_artifact(manifest.get("artifacts", {})))
+        log.info("Restored %s from cache: %s", flow.name, entry)
+        return results
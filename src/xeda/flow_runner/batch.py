@@ -0,0 +1,179 @@
+"""Batch runs: all combinations of designs and flows (e.g. of a xedaproject), in parallel"""
+import fnmatch
+import logging
+from copy import deepcopy
+from typing import Any, Dict, List, Optional, Sequence, Type, Union
+
+from rich import box
+from rich.table import Table
+from rich.text import Text
+
+from ..console import console
+from ..design import Design
+from ..flows.flow import Flow
+from . import FlowRunner, get_flow_class
+from .dse import _fmt, get_value
+
+__all__ = [
+    "Batch",
+    "BatchJob",
+    "select_designs",
+]
+
+log = logging.getLogger(__name__)
+
+
+def select_designs(designs: Sequence[Design], patterns: Sequence[str]) -> List[Design]:
+    """designs with a name matching any of the glob patterns (all designs if there are no patterns), in their original order"""
+    if not patterns:
+        return list(designs)
+    for pattern in patterns:
+        if not any(fnmatch.fnmatchcase(d.name, pattern) for d in designs):
+            log.warning("No design matches '%s'", pattern)
+    return [d for d in designs if any(fnmatch.fnmatchcase(d.name, p) for p in patterns)]
+
+
+class BatchJob:
+    """A (design, flow) pair of a batch, and its outcome"""
+
+    def __init__(
+        self, design: Design, flow_class: Type[Flow], settings: Dict[str, Any]
+    ) -> None:
+        self.design = design
+        self.flow_class = flow_class
+        self.settings = settings
+        self.flow: Optional[Flow] = None
+        self.error: Optional[str] = None  # the flow could not be prepared
+
+    @property
+    def succeeded(self) -> bool:
+        return self.flow is not None and self.flow.succeeded
+
+    @property
+    def status(self) -> str:
+        if self.flow is None:
+            return "ERROR"
+        return "OK" if self.flow.succeeded else "FAILED"
+
+    def __repr__(self) -> str:
+        return f"BatchJob({self.design.name}, {self.flow_class.name}: {self.status})"
+
+
+class Batch:
+    """
+    Run every flow on every design, in parallel on the FlowRunner within its `max_cpus` (and `max_memory_gb`) budget.
+    Failing flows do not stop the others, and flows which can not even be prepared (e.g. due to invalid settings)
+    are reported as errors. Unless set in their settings, each flow gets an even share of the CPUs (`nthreads`).
+    """
+
+    def __init__(
+        self,
+        runner: FlowRunner,
+        designs: Sequence[Design],
+        flows: Sequence[Union[str, Type[Flow]]],
+        flows_settings: Optional[Dict[str, Dict[str, Any]]] = None,
+        metrics: Optional[List[str]] = None,
+        nthreads: Optional[int] = None,
+    ) -> None:
+        self.runner = runner
+        self.metrics = list(metrics or [])
+        if "runtime" not in self.metrics:
+            self.metrics.append("runtime")
+        flow_classes = [get_flow_class(f) if isinstance(f, str) else f for f in flows]
+        flows_settings = flows_settings or {}
+        self.jobs = [
+            BatchJob(
+                design, flow_class, deepcopy(flows_settings.get(flow_class.name, {}))
+            )
+            for design in designs
+            for flow_class in flow_classes
+        ]
+        if nthreads is None:
+            nthreads = max(1, runner.max_cpus // max(1, len(self.jobs)))
+        for job in self.jobs:
+            job.settings.setdefault("nthreads", nthreads)
+
+    def run(self) -> List[BatchJob]:
+        """Run all jobs and print a line as soon as each of them is done"""
+        total = len(self.jobs)
+        completed = 0
+        log.info(
+            "Running %d flow(s) on %d CPUs%s",
+            total,
+            self.runner.max_cpus,
+            f" and {self.runner.max_memory_gb} GB" if self.runner.max_memory_gb else "",
+        )
+
+        def progress(job: BatchJob, status: Text) -> None:
+            nonlocal completed
+            completed += 1
+            console.print(
+                f"[{completed}/{total}] {job.design.name} {job.flow_class.name}: ",
+                status,
+                highlight=False,
+            )
+
+        def on_error(i: int, e: Exception) -> None:
+            job = self.jobs[i]
+            job.error = str(e) or repr(e)
+            log.error("%s %s: %s", job.design.name, job.flow_class.name, job.error)
+            progress(job, Text("ERROR", "red"))
+
+        # not keyed by the design object: flows run in worker processes get back a copy
+        jobs = {(job.design.name, job.flow_class.name): job for job in self.jobs}
+
+        def on_complete(flow: Flow) -> None:
+            job = jobs[(flow.design.name, flow.name)]
+            job.flow = flow
+            progress(
+                job,
+                Text("OK", "green") if flow.succeeded else Text("FAILED", "red"),
+            )
+
+        self.runner.run_flows(
+            [(job.flow_class, job.design, job.settings) for job in self.jobs],
+            keep_going=True,
+            on_complete=on_complete,
+            on_error=on_error,
+        )
+        return self.jobs
+
+    @property
+    def num_failed(self) -> int:
+        return sum(1 for job in self.jobs if not job.succeeded)
+
+    @property
+    def exit_code(self) -> int:
+        """0 if all flows succeeded, 1 otherwise"""
+        return 1 if self.num_failed else 0
+
+    def results_table(self) -> Table:
+        table = Table(
+            title=f"Batch: {len(self.jobs) - self.num_failed} of {len(self.jobs)} succeeded",
+            box=box.ROUNDED,
+        )
+        table.add_column("Design", style="bold")
+        table.add_column("Flow")
+        table.add_column("Status")
+        for m in self.metrics:
+            table.add_column(m, justify="right")
+        colors = dict(OK="green", FAILED="red", ERROR="red")
+        for job in self.jobs:
+            results = job.flow.results if job.flow else {}
+            table.add_row(
+                job.design.name,
+                job.flow_class.name,
+                Text(job.status, colors[job.status]),
+                *[_fmt(get_value(results, m)) for m in self.metrics],
+            )
+        return table
+
+    def print_results(self) -> None:
+        console.print(self.results_table())
+        for job in self.jobs:
+            if job.error:
+                console.print(
+                    f"{job.design.name} {job.flow_class.name}: {job.error}",
+                    style="red",
+                    highlight=False,
+                )
@@ -0,0 +1,385 @@
+"""Design-space exploration: run many variants of a flow in parallel"""
+import itertools
+import logging
+from copy import deepcopy
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, Union
+
+from rich.table import Column, Table
+from rich.text import Text
+
+from ..console import console
+from ..design import Design
+from ..flows.flow import Flow
+from ..utils import set_hierarchy
+from . import FlowRunner, get_flow_class
+
+__all__ = [
+    "Dse",
+    "FmaxSearch",
+    "expand_search_space",
+    "get_value",
+]
+
+log = logging.getLogger(__name__)
+
+
+def expand_search_space(search_space: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """All combinations (Cartesian product) of the values of each (hierarchical) setting in search_space"""
+    keys = list(search_space.keys())
+    return [
+        dict(zip(keys, values))
+        for values in itertools.product(*(search_space[k] for k in keys))
+    ]
+
+
+def get_value(data: Any, path: str, sep: str = ".") -> Any:
+    """value of a hierarchical key (e.g. "impl.strategy") in nested dicts or objects, or None if not found"""
+    for k in path.split(sep):
+        if isinstance(data, dict):
+            data = data.get(k)
+        else:
+            data = getattr(data, k, None)
+        if data is None:
+            return None
+    return data
+
+
+def _fmt(v: Any) -> str:
+    if v is None:
+        return "-"
+    if isinstance(v, float):
+        return f"{v:.3f}"
+    return str(v)
+
+
+class _StreamingTable:
+    """Print a table one row at a time, with fixed column widths"""
+
+    def __init__(self, title: str, columns: List[str], width: int = 12) -> None:
+        self.title = title
+        self.columns = columns
+        self.widths = [max(width, len(c)) for c in columns]
+        self.header_printed = False
+
+    def _table(self, show_header: bool) -> Table:
+        return Table(
+            *[
+                Column(c, width=w, justify="right")
+                for c, w in zip(self.columns, self.widths)
+            ],
+            title=self.title if show_header else None,
+            show_header=show_header,
+            header_style="bold",
+            box=None,
+            padding=(0, 1),
+        )
+
+    def add_row(self, *cells: Union[str, Text]) -> None:
+        table = self._table(not self.header_printed)
+        table.add_row(*cells)
+        console.print(table)
+        self.header_printed = True
+
+
+class Dse:
+    """
+    Run all variants of a flow from a search space over its settings.
+    Variants run in parallel on the FlowRunner, each in its own run directory, while
+    the sum of their `nthreads` stays within the runner's `max_cpus`.
+    Results are printed as soon as each variant finishes.
+    """
+
+    def __init__(
+        self,
+        runner: FlowRunner,
+        flow_class: Union[str, Type[Flow]],
+        design: Design,
+        base_settings: Optional[Dict[str, Any]] = None,
+        metrics: Optional[List[str]] = None,
+        optimize: Optional[str] = None,
+        minimize: bool = False,
+    ) -> None:
+        if isinstance(flow_class, str):
+            flow_class = get_flow_class(flow_class)
+        self.runner = runner
+        self.flow_class = flow_class
+        self.design = design
+        self.base_settings = base_settings or {}
+        self.optimize = optimize
+        self.minimize = minimize
+        if metrics is None:
+            metrics = []
+        if optimize and optimize not in metrics:
+            metrics = [optimize, *metrics]
+        self.metrics = metrics
+        self.flows: List[Flow] = []
+        self._table: Optional[_StreamingTable] = None
+
+    def variant_settings(
+        self, variant: Dict[str, Any], nthreads: int
+    ) -> Dict[str, Any]:
+        settings = deepcopy(self.base_settings)
+        settings.setdefault("nthreads", nthreads)
+        for k, v in variant.items():
+            set_hierarchy(settings, k, v)
+        return settings
+
+    def default_nthreads(self, num_variants: int) -> int:
+        """divide the CPUs evenly among the variants"""
+        return max(1, self.runner.max_cpus // max(1, num_variants))
+
+    def score(self, flow: Flow) -> Optional[float]:
+        if not self.optimize or not flow.succeeded:
+            return None
+        value = get_value(flow.results, self.optimize)
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            return None
+        return -value if self.minimize else value
+
+    def best(self) -> Optional[Flow]:
+        """successful variant with the best value of the `optimize` result"""
+        scored = [(self.score(f), f) for f in self.flows]
+        scored = [(s, f) for s, f in scored if s is not None]
+        if not scored:
+            return None
+        return max(scored, key=lambda sf: sf[0])[1]
+
+    def run_variants(
+        self, variants: List[Dict[str, Any]], nthreads: Optional[int] = None
+    ) -> List[Flow]:
+        """Run variants in parallel and print the results of each as soon as it completes"""
+        if not variants:
+            return []
+        keys = list(variants[0].keys())
+        if nthreads is None:
+            nthreads = self.default_nthreads(len(variants))
+        log.info(
+            "Running %d variants of %s on %d CPUs",
+            len(variants),
+            self.flow_class.name,
+            self.runner.max_cpus,
+        )
+        if self._table is None:
+            self._table = _StreamingTable(
+                f"{self.flow_class.name} design-space exploration",
+                ["#", *keys, "success", *self.metrics, "runtime"],
+            )
+        table = self._table
+        first = len(self.flows)
+        completed = 0
+
+        def on_complete(flow: Flow) -> None:
+            nonlocal completed
+            completed += 1
+            table.add_row(
+                f"{first + completed}/{first + len(variants)}",
+                *[_fmt(get_value(flow.settings, k)) for k in keys],
+                Text("OK", "green") if flow.succeeded else Text("FAILED", "red"),
+                *[_fmt(get_value(flow.results, m)) for m in self.metrics],
+                _fmt(flow.results.get("runtime")),
+            )
+
+        flows = self.runner.run_flows(
+            [
+                (self.flow_class, self.design, self.variant_settings(v, nthreads))
+                for v in variants
+            ],
+            keep_going=True,
+            on_complete=on_complete,
+            hashed_run_paths=True,
+        )
+        self.flows.extend(flows)
+        return flows
+
+    def run(self, search_space: Dict[str, Sequence[Any]]) -> List[Flow]:
+        keys = list(search_space.keys())
+        flows = self.run_variants(expand_search_space(search_space))
+        num_failed = sum(1 for f in flows if not f.succeeded)
+        if num_failed:
+            log.warning("%d of %d variants failed", num_failed, len(flows))
+        if self.optimize:
+            best = self.best()
+            if best:
+                console.print(
+                    f"Best {self.optimize}={_fmt(get_value(best.results, self.optimize))} with "
+                    + ", ".join(
+                        f"{k}={_fmt(get_value(best.settings, k))}" for k in keys
+                    )
+                    + f" in {best.run_path}"
+                )
+            else:
+                log.error("No successful variant reported '%s'", self.optimize)
+        return flows
+
+
+class FmaxSearch(Dse):
+    """
+    Find the highest clock frequency for which a synthesis flow meets timing.
+    Each round runs `candidates` clock periods in parallel. The bracket [lo, hi] between the largest failing
+    and the smallest passing period is narrowed using the measured WNS: period - WNS is the next guess
+    (falling back to bisection if the guess is outside the bracket). The search stops when the bracket is
+    narrower than `tolerance` (in nanoseconds), or after `max_rounds` rounds.
+    """
+
+    def __init__(
+        self,
+        runner: FlowRunner,
+        flow_class: Union[str, Type[Flow]],
+        design: Design,
+        base_settings: Optional[Dict[str, Any]] = None,
+        metrics: Optional[List[str]] = None,
+        init_period: Optional[float] = None,
+        tolerance: float = 0.05,
+        candidates: Optional[int] = None,
+        max_rounds: int = 8,
+        spread: float = 0.1,
+    ) -> None:
+        super().__init__(
+            runner,
+            flow_class,
+            design,
+            base_settings,
+            metrics=["wns", "Fmax", *(metrics or [])],
+        )
+        if init_period is None:
+            init_period = self.base_settings.get("clock_period")
+        if not init_period or init_period <= 0:
+            raise ValueError(
+                "A positive initial clock_period is required for fmax search"
+            )
+        self.init_period = float(init_period)
+        self.tolerance = tolerance
+        self.candidates = max(1, candidates or min(4, runner.max_cpus))
+        self.max_rounds = max_rounds
+        self.spread = spread
+        self.lo: Optional[float] = None  # largest period failing timing
+        self.hi: Optional[float] = None  # smallest period meeting timing
+        self._lo_wns: float = 0.0
+        self._hi_wns: float = 0.0
+
+    def variant_settings(
+        self, variant: Dict[str, Any], nthreads: int
+    ) -> Dict[str, Any]:
+        settings = super().variant_settings(variant, nthreads)
+        clocks = settings.get("clocks")
+        if isinstance(clocks, dict) and "main_clock" in clocks:
+            # clock_period is only used if main_clock is not specified
+            main_clock = clocks["main_clock"]
+            if isinstance(main_clock, dict):
+                main_clock = {
+                    k: v for k, v in main_clock.items() if k not in ("freq", "fall")
+                }
+                main_clock["period"] = settings["clock_period"]
+                clocks["main_clock"] = main_clock
+            else:
+                del clocks["main_clock"]
+        return settings
+
+    @staticmethod
+    def _period_wns(flow: Flow) -> Tuple[Optional[float], Optional[float]]:
+        period = get_value(flow.settings, "clock_period")
+        wns = flow.results.get("wns")
+        if not isinstance(wns, (int, float)) or isinstance(wns, bool):
+            wns = None
+        return period, wns
+
+    def passed(self, flow: Flow) -> bool:
+        _, wns = self._period_wns(flow)
+        return wns is not None and wns >= 0 and flow.succeeded
+
+    def score(self, flow: Flow) -> Optional[float]:
+        period, wns = self._period_wns(flow)
+        if period is None or wns is None or not self.passed(flow):
+            return None
+        return 1000.0 / (period - wns)
+
+    @property
+    def converged(self) -> bool:
+        return (
+            self.lo is not None
+            and self.hi is not None
+            and self.hi - self.lo <= self.tolerance
+        )
+
+    def _update(self, flows: List[Flow]) -> Optional[float]:
+        """update the bracket from the results and return the next guess"""
+        guess, min_abs_wns = None, None
+        for flow in flows:
+            period, wns = self._period_wns(flow)
+            if period is None or wns is None:
+                continue  # failed without timing results
+            if wns < 0:
+                if self.lo is None or period > self.lo:
+                    self.lo, self._lo_wns = period, wns
+            elif flow.succeeded:
+                if self.hi is None or period < self.hi:
+                    self.hi, self._hi_wns = period, wns
+            else:
+                continue
+            # linear estimate is the most accurate closest to the boundary
+            if min_abs_wns is None or abs(wns) < min_abs_wns:
+                min_abs_wns = abs(wns)
+                guess = period - wns
+        if self.lo is not None and self.hi is not None:
+            # secant through both ends of the bracket also accounts for WNS not changing 1:1 with period
+            slope = (self._hi_wns - self._lo_wns) / (self.hi - self.lo)
+            if slope > 0:
+                guess = self.lo - self._lo_wns / slope
+        return guess
+
+    def next_candidates(self, guess: Optional[float]) -> List[float]:
+        lo, hi, n = self.lo, self.hi, self.candidates
+        if lo is not None and hi is not None:
+            if guess is None or not lo < guess < hi:
+                guess = (lo + hi) / 2
+            step = (hi - lo) / n
+            periods = [guess] + [lo + step * (i + 0.5) for i in range(n)]
+        elif guess is None or guess <= 0:
+            return []
+        elif hi is not None:  # all passed: try faster
+            periods = [guess * (1 - self.spread * i) for i in range(n)]
+        else:  # all failed: try slower
+            periods = [guess * (1 + self.spread * i) for i in range(n)]
+        tried = {get_value(f.settings, "clock_period") for f in self.flows}
+        candidates: List[float] = []
+        for p in periods:
+            p = round(p, 3)
+            if p > 0 and p not in tried and p not in candidates:
+                if lo is not None and p <= lo or hi is not None and p >= hi:
+                    continue
+                candidates.append(p)
+            if len(candidates) == n:
+                break
+        return sorted(candidates)
+
+    def search(self) -> Optional[Flow]:
+        """Run the search and return the passing flow with the highest Fmax"""
+        n = self.candidates
+        periods = sorted(
+            round(self.init_period * (1 + self.spread * (i - (n - 1) / 2)), 3)
+            for i in range(n)
+        )
+        nthreads = self.default_nthreads(n)
+        for rnd in range(self.max_rounds):
+            if not periods:
+                log.info("No new candidate periods")
+                break
+            log.info("Fmax search round %d: clock_period=%s", rnd + 1, periods)
+            flows = self.run_variants(
+                [{"clock_period": p} for p in periods], nthreads=nthreads
+            )
+            guess = self._update(flows)
+            if self.converged:
+                break
+            periods = self.next_candidates(guess)
+        best = self.best()
+        if best is not None:
+            console.print(
+                f"Fmax: {self.score(best):.3f} MHz (clock_period={get_value(best.settings, 'clock_period')} ns"
+                f" wns={best.results.get('wns')}) in {best.run_path}"
+            )
+            if self.lo is not None and self.hi is not None:
+                console.print(f"Final clock_period bracket: ({self.lo}, {self.hi}]")
+        else:
+            log.error("No candidate clock period met timing")
+        return best
@@ -0,0 +1,316 @@
+"""SQLite database of flow runs and their results"""
+import json
+import logging
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from ..flows.flow import Flow
+from ..version import __version__
+from .artifact_cache import tool_versions
+
+__all__ = [
+    "ResultsDB",
+    "RESULTS_DB_ENV",
+    "flatten_metrics",
+    "parse_filter",
+    "parse_since",
+]
+
+log = logging.getLogger(__name__)
+
+RESULTS_DB_ENV = "XEDA_RESULTS_DB"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    design TEXT NOT NULL,
+    design_hash TEXT,
+    flow TEXT NOT NULL,
+    flow_hash TEXT,
+    success INTEGER NOT NULL,
+    cached INTEGER NOT NULL DEFAULT 0,
+    runtime REAL,
+    run_path TEXT,
+    xeda_version TEXT,
+    settings TEXT,
+    results TEXT,
+    tools TEXT,
+    artifacts TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_design_flow ON runs (design, flow, timestamp);
+CREATE INDEX IF NOT EXISTS runs_design_hash ON runs (design_hash);
+CREATE INDEX IF NOT EXISTS runs_flow_hash ON runs (flow_hash);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (run_id, name)
+);
+CREATE INDEX IF NOT EXISTS metrics_name_value ON metrics (name, value);
+"""
+
+RUN_COLUMNS = (
+    "id",
+    "timestamp",
+    "design",
+    "design_hash",
+    "flow",
+    "flow_hash",
+    "success",
+    "cached",
+    "runtime",
+    "run_path",
+    "xeda_version",
+)
+JSON_COLUMNS = ("settings", "results", "tools", "artifacts")
+
+FILTER_OPS = ("<=", ">=", "!=", "=", "<", ">")
+
+
+def _json_default(x: Any) -> Any:
+    if isinstance(x, os.PathLike):
+        return str(x)
+    return x.__dict__ if hasattr(x, "__dict__") else str(x)
+
+
+def flatten_metrics(data: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """numeric values of (nested) results, with hierarchical names joined by '.'"""
+    metrics: Dict[str, float] = {}
+    for k, v in data.items():
+        name = prefix + str(k)
+        if isinstance(v, dict):
+            metrics.update(flatten_metrics(v, name + "."))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            metrics[name] = float(v)
+    return metrics
+
+
+def parse_filter(expr: str) -> Tuple[str, str, Union[str, float]]:
+    """'Fmax>=100' -> ('Fmax', '>=', 100.0)"""
+    for op in FILTER_OPS:
+        if op in expr:
+            name, value = expr.split(op, 1)
+            name, value = name.strip(), value.strip()
+            if not name or not value:
+                break
+            try:
+                return name, op, float(value)
+            except ValueError:
+                return name, op, value
+    raise ValueError(
+        f"Invalid filter '{expr}'. Expected NAME<op>VALUE, op: {FILTER_OPS}"
+    )
+
+
+def parse_since(since: str) -> datetime:
+    """a duration relative to now ('90m', '12h', '7d', '2w') or an ISO date/time"""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([mhdw])", since.strip())
+    if match:
+        unit = dict(m="minutes", h="hours", d="days", w="weeks")[match.group(2)]
+        return datetime.now() - timedelta(**{unit: float(match.group(1))})
+    return datetime.fromisoformat(since.strip())
+
+
+class ResultsDB:
+    """
+    Records flow runs (design and flow hashes, settings, results, tool versions and artifacts) in a SQLite database.
+    Numeric results are also stored as indexed metrics, which can be filtered and sorted on.
+    A connection is opened for each operation, so a ResultsDB can be shared with forked processes.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        self.path = Path(path).resolve()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> Optional["ResultsDB"]:
+        path = os.environ.get(RESULTS_DB_ENV)
+        return cls(path) if path else None
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """connection, in a transaction which is committed (or rolled back on an exception), closed on exit"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA foreign_keys = ON")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, flow: Flow, cached: bool = False) -> int:
+        """add a completed flow run and return its id"""
+        results = dict(flow.results)
+        artifacts = {
+            k: str(flow.run_path / v) if isinstance(v, (str, os.PathLike)) else v
+            for k, v in flow.artifacts.items()
+        }
+        runtime = results.get("runtime")
+        row = dict(
+            timestamp=datetime.now().isoformat(timespec="seconds"),
+            design=flow.design.name,
+            design_hash=getattr(flow, "design_hash", None),
+            flow=flow.name,
+            flow_hash=getattr(flow, "flow_hash", None),
+            success=int(flow.succeeded),
+            cached=int(cached),
+            runtime=runtime if isinstance(runtime, (int, float)) else None,
+            run_path=str(flow.run_path),
+            xeda_version=__version__,
+            settings=json.dumps(flow.settings.dict(), default=_json_default),
+            results=json.dumps(results, default=_json_default),
+            tools=json.dumps(tool_versions(flow)),
+            artifacts=json.dumps(artifacts, default=_json_default),
+        )
+        metrics = flatten_metrics(results)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"INSERT INTO runs ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                tuple(row.values()),
+            )
+            run_id = cursor.lastrowid
+            assert run_id is not None
+            conn.executemany(
+                "INSERT INTO metrics (run_id, name, value) VALUES (?, ?, ?)",
+                [(run_id, k, v) for k, v in metrics.items()],
+            )
+        log.debug("Recorded run %d of %s in %s", run_id, flow.name, self.path)
+        return run_id
+
+    def query(
+        self,
+        design: Optional[str] = None,
+        flow: Optional[str] = None,
+        since: Optional[datetime] = None,
+        success: Optional[bool] = True,
+        filters: Iterable[Tuple[str, str, Union[str, float]]] = (),
+        metrics: Sequence[str] = (),
+        sort: Optional[str] = None,
+        descending: bool = True,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Runs matching all criteria, newest first unless sorted by a metric or run column.
+        filters: (name, op, value) where name is a metric or one of the run columns.
+        Returns run columns and the requested metrics (None if not present) of each run.
+        """
+        joins: List[str] = []
+        join_params: List[Any] = []
+        where: List[str] = []
+        params: List[Any] = []
+        metric_cols: Dict[str, str] = {}
+
+        def metric_col(name: str, inner: bool) -> str:
+            alias = metric_cols.get(name)
+            if alias is None:
+                alias = f"m{len(metric_cols)}"
+                metric_cols[name] = alias
+                joins.append(
+                    f"{'' if inner else 'LEFT '}JOIN metrics {alias} "
+                    f"ON {alias}.run_id = runs.id AND {alias}.name = ?"
+                )
+                join_params.append(name)
+            return f"{alias}.value"
+
+        for name in metrics:
+            metric_col(name, inner=False)
+        for name, op, value in filters:
+            assert op in FILTER_OPS, f"invalid operator {op}"
+            if name in RUN_COLUMNS:
+                where.append(f"runs.{name} {op} ?")
+            else:
+                where.append(f"{metric_col(name, inner=True)} {op} ?")
+            params.append(value)
+        if design is not None:
+            where.append("runs.design = ?")
+            params.append(design)
+        if flow is not None:
+            where.append("runs.flow = ?")
+            params.append(flow)
+        if since is not None:
+            where.append("runs.timestamp >= ?")
+            params.append(since.isoformat(timespec="seconds"))
+        if success is not None:
+            where.append("runs.success = ?")
+            params.append(int(success))
+        order = "DESC" if descending else "ASC"
+        if sort is None:
+            order_by = "runs.id DESC"
+        elif sort in RUN_COLUMNS:
+            order_by = f"runs.{sort} {order}"
+        else:
+            order_by = f"{metric_col(sort, inner=True)} {order}"
+        sql = (
+            f"SELECT {', '.join('runs.' + c for c in RUN_COLUMNS)}"
+            + "".join(f", {a}.value AS '{a}'" for a in metric_cols.values())
+            + " FROM runs "
+            + " ".join(joins)
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + f" ORDER BY {order_by}"
+            + (" LIMIT ?" if limit else "")
+        )
+        if limit:
+            params.append(limit)
+        with self._connect() as conn:
+            rows = conn.execute(sql, join_params + params).fetchall()
+        selected = {metric_cols[m]: m for m in metrics}
+        return [
+            {
+                **{c: row[c] for c in RUN_COLUMNS},
+                **{name: row[alias] for alias, name in selected.items()},
+            }
+            for row in rows
+        ]
+
+    def get(self, run_id: int) -> Optional[Dict[str, Any]]:
+        """all data of a run, including its metrics"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+            if row is None:
+                return None
+            metrics = conn.execute(
+                "SELECT name, value FROM metrics WHERE run_id = ? ORDER BY name",
+                (run_id,),
+            ).fetchall()
+        run = {c: row[c] for c in RUN_COLUMNS}
+        for c in JSON_COLUMNS:
+            run[c] = json.loads(row[c]) if row[c] else {}
+        run["metrics"] = {m["name"]: m["value"] for m in metrics}
+        return run
+
+    @staticmethod
+    def flat_settings(settings: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+        """nested settings, with hierarchical names joined by '.'"""
+        flat: Dict[str, Any] = {}
+        for k, v in settings.items():
+            if isinstance(v, dict) and v:
+                flat.update(ResultsDB.flat_settings(v, f"{prefix}{k}."))
+            else:
+                flat[prefix + k] = v
+        return flat
+
+    def metric_names(self) -> List[str]:
+        with self._connect() as conn:
+            return [
+                r["name"]
+                for r in conn.execute("SELECT DISTINCT name FROM metrics ORDER BY name")
+            ]
@@ -0,0 +1,278 @@
+"""Concurrent execution of a dependency graph of flows"""
+import logging
+import multiprocessing
+import signal
+import time
+from multiprocessing.connection import Connection, wait
+from multiprocessing.process import BaseProcess
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from box import Box
+
+from ..flows.flow import Flow, FlowDependencyFailure, FlowFatalError
+
+__all__ = [
+    "FlowNode",
+    "FlowGraph",
+    "FlowScheduler",
+]
+
+log = logging.getLogger(__name__)
+
+NodeKey = Tuple[str, str, str]  # (flow_name, design_hash, flowrun_hash)
+
+
+class FlowNode:
+    """A prepared (instantiated and initialized) flow and the nodes it depends on"""
+
+    def __init__(
+        self,
+        key: NodeKey,
+        flow: Flow,
+        previous_results: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.key = key
+        self.flow = flow
+        self.previous_results = previous_results
+        self.cache_key: Optional[str] = None  # key in the artifact cache
+        self.init_seconds: float = 0.0  # time spent in flow.init()
+        self.start_time: Optional[
+            float
+        ] = None  # time.monotonic() when execution started
+        self.dependencies: List["FlowNode"] = []
+        self.done: bool = False
+        self.skipped: bool = False  # not executed as a dependency had failed
+
+    @property
+    def nthreads(self) -> int:
+        """number of CPUs this node occupies while running"""
+        if self.previous_results:
+            return 0
+        return max(1, self.flow.settings.nthreads)
+
+    @property
+    def memory_gb(self) -> float:
+        """expected memory use of this node while running"""
+        if self.previous_results:
+            return 0.0
+        return self.flow.settings.memory_gb or 0.0
+
+    @property
+    def succeeded(self) -> bool:
+        return self.done and not self.skipped and self.flow.succeeded
+
+    def first_start_time(self) -> Optional[float]:
+        """earliest start time of this node or any of its (transitive) dependencies"""
+        times = [dep.first_start_time() for dep in self.dependencies]
+        times = [t for t in [self.start_time, *times] if t is not None]
+        return min(times) if times else None
+
+    def __repr__(self) -> str:
+        return f"FlowNode({self.flow.name}@{self.flow.run_path})"
+
+
+class FlowGraph:
+    """Flow nodes, de-duplicated by their key, in topological (insertion) order"""
+
+    def __init__(self, hashed_run_paths: bool = False) -> None:
+        self.nodes: Dict[NodeKey, FlowNode] = {}
+        self.run_paths: Dict[Path, NodeKey] = {}
+        # always include design and flow settings hashes in run path names
+        self.hashed_run_paths = hashed_run_paths
+
+    def add(self, node: FlowNode) -> None:
+        assert all(
+            dep.key in self.nodes for dep in node.dependencies
+        ), "dependencies need to be added first"
+        self.nodes[node.key] = node
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+
+def _raise_keyboard_interrupt(signum: int, frame: Any) -> None:
+    raise KeyboardInterrupt(f"received signal {signum}")
+
+
+class FlowScheduler:
+    """
+    Execute all nodes of a FlowGraph as soon as their dependencies are complete.
+    Independent nodes run concurrently, each in a forked process, as long as the sum of their
+    `nthreads` stays within `max_cpus` and the sum of their `memory_gb` within `max_memory_gb` (if set).
+    A node which can't share the CPUs or memory with any other ready node is executed in the current process.
+    `execute` runs the flow (in the worker process) and `finalize` is always called in the
+    current process once a node is done, in the order of completion.
+    A worker process sends back the results, artifacts, design and settings of its flow, which replace those of
+    the flow in the current process. Any other changes made by the flow (e.g. to objects shared with other flows)
+    are lost when it runs in a worker process.
+    """
+
+    def __init__(
+        self,
+        max_cpus: int,
+        execute: Callable[[FlowNode], None],
+        finalize: Callable[[FlowNode], None],
+        keep_going: bool = False,
+        max_memory_gb: Optional[float] = None,
+    ) -> None:
+        self.max_cpus = max(1, max_cpus)
+        self.max_memory_gb = max_memory_gb
+        self.execute = execute
+        self.finalize = finalize
+        self.keep_going = keep_going
+        self._mp_context: Optional[Any] = None
+        if "fork" in multiprocessing.get_all_start_methods():
+            self._mp_context = multiprocessing.get_context("fork")
+        else:
+            log.warning("Concurrent flow execution is not supported on this platform")
+
+    def _cost(self, node: FlowNode) -> int:
+        return min(node.nthreads, self.max_cpus)
+
+    def _memory(self, node: FlowNode) -> float:
+        if self.max_memory_gb is None:
+            return 0.0
+        return min(node.memory_gb, self.max_memory_gb)
+
+    def _fits(self, nodes: List[FlowNode]) -> bool:
+        """can all nodes run at the same time"""
+        if sum(self._cost(n) for n in nodes) > self.max_cpus:
+            return False
+        return (
+            self.max_memory_gb is None
+            or sum(self._memory(n) for n in nodes) <= self.max_memory_gb
+        )
+
+    def _can_share(self, node: FlowNode, ready: List[FlowNode]) -> bool:
+        """can any of the other ready nodes run alongside node"""
+        if self._mp_context is None:
+            return False
+        return any(self._fits([node, other]) for other in ready if other is not node)
+
+    def _failed(self, node: FlowNode, error: BaseException) -> None:
+        if not self.keep_going or not isinstance(error, Exception):
+            raise error
+        log.critical("%s failed: %s", node.flow.name, str(error) or repr(error))
+        node.flow.results.success = False
+
+    def _done(self, node: FlowNode) -> None:
+        node.done = True
+        self.finalize(node)
+
+    def _run_inline(self, node: FlowNode) -> None:
+        node.start_time = time.monotonic()
+        try:
+            self.execute(node)
+        except Exception as e:  # pylint: disable=broad-except
+            self._failed(node, e)
+        self._done(node)
+
+    def _worker(self, node: FlowNode, conn: Connection) -> None:
+        # make terminate() unwind the flow, same as Ctrl-C
+        signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+        error: Optional[BaseException] = None
+        try:
+            self.execute(node)
+        except BaseException as e:  # pylint: disable=broad-except
+            error = e
+        flow = node.flow
+        try:
+            try:
+                conn.send(
+                    (flow.results, flow.artifacts, flow.design, flow.settings, error)
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                log.warning("%s: design and settings not sent back: %s", flow.name, e)
+                conn.send((flow.results, flow.artifacts, None, None, error))
+        except Exception as e:  # pylint: disable=broad-except
+            conn.send((None, None, None, None, FlowFatalError(repr(error or e))))
+        conn.close()
+
+    def _start(
+        self, node: FlowNode, running: Dict[Connection, Tuple[FlowNode, BaseProcess]]
+    ) -> None:
+        assert self._mp_context is not None
+        node.start_time = time.monotonic()
+        recv_conn, send_conn = self._mp_context.Pipe(duplex=False)
+        proc = self._mp_context.Process(
+            target=self._worker,
+            args=(node, send_conn),
+            name=f"xeda:{node.flow.name}",
+        )
+        proc.start()
+        send_conn.close()
+        log.info("Started %s[%s] in %s", node.flow.name, proc.pid, node.flow.run_path)
+        running[recv_conn] = (node, proc)
+
+    def _collect(self, running: Dict[Connection, Tuple[FlowNode, BaseProcess]]) -> None:
+        for conn in wait(list(running.keys())):
+            assert isinstance(conn, Connection)
+            node, proc = running.pop(conn)
+            try:
+                results, artifacts, design, settings, error = conn.recv()
+            except EOFError:
+                results, artifacts, design, settings = None, None, None, None
+                error = FlowFatalError(
+                    f"{node.flow.name} process terminated unexpectedly"
+                )
+            conn.close()
+            proc.join()
+            if results is not None:
+                node.flow.results = Box(results)
+                node.flow.artifacts = Box(artifacts)
+            if design is not None:
+                node.flow.design = design
+            if settings is not None:
+                node.flow.settings = settings
+            if error is not None:
+                self._failed(node, error)
+            self._done(node)
+
+    def run(self, graph: FlowGraph) -> None:
+        pending = list(graph.nodes.values())
+        running: Dict[Connection, Tuple[FlowNode, BaseProcess]] = {}
+        try:
+            while pending or running:
+                ready = []
+                for node in [n for n in pending if all(d.done for d in n.dependencies)]:
+                    failed = [d for d in node.dependencies if not d.succeeded]
+                    if not failed:
+                        ready.append(node)
+                        continue
+                    pending.remove(node)
+                    for dep in failed:
+                        log.critical("Dependency flow: %s failed!", dep.flow.name)
+                    if not self.keep_going:
+                        raise FlowDependencyFailure()
+                    node.skipped = True
+                    node.done = True
+                    self.finalize(node)
+                ran_inline = False
+                active = [n for n, _ in running.values()]
+                for node in ready:
+                    if self._cost(node) == 0 or (
+                        not running and not self._can_share(node, ready)
+                    ):
+                        pending.remove(node)
+                        self._run_inline(node)
+                        ran_inline = True
+                        break
+                    if running and not self._fits(active + [node]):
+                        break
+                    pending.remove(node)
+                    self._start(node, running)
+                    active.append(node)
+                if running and not ran_inline:
+                    self._collect(running)
+        finally:
+            for _, proc in running.values():
+                if proc.is_alive():
+                    proc.terminate()
+            for conn, (node, proc) in running.items():
+                proc.join(10)
+                if proc.is_alive():
+                    log.warning("Killing %s[%s]", node.flow.name, proc.pid)
+                    proc.kill()
+                    proc.join()
+                conn.close()
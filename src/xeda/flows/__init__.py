@@ -1,23 +1,42 @@
-# all Flow classes imported here can be used from FlowRunners and will be reported on the command-line help
-from .dc import Dc
-from .diamond import DiamondSynth
-from .ghdl import GhdlSim, GhdlSynth
-from .ise import IseSynth
-from .modelsim import Modelsim
-from .nextpnr import Nextpnr
-from .openfpgaloader import Openfpgaloader
-from .quartus import Quartus
-from .vivado.vivado_synth import VivadoSynth
-from .vivado.vivado_sim import VivadoSim
-from .vivado.vivado_postsynthsim import VivadoPostsynthSim
-from .vivado.vivado_power import VivadoPower
-from .vivado.vivado_alt_synth import VivadoAltSynth
-from .yosys import Yosys
-
-# alias for backwards compatibility
-from .yosys import Yosys as YosysSynth  # pylint: disable=reimported
+# all Flow classes listed here can be used from FlowRunners and will be reported on the command-line help
+# Flow modules are only imported when a flow is actually used (see `load_flow_class`), which keeps the start-up
+# time of the command-line interface low.
+import importlib
+from typing import Dict, List, Optional, Type
+
+from .flow import Flow, registered_flows
+
+# flow name -> "module:class"
+FLOW_MANIFEST: Dict[str, str] = {
+    "dc": "xeda.flows.dc:Dc",
+    "diamond_synth": "xeda.flows.diamond:DiamondSynth",
+    "ghdl_sim": "xeda.flows.ghdl:GhdlSim",
+    "ghdl_synth": "xeda.flows.ghdl:GhdlSynth",
+    "ise_synth": "xeda.flows.ise:IseSynth",
+    "modelsim": "xeda.flows.modelsim:Modelsim",
+    "nextpnr": "xeda.flows.nextpnr:Nextpnr",
+    "openfpgaloader": "xeda.flows.openfpgaloader:Openfpgaloader",
+    "quartus": "xeda.flows.quartus:Quartus",
+    "quartus_dse": "xeda.flows.quartus:QuartusDse",
+    "vivado_alt_synth": "xeda.flows.vivado.vivado_alt_synth:VivadoAltSynth",
+    "vivado_postsynth_sim": "xeda.flows.vivado.vivado_postsynthsim:VivadoPostsynthSim",
+    "vivado_power": "xeda.flows.vivado.vivado_power:VivadoPower",
+    "vivado_sim": "xeda.flows.vivado.vivado_sim:VivadoSim",
+    "vivado_synth": "xeda.flows.vivado.vivado_synth:VivadoSynth",
+    "yosys": "xeda.flows.yosys:Yosys",
+}
+
+# class name -> flow name
+_CLASS_NAMES: Dict[str, str] = {
+    **{entry.split(":")[1]: name for name, entry in FLOW_MANIFEST.items()},
+    # alias for backwards compatibility
+    "YosysSynth": "yosys",
+}
 
 __all__ = [
+    "FLOW_MANIFEST",
+    "flow_names",
+    "load_flow_class",
     "Dc",
     "DiamondSynth",
     "GhdlSim",
@@ -27,6 +46,7 @@ __all__ = [
     "Nextpnr",
     "Openfpgaloader",
     "Quartus",
+    "QuartusDse",
     "VivadoAltSynth",
     "VivadoPostsynthSim",
     "VivadoPower",
@@ -35,3 +55,27 @@ __all__ = [
     "Yosys",
     "YosysSynth",
 ]
+
+
+def flow_names() -> List[str]:
+    """names of all known flows, without importing their modules"""
+    return sorted(set(FLOW_MANIFEST) | set(registered_flows))
+
+
+def load_flow_class(flow_name: str) -> Optional[Type[Flow]]:
+    """Flow class registered as or listed in the manifest under flow_name, importing its module if needed"""
+    _mod, flow_class = registered_flows.get(flow_name, (None, None))
+    if flow_class is None and flow_name in FLOW_MANIFEST:
+        module_name, class_name = FLOW_MANIFEST[flow_name].split(":")
+        flow_class = getattr(importlib.import_module(module_name), class_name)
+    return flow_class
+
+
+def __getattr__(name: str) -> Type[Flow]:
+    """lazily load flow classes, e.g. `from xeda.flows import VivadoSynth`"""
+    if name in _CLASS_NAMES:
+        flow_class = load_flow_class(_CLASS_NAMES[name])
+        assert flow_class is not None
+        globals()[name] = flow_class
+        return flow_class
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,10 +1,10 @@
+import ast
 import logging
 import os
+import time
 from functools import cached_property
 from pathlib import Path
-from typing import Any, Dict, List, Literal, Optional
-
-from junitparser import JUnitXml
+from typing import Any, Dict, List, Literal, Optional, Sequence
 
 from ..dataclass import Field, XedaBaseModel, validator
 from ..design import Design
@@ -41,6 +41,10 @@ class CocotbSettings(XedaBaseModel):
         [],
         description="A comma-separated list of extra libraries that are dynamically loaded at runtime.",
     )
+    shards: int = Field(
+        1,
+        description="Split the testcases among (up to) this many simulator processes running in parallel, each with its own results file and random seed. Testcases are taken from 'testcase' or discovered in the test module.",
+    )
 
     @validator("testcase", "gpi_extra", pre=True, always=True)
     def str_to_list(cls, value):
@@ -107,8 +111,88 @@ class Cocotb(CocotbSettings, Tool):
             log.info("Cocotb env: %s", ret)
         return ret
 
+    @staticmethod
+    def discover_testcases(module_file: Path) -> Optional[List[str]]:
+        """
+        Names of the tests in a cocotb test module, without importing it: top-level functions with a decorator named
+        `test` or ending in `test` (e.g. `@cocotb.test()`). None if tests might be generated (e.g. using a TestFactory).
+        """
+        try:
+            source = module_file.read_text()
+            tree = ast.parse(source, str(module_file))
+        except (OSError, SyntaxError, ValueError) as e:
+            log.warning("Failed to discover the tests in %s: %s", module_file, e)
+            return None
+        if "TestFactory" in source:
+            return None
+        tests = []
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                for dec in node.decorator_list:
+                    if isinstance(dec, ast.Call):
+                        dec = dec.func
+                    name = (
+                        dec.attr
+                        if isinstance(dec, ast.Attribute)
+                        else dec.id
+                        if isinstance(dec, ast.Name)
+                        else ""
+                    )
+                    if name.endswith("test"):
+                        tests.append(node.name)
+                        break
+        return tests
+
+    def shard_results_xml(self, shard: int) -> str:
+        p = Path(self.results_xml)
+        return str(p.with_name(f"{p.stem}.shard{shard}{p.suffix}"))
+
+    def shard_envs(self, design: Design) -> List[Dict[str, Any]]:
+        """environment of each shard of the testcases, or an empty list if the testcases can't be sharded"""
+        if self.shards <= 1 or not design.tb or not design.tb.cocotb:
+            return []
+        testcases = self.testcase or self.discover_testcases(design.tb.sources[0].file)
+        if not testcases:
+            log.warning("Could not determine the testcases to shard. Use 'testcase'.")
+            return []
+        n = min(self.shards, len(testcases))
+        seed = self.random_seed if self.random_seed is not None else int(time.time())
+        envs = []
+        for i in range(n):
+            env = self.env(design)
+            env["TESTCASE"] = ",".join(testcases[i::n])
+            env["COCOTB_RESULTS_FILE"] = self.shard_results_xml(i)
+            env["RANDOM_SEED"] = seed + i
+            envs.append(env)
+        log.info(
+            "Running %d testcases in %d shards, with random seeds %d..%d",
+            len(testcases),
+            n,
+            seed,
+            seed + n - 1,
+        )
+        return envs
+
+    def merge_results(self, results_files: Sequence[str]) -> None:
+        """merge the results of all shards into results_xml"""
+        from junitparser import JUnitXml  # pylint: disable=import-outside-toplevel
+
+        merged = JUnitXml()
+        for f in results_files:
+            if Path(f).exists():
+                merged += JUnitXml.fromfile(f)
+            else:
+                log.error("Results file %s was not found", f)
+        for suite in merged:
+            suite.update_statistics()
+        merged.update_statistics()
+        merged.write(self.results_xml)
+        self.__dict__.pop("_results", None)
+
     @cached_property
     def _results(self):
+        from junitparser import JUnitXml  # pylint: disable=import-outside-toplevel
+
         results_xml = self.results_xml
         if not Path(results_xml).exists():
             return JUnitXml()
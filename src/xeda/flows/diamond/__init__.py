@@ -1,8 +1,10 @@
 import logging
+from pathlib import Path
 from typing import List, Literal, Optional
 from ..flow import FpgaSynthFlow
 from ...tool import Tool
 from ...dataclass import validator
+from ...design import Design
 
 log = logging.getLogger(__name__)
 
@@ -22,6 +24,10 @@ class DiamondSynth(FpgaSynthFlow):
                 syn_cmdline_args = []
             return syn_cmdline_args
 
+    def __init__(self, settings: Settings, design: Design, run_path: Path):
+        super().__init__(settings, design, run_path)
+        self.diamondc = Tool("diamondc")
+
     def run(self) -> None:
         assert isinstance(self.settings, self.Settings)
         constraint_exts = (
@@ -31,8 +37,7 @@ class DiamondSynth(FpgaSynthFlow):
         for constraint in constraints:
             self.copy_from_template(constraint)
         script_path = self.copy_from_template("synth.tcl")
-        diamondc = Tool("diamondc")
-        diamondc.run("diamondc", script_path)
+        self.diamondc.run("diamondc", script_path)
 
     def parse_reports(self) -> bool:
         assert isinstance(self.settings, self.Settings)
@@ -7,10 +7,10 @@ import multiprocessing
 import os
 import re
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar, Union
 
-from typeguard import typechecked
 import jinja2
 import psutil
 from box import Box
@@ -25,9 +25,10 @@ from ..dataclass import (
     validator,
 )
 from ..design import Design
-from ..tool import Tool
+from ..tool import NonZeroExitCode, OutputCapture, Tool, in_context
 from ..fpga import FPGA
-from ..utils import camelcase_to_snakecase, try_convert, unique
+from ..report_scanner import PatternCache, ReportScanner
+from ..utils import camelcase_to_snakecase, try_convert, typechecked, unique
 from .cocotb import Cocotb, CocotbSettings
 
 log = logging.getLogger(__name__)
@@ -76,6 +77,8 @@ class Flow(metaclass=ABCMeta):
     All tool executables should be available on the installed system or on the same docker image."""
 
     name: str  # set automatically
+    # compiled patterns of parse_report_regex, per flow class
+    _report_patterns: PatternCache = PatternCache()
 
     class Settings(XedaBaseModel):
         """Settings that can affect flow's behavior"""
@@ -97,11 +100,20 @@ class Flow(metaclass=ABCMeta):
                 return False
             return value
 
-        timeout_seconds: int = Field(3600 * 2, hidden_from_schema=True)
+        timeout_seconds: int = Field(
+            3600 * 2,
+            description="Maximum total execution time of the flow's tools, after which they are terminated",
+            hidden_from_schema=True,
+        )
         nthreads: int = Field(
             default_factory=multiprocessing.cpu_count,
             description="max number of threads",
         )
+        memory_gb: Optional[float] = Field(
+            None,
+            description="Expected peak memory use of the flow's tools (GB). Concurrently running flows are kept within the runner's memory budget",
+            hidden_from_schema=True,
+        )
         ncpus: int = Field(
             psutil.cpu_count(logical=False),
             description="Number of physical CPUs to use.",
@@ -151,6 +163,7 @@ class Flow(metaclass=ABCMeta):
         mod_name = cls.__module__
         log.info("registering flow %s from %s", cls_name, mod_name)
         cls.name = camelcase_to_snakecase(cls_name)
+        cls._report_patterns = PatternCache()
         if not inspect.isabstract(cls):
             registered_flows[cls.name] = (mod_name, cls)
 
@@ -282,40 +295,37 @@ class Flow(metaclass=ABCMeta):
                 self.run_path,
             )
             return False
-        with open(reportfile_path) as rpt_file:
-            content = rpt_file.read()
-
-            flags = re.MULTILINE | re.IGNORECASE
-            if dotall:
-                flags |= re.DOTALL
-
-            def match_pattern(pat: str, content: str) -> Tuple[bool, str]:
-                match = re.search(pat, content, flags)
-                if match is None:
-                    return False, content
-                match_dict = match.groupdict()
+        flags = re.MULTILINE | re.IGNORECASE
+        if dotall:
+            flags |= re.DOTALL
+
+        with ReportScanner(reportfile_path) as scanner:
+
+            def match_pattern(pat: str) -> bool:
+                match_dict = scanner.search(
+                    self._report_patterns.get(pat, flags), sequential
+                )
+                if match_dict is None:
+                    return False
                 for k, v in match_dict.items():
                     self.results[k] = try_convert(v)
                     log.debug("%s: %s", k, self.results.get(k))
-                if sequential:
-                    content = content[match.span(0)[1] :]
-                    log.debug("len(content)=%d", len(content))
-                return True, content
+                return True
 
             for pat in [re_pattern, *other_re_patterns]:
                 matched = False
                 if isinstance(pat, list):
                     log.debug("Matching any of: %s", pat)
                     for subpat in pat:
-                        matched, content = match_pattern(subpat, content)
+                        matched = match_pattern(subpat)
                 else:
                     log.debug("Matching: %s", pat)
-                    matched, content = match_pattern(pat, content)
+                    matched = match_pattern(pat)
 
                 if not matched and required:
                     log.critical(
                         "Error parsing report file: %s\n Pattern not matched: %s\n",
-                        rpt_file.name,
+                        reportfile_path,
                         pat,
                     )
                     return False
@@ -358,6 +368,49 @@ class SimFlow(Flow, metaclass=ABCMeta):
             else None
         )
 
+    def run_sim(self, tool: Tool, *args: Any, shardable: bool = True) -> None:
+        """
+        Run the simulation tool with args, in the environment required by cocotb (if used).
+        If cocotb.shards > 1 and shardable, the cocotb testcases are split among parallel runs of the tool
+        (at most `nthreads` at a time), each logging to its own file. Their results are merged into cocotb.results_xml.
+        """
+        cocotb = self.cocotb
+        envs = cocotb.shard_envs(self.design) if cocotb and shardable else []
+        if not envs:
+            tool.run(*args, env=cocotb.env(self.design) if cocotb else None)
+            return
+        assert cocotb
+        captures = [
+            OutputCapture(log_file=f"cocotb_shard{i}.log", echo=False)
+            for i in range(len(envs))
+        ]
+
+        def run_shard(i: int) -> Optional[NonZeroExitCode]:
+            try:
+                tool.run(*args, env=envs[i], capture=captures[i])
+            except NonZeroExitCode as e:
+                log.error("Shard %d failed (exit code %d)", i, e.exit_code)
+                return e
+            return None
+
+        max_parallel = max(1, min(len(envs), self.settings.nthreads))
+        with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+            futures = [
+                executor.submit(in_context(run_shard), i) for i in range(len(envs))
+            ]
+            try:
+                errors = [f.result() for f in futures]
+            except BaseException:
+                for f in futures:
+                    f.cancel()
+                for capture in captures:
+                    capture.terminate()
+                raise
+        cocotb.merge_results([env["COCOTB_RESULTS_FILE"] for env in envs])
+        for e in errors:
+            if e is not None:
+                raise e
+
 
 class TargetTechnology(XedaBaseModel):
     liberty: Optional[str] = None
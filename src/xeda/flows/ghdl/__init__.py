@@ -1,15 +1,36 @@
+import hashlib
+import json
 import logging
 import os
 import platform
+import shutil
 from abc import ABCMeta
+from contextlib import AbstractContextManager, nullcontext
 from functools import cached_property
 from pathlib import Path
-from typing import Any, Dict, List, Literal, Optional, Union
+from types import TracebackType
+from typing import (
+    IO,
+    Any,
+    ContextManager,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Type,
+    Union,
+)
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None  # type: ignore
 
 from ...dataclass import Field, validator
 from ...design import Design, DesignSource, Tuple012, VhdlSettings
-from ...gtkwave import gen_gtkw
-from ...tool import Docker, Tool
+from ...gtkwave import gen_gtkw, iter_wave_opt_signals
+from ...tool import Docker, Tool, ToolException
 from ...utils import SDF, common_root, setting_flag
 from ..flow import Flow, FlowSettingsError, SimFlow, SynthFlow
 
@@ -17,15 +38,7 @@ log = logging.getLogger(__name__)
 
 
 def _get_wave_opt_signals(wave_opt_file, extra_top=None):
-    signals = []
-    with open(wave_opt_file, "r") as f:
-        for line in f.read().splitlines():
-            line = line.strip()
-            if line.startswith("/"):
-                sig = line[1:].split("/")
-                if extra_top:
-                    sig.insert(0, extra_top)
-                signals.append(sig)
+    signals = list(iter_wave_opt_signals(wave_opt_file, extra_top))
     root_group = common_root(signals)
     return signals, root_group
 
@@ -44,8 +57,6 @@ class GhdlTool(Tool):
         lines = [line.strip() for line in out.splitlines()]
         if len(lines) < 3:
             return {}
-        self._version = tuple(lines[0].split("."))
-
         return {
             "version": ".".join(self.version),
             "compiler": lines[1],
@@ -53,10 +64,94 @@ class GhdlTool(Tool):
         }
 
 
+class GhdlWorkLibrary(AbstractContextManager):
+    """
+    Persistent GHDL work directory, reused by successive runs with the same `key`.
+    Keeps the content hash of each imported source in a manifest, so that only new or modified
+    files need to be re-imported. `ghdl make` then re-analyzes the outdated units and their dependents.
+    Used as a (reentrant) context manager, holds an exclusive lock on the library.
+    """
+
+    MANIFEST = "xeda_manifest.json"
+
+    def __init__(self, root: Union[str, os.PathLike], key: Dict[str, Any]) -> None:
+        self.key = key
+        digest = hashlib.sha256(
+            json.dumps(key, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        self.path = Path(root) / digest[:16]
+        self._lock_file: Optional[IO[str]] = None
+        self._depth = 0
+
+    @property
+    def manifest_file(self) -> Path:
+        return self.path / self.MANIFEST
+
+    def _manifest(self) -> Dict[str, str]:
+        try:
+            with open(self.manifest_file) as f:
+                manifest = json.load(f)
+            if manifest.get("key") == json.loads(json.dumps(self.key, default=str)):
+                return manifest["files"]
+        except (OSError, ValueError, KeyError):
+            pass
+        return {}
+
+    def outdated(self, sources: Sequence[DesignSource]) -> Optional[List[DesignSource]]:
+        """
+        sources which are new or have been modified since the last update.
+        None if the library needs to be built from scratch, e.g., when files have been removed.
+        """
+        imported = self._manifest()
+        if not imported:
+            return None
+        current = {str(src.file): src for src in sources}
+        if any(f not in current for f in imported):
+            return None
+        return [src for f, src in current.items() if imported.get(f) != src.hash]
+
+    def update(self, sources: Sequence[DesignSource]) -> None:
+        manifest = dict(
+            key=self.key, files={str(src.file): src.hash for src in sources}
+        )
+        with open(self.manifest_file, "w") as f:
+            json.dump(manifest, f, indent=1, default=str)
+
+    def clear(self) -> None:
+        for p in self.path.iterdir():
+            if p.name != ".lock":
+                if p.is_dir():
+                    shutil.rmtree(p)
+                else:
+                    p.unlink()
+
+    def __enter__(self) -> "GhdlWorkLibrary":
+        self._depth += 1
+        if self._depth > 1:
+            return self
+        self.path.mkdir(parents=True, exist_ok=True)
+        if fcntl is not None:
+            self._lock_file = open(self.path / ".lock", "w")
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception_value: Optional[BaseException],
+        exception_traceback: Optional[TracebackType],
+    ) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._lock_file is not None:
+            self._lock_file.close()  # also releases the lock
+            self._lock_file = None
+
+
 class Ghdl(Flow, metaclass=ABCMeta):
     """VHDL simulation using GHDL"""
 
     ghdl = GhdlTool()  # pyright: reportGeneralTypeIssues=none
+    work_library: Optional[GhdlWorkLibrary] = None
 
     class Settings(Flow.Settings):
         analysis_flags: List[str] = []
@@ -92,6 +187,17 @@ class Ghdl(Flow, metaclass=ABCMeta):
         work: Optional[str] = Field(
             None, description="Set the name of the WORK library"
         )
+        workdir: Optional[str] = Field(
+            None, description="Directory where the library files are stored"
+        )
+        incremental: bool = Field(
+            False,
+            description="Keep a persistent work library and only re-analyze modified sources and their dependents.",
+        )
+        incremental_dir: Optional[str] = Field(
+            None,
+            description="Parent directory of persistent work libraries. Default: '.ghdl_work' in the parent of the run directory.",
+        )
         expect_failure: bool = False
 
         def common_flags(self, vhdl: VhdlSettings) -> List[str]:
@@ -102,6 +208,8 @@ class Ghdl(Flow, metaclass=ABCMeta):
                 cf.append("-fsynopsys")
             if self.work:
                 cf.append(f"--work={self.work}")
+            if self.workdir:
+                cf.append(f"--workdir={self.workdir}")
             cf += [f"-P{p}" for p in self.lib_paths]
             return cf
 
@@ -159,27 +267,80 @@ class Ghdl(Flow, metaclass=ABCMeta):
                 return find_top_flags
             raise ValueError("unknown stage!")
 
+    def init(self) -> None:
+        super().init()
+        assert isinstance(self.settings, self.Settings)
+        ss = self.settings
+        if ss.incremental:
+            vhdl = self.design.language.vhdl
+            try:
+                ghdl_version = ".".join(self.ghdl.version)
+            except ToolException:
+                ghdl_version = "unknown"
+            key = dict(
+                design=self.design.name,
+                ghdl=ghdl_version,
+                flags=ss.common_flags(vhdl) + ss.analysis_flags,
+                relaxed=ss.relaxed,
+                synopsys=vhdl.synopsys,
+            )
+            root = ss.incremental_dir or self.run_path.parent / ".ghdl_work"
+            self.work_library = GhdlWorkLibrary(Path(root).absolute(), key)
+            ss.workdir = str(self.work_library.path)
+
+    def locked_work_library(self) -> ContextManager[Any]:
+        """hold the lock of the work library (if any) while using its contents, e.g. during a `ghdl run`"""
+        return self.work_library if self.work_library is not None else nullcontext()
+
     def elaborate(
         self, sources: List[DesignSource], top: Union[str, Tuple012], vhdl: VhdlSettings
     ) -> Tuple012:
         """returns top(s) as a list"""
+        if self.work_library is None:
+            return self._elaborate(sources, top, vhdl)
+        with self.work_library as library:
+            return self._elaborate(sources, top, vhdl, library)
+
+    def _elaborate(
+        self,
+        sources: List[DesignSource],
+        top: Union[str, Tuple012],
+        vhdl: VhdlSettings,
+        library: Optional[GhdlWorkLibrary] = None,
+    ) -> Tuple012:
         assert isinstance(self.settings, self.Settings)
         ss = self.settings
         if isinstance(top, str):
             top = (top,)
         steps = ["import", "make"]
-        if ss.clean:
+        import_sources = sources
+        if library is not None:
+            outdated = None if ss.clean else library.outdated(sources)
+            if outdated is None:
+                log.info("Building GHDL work library in %s", library.path)
+                library.clear()
+            else:
+                log.info(
+                    "Using GHDL work library in %s: %d of %d source(s) modified",
+                    library.path,
+                    len(outdated),
+                    len(sources),
+                )
+                import_sources = outdated
+                if not outdated:
+                    steps.remove("import")
+        elif ss.clean:
             steps.insert(0, "remove")
         if not top:
             # run find-top after import
             log.warning("added find-top to steps")
-            steps.insert(steps.index("import") + 1, "find-top")
+            steps.insert(steps.index("make"), "find-top")
         for step in steps:
             args = ss.get_flags(vhdl, step)
             if isinstance(ss, SimFlow.Settings):
                 args += ss.optimization_flags
             if step in ["import", "analyze"]:
-                args += [str(s) for s in sources]
+                args += [str(s) for s in import_sources]
             elif step in ["make", "elaborate"]:
                 if self.ghdl.info.get("backend", "").lower().startswith("llvm"):
                     if platform.system() == "Darwin" and platform.machine() == "arm64":
@@ -202,6 +363,8 @@ class Ghdl(Flow, metaclass=ABCMeta):
                     log.warning("find-top: unable to determine the top-module")
             else:
                 self.ghdl.run(step, *args)
+                if step == "import" and library is not None:
+                    library.update(sources)
         return top
 
 
@@ -237,9 +400,12 @@ class GhdlSynth(Ghdl, SynthFlow):
         design = self.design
         assert isinstance(self.settings, self.Settings)
         ss = self.settings
-        top = self.elaborate(design.rtl.sources, design.rtl.top, design.language.vhdl)
-        args = self.synth_args(ss, design, one_shot_elab=False, top=top)
-        self.ghdl.run_stdout_to_file("synth", *args, stdout=ss.out_file)
+        with self.locked_work_library():
+            top = self.elaborate(
+                design.rtl.sources, design.rtl.top, design.language.vhdl
+            )
+            args = self.synth_args(ss, design, one_shot_elab=False, top=top)
+            self.ghdl.run_stdout_to_file("synth", *args, stdout=ss.out_file)
 
     @staticmethod
     def synth_args(
@@ -421,16 +587,19 @@ class GhdlSim(Ghdl, SimFlow):
 
         run_flags.extend(ss.generics_flags(design.tb.generics))
 
-        x = self.elaborate(design.sim_sources, design.tb.top, design.language.vhdl)
-        design.tb.top = x
-        assert self.cocotb
-        self.ghdl.run(
-            "run",
-            *cf,
-            *design.sim_tops,
-            *run_flags,
-            env=self.cocotb.env(design),
-        )
+        # the simulation reads the work library as well
+        with self.locked_work_library():
+            x = self.elaborate(design.sim_sources, design.tb.top, design.language.vhdl)
+            design.tb.top = x
+            self.run_sim(
+                self.ghdl,
+                "run",
+                *cf,
+                *design.sim_tops,
+                *run_flags,
+                # parallel runs would overwrite each other's waveforms
+                shardable=not (ss.wave or ss.vcd or ss.fst or ss.write_wave_opt),
+            )
 
     def parse_reports(self) -> bool:
         success = True
@@ -442,11 +611,12 @@ class GhdlSim(Ghdl, SimFlow):
             log.debug("Generating GtkWave save-file form dump_file=%s", dump_file)
             opt_file = ss.read_wave_opt or ss.write_wave_opt
             extra_top = "top" if ss.wave else None
-            signals, root_group = _get_wave_opt_signals(opt_file, extra_top)
-            if dump_file == ss.fst:  # fst removes the common hierarchy
-                signals = [s[len(root_group) :] for s in signals]
-                root_group = []
-            gen_gtkw(dump_file, signals, root_group)
+            gen_gtkw(
+                dump_file,
+                iter_wave_opt_signals(opt_file, extra_top),
+                # fst removes the common hierarchy
+                strip_root=dump_file == ss.fst,
+            )
 
         # TODO move
         if self.cocotb and self.design.tb and self.design.tb.cocotb:
@@ -1,7 +1,9 @@
 """Xilinx ISE Synthesis flow"""
 import logging
+from pathlib import Path
 from typing import Mapping, Union
 
+from ...design import Design
 from ...tool import Tool
 from ...utils import try_convert
 from ..flow import FpgaSynthFlow
@@ -36,6 +38,10 @@ class IseSynth(FpgaSynthFlow):
             "Report Type": "Verbose Report",
         }
 
+    def __init__(self, settings: Settings, design: Design, run_path: Path):
+        super().__init__(settings, design, run_path)
+        self.xtclsh = Tool("xtclsh")
+
     def run(self) -> None:
         xcf_file = self.copy_from_template("constraints.xcf")
         ucf_file = self.copy_from_template("constraints.ucf")
@@ -49,8 +55,7 @@ class IseSynth(FpgaSynthFlow):
             xcf_file=xcf_file,
             ucf_file=ucf_file,
         )
-        xtclsh = Tool("xtclsh")
-        xtclsh.run(script_path)
+        self.xtclsh.run(script_path)
 
     def parse_reports(self) -> bool:
         top = self.design.rtl.top
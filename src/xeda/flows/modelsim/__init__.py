@@ -1,6 +1,8 @@
 # © 2020 [Kamyar Mohajerani](mailto:kamyar@ieee.org)
 
+from pathlib import Path
 from typing import Optional
+from ...design import Design
 from ...utils import SDF
 from ..flow import SimFlow
 from ...tool import Tool
@@ -11,6 +13,10 @@ class Modelsim(SimFlow):
         sdf: SDF = SDF()
         modelsimini: Optional[str] = None
 
+    def __init__(self, settings: Settings, design: Design, run_path: Path):
+        super().__init__(settings, design, run_path)
+        self.vsim = Tool("vsim")
+
     def run(self) -> None:
         assert isinstance(self.settings, self.Settings)
         vcom_options = ["-lint"]
@@ -38,5 +44,4 @@ class Modelsim(SimFlow):
         modelsim_opts = ["-batch", "-do", f"do {script_path}"]
         if ss.modelsimini:
             modelsim_opts.extend(["-modelsimini", ss.modelsimini])
-        vsim = Tool("vsim")
-        vsim.run(*modelsim_opts)
+        self.vsim.run(*modelsim_opts)
@@ -1,12 +1,17 @@
+import json
 import logging
-from typing import Optional, List, Union
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, List, Union
 from urllib.request import urlretrieve
 from urllib.parse import urlparse
 from urllib.error import HTTPError
 
 from .yosys import Yosys
 from .flow import FlowFatalError, FpgaSynthFlow
-from ..tool import Tool
+from ..design import Design
+from ..tool import NonZeroExitCode, OutputCapture, Tool, in_context
 from ..utils import setting_flag
 from ..dataclass import Field, XedaBaseModel, validator
 from ..board import WithFpgaBoardSettings, get_board_file_path, get_board_data
@@ -91,6 +96,14 @@ class Nextpnr(FpgaSynthFlow):
         lpf_cfg: Optional[str] = None
         seed: Optional[int] = None
         randomize_seed: bool = False
+        seeds: List[int] = Field(
+            [],
+            description="Run place-and-route with each of these seeds concurrently, and keep the run with the best timing. An integer N is the same as [1, ..., N].",
+        )
+        max_parallel_seeds: Optional[int] = Field(
+            None,
+            description="Maximum number of concurrent nextpnr processes when running multiple seeds. Default: nthreads",
+        )
         timing_allow_fail: bool = False
         ignore_loops: bool = Field(
             False, description="ignore combinational loops in timing analysis"
@@ -117,6 +130,14 @@ class Nextpnr(FpgaSynthFlow):
         parallel_refine: bool = False
         yosys: Optional[Yosys.Settings] = None
 
+        @validator("seeds", pre=True, always=True)
+        def _validate_seeds(cls, value):
+            if isinstance(value, int):
+                value = list(range(1, value + 1))
+            elif isinstance(value, str):
+                value = [int(s) for s in value.split(",") if s.strip()]
+            return value
+
         @validator("yosys", always=True, pre=False)
         def _validate_yosys(cls, value, values):
             clocks = values.get("clocks")
@@ -133,6 +154,23 @@ class Nextpnr(FpgaSynthFlow):
                 value.clocks = clocks
             return value
 
+    def __init__(self, settings: Settings, design: Design, run_path: Path):
+        super().__init__(settings, design, run_path)
+        assert isinstance(self.settings, self.Settings)
+        fpga_family = (
+            self.settings.fpga.family if self.settings.fpga.family else "generic"
+        )
+        assert fpga_family in {
+            "generic",
+            "ecp5",
+            "ice40",
+            "nexus",
+            "gowin",
+            "fpga-interchange",
+            "xilinx",
+        }, "unsupported fpga family"
+        self.nextpnr = Tool(f"nextpnr-{fpga_family}")
+
     def init(self) -> None:
         assert isinstance(self.settings, self.Settings)
         ss = self.settings
@@ -142,25 +180,19 @@ class Nextpnr(FpgaSynthFlow):
             ss.yosys,
         )
 
-    def run(self) -> None:
-        assert isinstance(self.settings, self.Settings)
-        ss = self.settings
+    def netlist_json(self) -> Path:
+        """netlist generated by the Yosys dependency"""
         yosys_flow = self.completed_dependencies[0]
         assert isinstance(yosys_flow, Yosys)
         assert isinstance(yosys_flow.settings, Yosys.Settings)
         assert yosys_flow.settings.netlist_json
-        netlist_json = yosys_flow.run_path / yosys_flow.settings.netlist_json
-        fpga_family = ss.fpga.family if ss.fpga.family else "generic"
-        assert fpga_family in {
-            "generic",
-            "ecp5",
-            "ice40",
-            "nexus",
-            "gowin",
-            "fpga-interchange",
-            "xilinx",
-        }, "unsupported fpga family"
-        next_pnr = Tool(f"nextpnr-{fpga_family}")
+        return yosys_flow.run_path / yosys_flow.settings.netlist_json
+
+    def run(self) -> None:
+        assert isinstance(self.settings, self.Settings)
+        ss = self.settings
+        netlist_json = self.netlist_json()
+        next_pnr = self.nextpnr
 
         if not netlist_json.exists():
             raise FlowFatalError(f"netlist json file {netlist_json} does not exist!")
@@ -187,11 +219,25 @@ class Nextpnr(FpgaSynthFlow):
                     board_name = ss.board
                 lpf = get_board_file_path(f"{board_name}.lpf")
 
+        if ss.seeds:
+            self.run_seeds(next_pnr, netlist_json, lpf)
+        else:
+            next_pnr.run(*self.nextpnr_args(netlist_json, lpf))
+
+    def nextpnr_args(
+        self,
+        netlist_json: Path,
+        lpf: Optional[str],
+        seed: Optional[int] = None,
+        nthreads: Optional[int] = None,
+    ) -> List[str]:
+        assert isinstance(self.settings, self.Settings)
+        ss = self.settings
         args = setting_flag(netlist_json, name="json")
         args += setting_flag(ss.clock_period and (1000 / ss.clock_period), name="freq")
         args += setting_flag(lpf)
         args += setting_flag(self.design.rtl.top)
-        args += setting_flag(ss.seed)
+        args += setting_flag(ss.seed if seed is None else seed, name="seed")
         args += setting_flag(ss.fpga.speed)
         if ss.fpga.capacity:
             device_type = ss.fpga.type
@@ -204,7 +250,8 @@ class Nextpnr(FpgaSynthFlow):
         args += setting_flag(ss.debug)
         args += setting_flag(ss.verbose)
         args += setting_flag(ss.quiet)
-        args += setting_flag(ss.randomize_seed)
+        if seed is None:
+            args += setting_flag(ss.randomize_seed)
         args += setting_flag(ss.timing_allow_fail)
         args += setting_flag(ss.ignore_loops)
         args += setting_flag(ss.py_script, name="run")
@@ -222,7 +269,7 @@ class Nextpnr(FpgaSynthFlow):
         args += setting_flag(lpf)
         args += setting_flag(ss.textcfg)
         args += setting_flag(ss.write)
-        args += setting_flag(ss.nthreads, name="threads")
+        args += setting_flag(nthreads or ss.nthreads, name="threads")
         args += setting_flag(ss.sdf)
         args += setting_flag(ss.log)
         args += setting_flag(ss.report)
@@ -232,4 +279,136 @@ class Nextpnr(FpgaSynthFlow):
         args += setting_flag(ss.parallel_refine)
         if ss.extra_args:
             args += ss.extra_args
-        next_pnr.run(*args)
+        return args
+
+    @staticmethod
+    def seed_dir(seed: int) -> Path:
+        return Path(f"seed_{seed}")
+
+    def run_seeds(self, next_pnr: Tool, netlist_json: Path, lpf: Optional[str]) -> None:
+        """
+        Run nextpnr with each of the seeds, at most `max_parallel_seeds` at a time, each in its own
+        sub-directory. The outputs of the run with the best timing are moved to the run directory
+        and all sub-directories are removed.
+        """
+        assert isinstance(self.settings, self.Settings)
+        ss = self.settings
+        max_parallel = ss.max_parallel_seeds or max(1, ss.nthreads)
+        max_parallel = max(1, min(max_parallel, len(ss.seeds)))
+        nthreads = max(1, ss.nthreads // max_parallel)
+        # input files are relative to the run directory
+        if lpf:
+            lpf = str(Path(lpf).absolute())
+        if ss.py_script:
+            ss.py_script = str(Path(ss.py_script).absolute())
+        captures = {seed: OutputCapture(echo=False) for seed in ss.seeds}
+
+        def run_seed(seed: int) -> Optional[Dict[str, Any]]:
+            seed_dir = self.run_path / self.seed_dir(seed)
+            seed_dir.mkdir(exist_ok=True)
+            args = self.nextpnr_args(netlist_json, lpf, seed=seed, nthreads=nthreads)
+            try:
+                next_pnr.run(*args, capture=captures[seed], cwd=seed_dir)
+            except NonZeroExitCode as e:
+                log.warning(
+                    "nextpnr with seed=%d failed (exit code %d)", seed, e.exit_code
+                )
+                return None
+            if not ss.report:
+                return {}
+            return self.parse_report_json(seed_dir / ss.report)
+
+        log.info(
+            "Running nextpnr with seeds %s (%d at a time)",
+            ", ".join(map(str, ss.seeds)),
+            max_parallel,
+        )
+        with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+            futures = {
+                seed: executor.submit(in_context(run_seed), seed) for seed in ss.seeds
+            }
+            try:
+                seed_results = {seed: f.result() for seed, f in futures.items()}
+            except BaseException:
+                for f in futures.values():
+                    f.cancel()
+                for capture in captures.values():
+                    capture.terminate()
+                raise
+
+        self.results.seeds = {
+            str(seed): r if r is not None else dict(success=False)
+            for seed, r in seed_results.items()
+        }
+        succeeded = {seed: r for seed, r in seed_results.items() if r is not None}
+        for seed, r in seed_results.items():
+            if r is not None:
+                log.info("seed=%d: Fmax=%s wns=%s", seed, r.get("Fmax"), r.get("wns"))
+        if not succeeded:
+            raise NonZeroExitCode([next_pnr.executable], 1, "all seeds failed")
+
+        def score(seed: int):
+            r = succeeded[seed]
+            wns, fmax = r.get("wns"), r.get("Fmax")
+            return (
+                wns if wns is not None else float("-inf"),
+                fmax if fmax is not None else float("-inf"),
+                -seed,
+            )
+
+        best = max(succeeded, key=score)
+        log.info("Best seed: %d", best)
+        self.results.seed = best
+        best_dir = self.run_path / self.seed_dir(best)
+        for p in best_dir.iterdir():
+            dst = self.run_path / p.name
+            if dst.is_dir():
+                shutil.rmtree(dst)
+            shutil.move(str(p), str(dst))
+        for seed in ss.seeds:
+            shutil.rmtree(self.run_path / self.seed_dir(seed), ignore_errors=True)
+
+    def parse_report_json(self, report_file: Path) -> Optional[Dict[str, Any]]:
+        """Fmax, wns and utilization from nextpnr's JSON report"""
+        assert isinstance(self.settings, self.Settings)
+        try:
+            with open(report_file) as f:
+                report = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning("Failed to read %s: %s", report_file, e)
+            return None
+        results: Dict[str, Any] = {}
+        fmax = {
+            clk: v["achieved"]
+            for clk, v in report.get("fmax", {}).items()
+            if v.get("achieved")
+        }
+        if fmax:
+            results["fmax"] = fmax
+            results["Fmax"] = min(fmax.values())
+        # slack in ns: difference between the target and the achieved periods
+        slacks = [
+            1000 / v["constraint"] - 1000 / v["achieved"]
+            for v in report.get("fmax", {}).values()
+            if v.get("constraint") and v.get("achieved")
+        ]
+        if slacks:
+            results["wns"] = round(min(slacks), 3)
+        utilization = {
+            k: v["used"]
+            for k, v in report.get("utilization", {}).items()
+            if isinstance(v, dict) and "used" in v
+        }
+        if utilization:
+            results["utilization"] = utilization
+        return results
+
+    def parse_reports(self) -> bool:
+        """results from the JSON report, if any. nextpnr itself fails when timing is not met (see timing_allow_fail)"""
+        assert isinstance(self.settings, self.Settings)
+        ss = self.settings
+        if ss.report:
+            results = self.parse_report_json(self.run_path / ss.report)
+            if results:
+                self.results.update(results)
+        return True
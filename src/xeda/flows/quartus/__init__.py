@@ -1,10 +1,13 @@
 """Intel Quartus flows"""
 import csv
+import json
 import logging
+import re
+import threading
 from pathlib import Path
-from typing import Any, Callable, Dict, Literal, Optional, Set
+from typing import Any, Callable, Dict, Literal, Optional, Set, Tuple, Union
 
-from ...dataclass import Field
+from ...dataclass import Field, validator
 from ...tool import Docker, Tool
 from ...types import PathLike
 from ...utils import try_convert
@@ -367,45 +370,220 @@ class Quartus(FpgaSynthFlow):
         return not failed
 
 
-# class QuartusDse(QuartusSynth, DseFlow):
-#     def run(self):
-#         self.create_project()
-#         # 'explore': Exploration flow to use, if not specified in --config
-#         #   configuration file. Valid flows: timing_aggressive,
-#         #   all_optimization_modes, timing_high_effort, seed,
-#         #   area_aggressive, power_high_effort, power_aggressive
-#         # 'compile_flow':  'full_compile', 'fit_sta' and 'fit_sta_asm'.
-#         # 'timeout': Limit the amount of time a compute node is allowed to run. Format: hh:mm:ss
-#         if 'dse' not in self.settings.flow:
-#             self.fatal('`flows.quartus.dse` settings are missing!')
-
-#         dse = self.settings.flow['dse']
-#         if 'nproc' not in dse or not dse['nproc']:
-#             dse['nproc'] = self.nthreads
-
-#         script_path = self.copy_from_template(f'settings.dse',
-#                                               dse=dse
-#                                               )
-#         self.run_process('quartus_dse',
-#                          ['--use-dse-file', script_path, self.settings.design['name']],
-#                          stdout_logfile='dse_stdout.log',
-#                          initial_step="Running Quartus DSE",
-#                          )
-
-# DES:
-
-# Available exploration spaces for this family are:
-# "Seed Sweep"
-# "Extra Effort Space"
-# "Extra Effort Space for Quartus Prime Integrated Synthesis Projects"
-# "Area Optimization Space"
-# "Signature: Placement Effort Multiplier"
-# "Custom Space"
-
-# Valid optimization-goal options are:
-# "Optimize for Speed"
-# "Optimize for Area"
-# "Optimize for Power"
-# "Optimize for Negative Slack and Failing Paths"
-# "Optimize for Average Period"
-# "Optimize for Quality of Fit"
+# how often (seconds) the DSE report is read while quartus_dse is running
+REPORT_POLL_INTERVAL = 2.0
+
+_FAILED_STATUS = re.compile(r"fail|error|time.?out|cancel", re.IGNORECASE)
+
+
+def _fmax_mhz(value: Any) -> Optional[float]:
+    """Fmax in MHz from a number or a '<value> MHz|GHz' string"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    parts = str(value).split()
+    try:
+        fmax = float(parts[0])
+    except (IndexError, ValueError):
+        return None
+    if len(parts) > 1 and parts[1].lower() == "ghz":
+        fmax *= 1000.0
+    return fmax
+
+
+def _dse_point(record: Dict[str, Any]) -> Dict[str, Any]:
+    """status, seed, (worst) Fmax and (worst) setup slack of a DSE point, looked up by the names of its metrics"""
+    point: Dict[str, Any] = dict(status=None, seed=None, fmax=None, wns=None)
+    for key, value in record.items():
+        k = key.lower()
+        if k == "status":
+            point["status"] = value
+        elif "seed" in k:
+            point["seed"] = try_convert(value)
+        elif "fmax" in k:
+            fmax = _fmax_mhz(value)
+            if fmax is not None and (point["fmax"] is None or fmax < point["fmax"]):
+                point["fmax"] = fmax
+        elif "slack" in k and "hold" not in k:
+            wns = try_convert(value)
+            if isinstance(wns, (int, float)) and (
+                point["wns"] is None or wns < point["wns"]
+            ):
+                point["wns"] = wns
+    return point
+
+
+def parse_dse_report(path: PathLike) -> Dict[str, Dict[str, Any]]:
+    """
+    Parse a quartus_dse JSON report (report_format=json) into {point name: point}, see `_dse_point`.
+    Points are either a list of records (top-level or under `points`) or a mapping from point names to records.
+    """
+    with open(path) as f:
+        report = json.load(f)
+    if isinstance(report, dict) and isinstance(report.get("points"), list):
+        report = report["points"]
+    if isinstance(report, dict):
+        records = [
+            (str(name), rec) for name, rec in report.items() if isinstance(rec, dict)
+        ]
+    else:
+        records = []
+        for i, rec in enumerate(report):
+            name = next(
+                (rec[k] for k in ("point", "Point", "name", "Name") if k in rec),
+                i,
+            )
+            records.append((str(name), rec))
+    return {name: _dse_point(rec) for name, rec in records}
+
+
+class QuartusDse(Quartus):
+    """
+    Design space exploration (e.g. seed sweep) using Intel Quartus DSE (quartus_dse), compiling several points concurrently.
+    Progress of the exploration is read from its JSON report and the best point is selected by worst setup slack, then Fmax.
+    """
+
+    quartus_dse = Tool(
+        executable="quartus_dse",
+        docker=Docker(
+            command=["quartus_wrapper", "quartus_dse"],
+            image="chriz2600/quartus-lite",
+            tag="20.1.0",
+            platform="linux/amd64",
+        ),  # type: ignore
+    )
+
+    class Settings(Quartus.Settings):
+        explore: Literal[
+            "seed",
+            "timing_aggressive",
+            "timing_high_effort",
+            "all_optimization_modes",
+            "area_aggressive",
+            "power_high_effort",
+            "power_aggressive",
+        ] = Field("seed", description="Exploration flow")
+        compile_flow: Literal["full_compile", "fit_sta", "fit_sta_asm"] = Field(
+            "full_compile", description="Compilation flow of each point"
+        )
+        num_seeds: int = Field(8, description="Number of seeds to explore")
+        num_concurrent: Optional[int] = Field(
+            None,
+            description="Number of concurrent compiles. Default: num_seeds, limited by nthreads",
+        )
+        num_parallel_processors: Optional[int] = Field(
+            None,
+            description="Number of processors used by each compile. Default: nthreads / num_concurrent",
+        )
+        stop_after_timing_met: bool = Field(
+            False, description="Stop the exploration as soon as a point meets timing"
+        )
+        timeout: Optional[str] = Field(
+            None,
+            description="Time limit of each compile (hh:mm:ss)",
+        )
+
+        @validator("num_seeds", "num_concurrent", "num_parallel_processors")
+        def _validate_positive(cls, value):  # pylint: disable=no-self-argument
+            if value is not None and value < 1:
+                raise ValueError("should be at least 1")
+            return value
+
+        @validator("timeout")
+        def _validate_timeout(cls, value):  # pylint: disable=no-self-argument
+            if value is not None and not re.fullmatch(r"\d+:[0-5]\d:[0-5]\d", value):
+                raise ValueError(f"expected hh:mm:ss, got {value}")
+            return value
+
+    def init(self) -> None:
+        super().init()
+        ss = self.settings
+        assert isinstance(ss, self.Settings)
+        if ss.num_concurrent is None:
+            ss.num_concurrent = max(1, min(ss.num_seeds, ss.nthreads))
+        if ss.num_parallel_processors is None:
+            ss.num_parallel_processors = max(1, ss.nthreads // ss.num_concurrent)
+        if self.quartus_dse.docker and self.quartus_sh.docker:
+            self.quartus_dse.docker.enabled = ss.dockerized
+            self.quartus_dse.docker.mounts.update(self.quartus_sh.docker.mounts)
+        self.dse_report = self.reports_dir / "quartus_dse_report.json"
+        self._report_mtime: Optional[float] = None
+
+    def run(self) -> None:
+        self.create_project()
+        dse_file = self.copy_from_template("settings.dse", report_file=self.dse_report)
+        stop = threading.Event()
+        watcher = threading.Thread(
+            target=self._watch_report,
+            args=(stop,),
+            name="xeda:quartus_dse:report",
+            daemon=True,
+        )
+        watcher.start()
+        try:
+            self.quartus_dse.run("--use-dse-file", dse_file, self.design.name)
+        finally:
+            stop.set()
+            watcher.join()
+        self._update_points()
+
+    def _watch_report(self, stop: threading.Event) -> None:
+        while not stop.wait(REPORT_POLL_INTERVAL):
+            self._update_points()
+
+    def _update_points(self) -> None:
+        """read the DSE report, if modified, and update (and log) the points in results"""
+        try:
+            mtime = self.dse_report.stat().st_mtime
+            if mtime == self._report_mtime:
+                return
+            points = parse_dse_report(self.dse_report)
+        except (OSError, ValueError) as e:  # not there yet, or partially written
+            log.debug("DSE report is not readable: %s", e)
+            return
+        self._report_mtime = mtime
+        previous = self.results.get("dse_points") or {}
+        for name, point in points.items():
+            if previous.get(name) != point:
+                log.info(
+                    "DSE point %s: status=%s seed=%s Fmax=%s wns=%s",
+                    name,
+                    point["status"],
+                    point["seed"],
+                    point["fmax"],
+                    point["wns"],
+                )
+        self.results.dse_points = points
+
+    @staticmethod
+    def _score(point: Dict[str, Any]) -> Tuple[float, float]:
+        ninf = float("-inf")
+        wns, fmax = point["wns"], point["fmax"]
+        return (ninf if wns is None else wns, ninf if fmax is None else fmax)
+
+    def best_point(self) -> Union[None, Tuple[str, Dict[str, Any]]]:
+        """(name, point) of the best completed point"""
+        points = self.results.get("dse_points") or {}
+        completed = [
+            (name, point)
+            for name, point in points.items()
+            if not _FAILED_STATUS.search(str(point["status"] or ""))
+            and (point["wns"] is not None or point["fmax"] is not None)
+        ]
+        if not completed:
+            return None
+        return max(completed, key=lambda item: self._score(item[1]))
+
+    def parse_reports(self) -> bool:
+        best = self.best_point()
+        if best is None:
+            log.error("No DSE point completed successfully")
+            return False
+        name, point = best
+        log.info("Best DSE point: %s", name)
+        self.results.best_point = name
+        for k in ("seed", "wns"):
+            if point[k] is not None:
+                self.results[k] = point[k]
+        if point["fmax"] is not None:
+            self.results["Fmax"] = point["fmax"]
+        return point["wns"] is None or point["wns"] >= 0
@@ -1,19 +1,68 @@
 import logging
+import os
 from abc import ABCMeta
 from functools import reduce
 from html import unescape
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from xml.etree import ElementTree
 
 
 from ...dataclass import Field
 from ...design import Design
-from ...tool import Docker, Tool
+from ...tool import Docker, NonZeroExitCode, Tool
 from ..flow import Flow
+from .session import VIVADO_SESSION_ENV, VivadoSession, VivadoSessionError
 
 log = logging.getLogger(__name__)
 
+# (titles of the enclosing sections, table title, header, rows of cells)
+XmlTable = Tuple[Tuple[str, ...], str, List[str], List[List[str]]]
+
+
+def iter_xml_tables(
+    report_xml, select: Optional[Callable[[Tuple[str, ...], str], bool]] = None
+) -> Iterator[XmlTable]:
+    """Incrementally parse the tables of a Vivado XML report (e.g., `report_utilization -format xml`).
+    Only tables for which select(section_titles, table_title) is true are collected.
+    Elements are discarded as soon as they are consumed, so memory use does not grow with the report size.
+    """
+    sections: List[str] = []
+    table: Optional[XmlTable] = None
+    row: List[str] = []
+    root = None
+    for event, elem in ElementTree.iterparse(report_xml, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            if root is None:
+                root = elem
+            elif tag == "section":
+                sections.append(elem.get("title", "<section>"))
+            elif tag == "table":
+                title = elem.get("title", "")
+                if select is None or select(tuple(sections), title):
+                    table = (tuple(sections), title, [], [])
+            continue
+        # end event
+        if table is not None:
+            if tag == "tableheader":
+                table[2].append(unescape(elem.attrib["contents"]).strip())
+            elif tag == "tablecell":
+                row.append(unescape(elem.attrib["contents"]).strip())
+            elif tag == "tablerow":
+                if row:
+                    table[3].append(row)
+                    row = []
+            elif tag == "table":
+                yield table
+                table = None
+        if tag == "section":
+            sections.pop()
+            if not sections and root is not None:
+                root.clear()  # drop all consumed top-level sections
+        elif tag in ("tablerow", "table"):
+            elem.clear()
+
 
 def vivado_generics(kvdict, sim=False):
     def supported_vivado_generic(v, sim):
@@ -53,6 +102,10 @@ class Vivado(Flow, metaclass=ABCMeta):
             False,
             description="Drop to interactive TCL shell after Vivado finishes running a flow script",
         )
+        persistent_session: bool = Field(
+            False,
+            description="Run the TCL scripts in a long-lived Vivado process, shared by the Vivado flows which xeda runs one after another (e.g., vivado_synth, vivado_postsynth_sim and vivado_power), instead of starting Vivado for each of them. Also enabled by the XEDA_VIVADO_SESSION environment variable.",
+        )
 
     def __init__(self, settings: Settings, design: Design, run_path: Path):
         super().__init__(settings, design, run_path)
@@ -66,6 +119,7 @@ class Vivado(Flow, metaclass=ABCMeta):
         self.vivado = Tool(
             "vivado",
             default_args=default_args,
+            interactive=settings.tcl_shell,
             docker=Docker(
                 image="pwang7/vivado_ubuntu",
                 tag="standard-2021.2",
@@ -74,40 +128,73 @@ class Vivado(Flow, metaclass=ABCMeta):
         )
         self.add_template_filter("vivado_generics", vivado_generics)
 
+    @property
+    def use_session(self) -> bool:
+        ss = self.settings
+        assert isinstance(ss, self.Settings)
+        if ss.tcl_shell or ss.dockerized or self.vivado.remote:
+            return False
+        return ss.persistent_session or os.environ.get(
+            VIVADO_SESSION_ENV, ""
+        ).strip().lower() in ("1", "on", "yes", "true")
+
+    def run_vivado(self, script_path) -> None:
+        """Run the TCL script, in the persistent Vivado session if enabled, otherwise in a new Vivado process"""
+        if self.use_session:
+            args = list(self.vivado.default_args or [])
+            i = args.index("-mode") if "-mode" in args else len(args)
+            del args[i : i + 2]
+            notrace = "-notrace" in args
+            if notrace:
+                args.remove("-notrace")
+            session = VivadoSession.shared(self.vivado.executable, args)
+            try:
+                rc = session.run_script(
+                    script_path, log_file="vivado.log", notrace=notrace
+                )
+            except VivadoSessionError as e:
+                log.warning("%s. Running Vivado in batch mode.", e)
+                session.close()
+            else:
+                if rc != 0:
+                    # don't carry over any state to the next script
+                    session.close()
+                    raise NonZeroExitCode(["vivado", "-source", str(script_path)], rc)
+                return
+        self.vivado.run("-source", script_path)
+
     @staticmethod
-    def parse_xml_report(report_xml) -> Optional[Dict[str, Any]]:
+    def parse_xml_report(
+        report_xml, tables: Optional[Iterable[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Tables of the top-level sections of a Vivado XML report, keyed by "<section title>[:<table title>]".
+        If `tables` is specified, only the tables with these keys are parsed."""
+        selected = None if tables is None else set(tables)
+
+        def table_key(section_title: str, table_title: str) -> str:
+            return section_title + ":" + table_title if table_title else section_title
+
+        def select(sections: Tuple[str, ...], table_title: str) -> bool:
+            return len(sections) == 1 and (
+                selected is None or table_key(sections[0], table_title) in selected
+            )
+
+        data = {}
         try:
-            tree = ElementTree.parse(report_xml)
+            for sections, table_title, header, rows in iter_xml_tables(
+                report_xml, select
+            ):
+                table_data = {}
+                for cells in rows:
+                    # choose 0th element as "index data" (distinct key)
+                    cell_data = {h: c for h, c in zip(header[1:], cells[1:]) if c}
+                    if cell_data:
+                        table_data[cells[0]] = cell_data
+                if table_data:
+                    data[table_key(sections[0], table_title)] = table_data
         except ElementTree.ParseError as e:
             log.critical("Parsing %s failed: %s", report_xml, e.msg)
             return None
-        data = {}
-        for section in tree.findall("./section"):
-            section_title = section.get("title", "<section>")
-            for table in section.findall("./table"):
-                table_data = {}
-                header = [
-                    unescape(col.attrib["contents"]).strip()
-                    for col in table.findall("./tablerow/tableheader")
-                ]
-                for tablerow in table.findall("./tablerow"):
-                    cells = [
-                        unescape(cell.attrib["contents"]).strip()
-                        for cell in tablerow.findall("./tablecell")
-                    ]
-                    if cells:
-                        # choose 0th element as "index data" (distinct key)
-                        cell_data = {h: c for h, c in zip(header[1:], cells[1:]) if c}
-                        if cell_data:
-                            table_data[cells[0]] = cell_data
-                if table_data:
-                    table_title = table.get("title")
-                    title = (
-                        section_title + ":" + table_title
-                        if table_title
-                        else section_title
-                    )
-                    data[title] = table_data
         return data
 
     @staticmethod
@@ -0,0 +1,241 @@
+"""Long-lived Vivado TCL session, shared by the Vivado flows running in the same process"""
+import atexit
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+import uuid
+from pathlib import Path
+from typing import ClassVar, Dict, Optional, Sequence, Tuple, Union
+
+from ...tool import (
+    TERMINATE_GRACE_PERIOD,
+    ToolException,
+    ToolTimeout,
+    _kill_process_group,
+    _remaining_time,
+)
+
+__all__ = [
+    "VivadoSession",
+    "VivadoSessionError",
+    "VIVADO_SESSION_ENV",
+]
+
+log = logging.getLogger(__name__)
+
+# enables persistent sessions for all Vivado flows, same as their `persistent_session` setting
+VIVADO_SESSION_ENV = "XEDA_VIVADO_SESSION"
+
+_MARKER = "@@xeda:"
+
+# Sent once to a new session. `exit` in a script only ends that script and its code is reported back.
+_PREAMBLE = """namespace eval ::xeda {}
+rename ::exit ::xeda::exit
+proc ::exit {{code 0}} { return -code error -errorcode [list XEDA_EXIT $code] "exit $code" }
+proc ::xeda::run_script {token dir script notrace} {
+    puts "@@xeda:begin:$token"
+    set rc 0
+    set source_cmd [expr {$notrace ? [list source -notrace $script] : [list source $script]}]
+    if {[catch {cd $dir; uplevel #0 $source_cmd} err opts]} {
+        set ec [dict get $opts -errorcode]
+        if {[lindex $ec 0] eq "XEDA_EXIT"} {
+            set rc [lindex $ec 1]
+        } else {
+            puts "ERROR: $err"
+            set rc 1
+        }
+    }
+    catch {close_sim -force -quiet}
+    catch {close_project -quiet}
+    flush stdout
+    puts "@@xeda:end:$token:$rc"
+    flush stdout
+}
+"""
+
+
+def _tcl_word(s: str) -> str:
+    if any(c in s for c in "{}\\\n"):
+        raise ValueError(f"Unsupported character in TCL argument: {s}")
+    return "{" + s + "}"
+
+
+class VivadoSessionError(ToolException):
+    """The session process could not be started or exited unexpectedly"""
+
+
+class VivadoSession:
+    """
+    A `vivado -mode tcl` process which sources the TCL scripts sent to its stdin, one at a time, each in its own directory.
+    Saves Vivado's startup time for every script after the first one. The output of each script is logged separately
+    and an `exit` in a script only ends that script, with its code reported as the script's exit status.
+    Opened projects and simulations are closed after each script.
+    """
+
+    # shared sessions, keyed by process ID and command
+    _sessions: ClassVar[Dict[Tuple[int, Tuple[str, ...]], "VivadoSession"]] = {}
+
+    def __init__(
+        self, executable: str = "vivado", args: Sequence[str] = ("-nojournal",)
+    ) -> None:
+        self.command = [executable, *args, "-nolog", "-mode", "tcl"]
+        self._proc: Optional[subprocess.Popen] = None
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(
+        cls, executable: str = "vivado", args: Sequence[str] = ("-nojournal",)
+    ) -> "VivadoSession":
+        """session of the current process for this command, which is started if needed"""
+        key = (os.getpid(), (executable, *args))
+        session = cls._sessions.get(key)
+        if session is None:
+            session = cls._sessions[key] = cls(executable, args)
+        return session
+
+    @classmethod
+    def close_all(cls) -> None:
+        """close all sessions started by the current process"""
+        pid = os.getpid()
+        for key, session in list(cls._sessions.items()):
+            if key[0] == pid:
+                session.close()
+                del cls._sessions[key]
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._proc.pid if self._proc else None
+
+    def start(self) -> None:
+        if self.alive:
+            return
+        log.info("Starting Vivado session: %s", " ".join(self.command))
+        try:
+            self._proc = subprocess.Popen(  # pylint: disable=consider-using-with
+                self.command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                bufsize=1,
+                universal_newlines=True,
+                encoding="utf-8",
+                errors="replace",
+                start_new_session=True,
+            )
+        except OSError as e:
+            raise VivadoSessionError(f"Failed to start {self.command[0]}: {e}") from e
+        self._lines = queue.Queue()
+        threading.Thread(
+            target=self._pump,
+            args=(self._proc, self._lines),
+            name=f"xeda:{self._proc.pid}:session",
+            daemon=True,
+        ).start()
+        self._send(_PREAMBLE)
+
+    @staticmethod
+    def _pump(proc: subprocess.Popen, lines: "queue.Queue[Optional[str]]") -> None:
+        assert proc.stdout
+        with proc.stdout:
+            for line in proc.stdout:
+                lines.put(line)
+        lines.put(None)
+
+    def _send(self, tcl: str) -> None:
+        assert self._proc and self._proc.stdin
+        try:
+            self._proc.stdin.write(tcl)
+            self._proc.stdin.flush()
+        except OSError as e:
+            raise VivadoSessionError(f"Vivado session is not responding: {e}") from e
+
+    def run_script(
+        self,
+        script: Union[str, os.PathLike],
+        cwd: Union[None, str, os.PathLike] = None,
+        log_file: Union[None, str, os.PathLike] = None,
+        echo: bool = True,
+        notrace: bool = True,
+    ) -> int:
+        """
+        Source script, with `cwd` (default: current directory) as the working directory, and return its exit status.
+        Its output is (optionally) echoed and written to log_file.
+        Raises VivadoSessionError if the session is not usable, in which case the script might have partially run.
+        """
+        with self._lock:
+            self.start()
+            cwd = Path(cwd or Path.cwd()).absolute()
+            script = Path(script)
+            if not script.is_absolute():
+                script = cwd / script
+            token = uuid.uuid4().hex
+            self._send(
+                f"::xeda::run_script {token} {_tcl_word(str(cwd))} {_tcl_word(str(script))} {int(notrace)}\n"
+            )
+            with open(log_file, "w") if log_file else open(os.devnull, "w") as f:
+                try:
+                    return self._read_segment(token, f, echo)
+                except BaseException:
+                    self._kill()
+                    raise
+
+    def _read_segment(self, token: str, log_f, echo: bool) -> int:
+        begin, end = f"{_MARKER}begin:{token}", f"{_MARKER}end:{token}:"
+        started = False
+        while True:
+            timeout = _remaining_time(None)
+            try:
+                line = self._lines.get(timeout=timeout)
+            except queue.Empty:
+                assert timeout is not None
+                raise ToolTimeout(self.command, timeout) from None
+            if line is None:
+                raise VivadoSessionError(
+                    f"Vivado session exited unexpectedly (exit code: {self._proc.wait() if self._proc else None})"
+                )
+            if not started:
+                started = begin in line
+                if not started:
+                    log.debug("vivado: %s", line.rstrip())
+                continue
+            i = line.find(end)
+            if i >= 0:
+                if i > 0:  # unterminated last line of the script's output
+                    log_f.write(line[:i] + "\n")
+                return int(line[i + len(end) :].strip())
+            log_f.write(line)
+            if echo:
+                sys.stdout.write(line)
+                sys.stdout.flush()
+
+    def _kill(self) -> None:
+        if self.alive:
+            assert self._proc
+            _kill_process_group(self._proc)
+
+    def close(self) -> None:
+        """end the Vivado process"""
+        proc = self._proc
+        if proc is None:
+            return
+        if proc.poll() is None:
+            log.info("Closing Vivado session [%d]", proc.pid)
+            try:
+                self._send("::xeda::exit 0\n")
+                assert proc.stdin
+                proc.stdin.close()
+                proc.wait(timeout=TERMINATE_GRACE_PERIOD)
+            except (ToolException, OSError, subprocess.TimeoutExpired):
+                self._kill()
+        self._proc = None
+
+
+atexit.register(VivadoSession.close_all)
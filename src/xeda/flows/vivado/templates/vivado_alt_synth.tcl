@@ -7,7 +7,7 @@ set nthreads              {{settings.nthreads}}
 set fail_critical_warning {{settings.fail_critical_warning}}
 
 set reports_dir           {{settings.reports_dir}}
-set settings.outputs_dir  {{settings.settings.outputs_dir}}
+set settings.outputs_dir  {{settings.outputs_dir}}
 set checkpoints_dir       {{settings.checkpoints_dir}}
 set fpga_part             {{settings.fpga.part}}
 
@@ -83,8 +83,18 @@ if { [catch {eval read_vhdl ${vhdl_std_opt} {{src.file}} } myError]} {
 read_xdc {{xdc_file}}
 {% endfor %}
 
+{% if incremental_synth_checkpoint is defined and incremental_synth_checkpoint -%}
+puts "using {{incremental_synth_checkpoint}} as the reference checkpoint for incremental synthesis"
+read_checkpoint -incremental {{incremental_synth_checkpoint}}
+{% endif -%}
+
 puts "\n===========================( RTL Synthesize and Map )==========================="
 eval synth_design -part $fpga_part -top {{design.rtl.top}} {{settings.synth.steps.synth|flatten_dict}} {{design.rtl.generics|vivado_generics}}
+{%- if incremental_synth_checkpoint is defined and incremental_synth_checkpoint %} -incremental_mode default {%- endif %}
+
+{% if settings.incremental_synth -%}
+write_checkpoint -force ${checkpoints_dir}/synth_design
+{% endif -%}
 
 {% if settings.synth.strategy == "Debug" -%}
 set_property KEEP_HIERARCHY true [get_cells -hier * ]
@@ -163,6 +173,8 @@ phys_opt_design {{settings.impl.steps.phys_opt|flatten_dict}}
 showWarningsAndErrors
 {% endif %}
 
+puts "Final timing slack: [get_property SLACK [get_timing_paths]] ns"
+
 {% if settings.write_checkpoint -%}
 puts "\n=============================( Writing Checkpoint )=============================="
 write_checkpoint -force ${checkpoints_dir}/post_route
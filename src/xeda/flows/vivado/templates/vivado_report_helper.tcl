@@ -16,6 +16,9 @@ report_utilization -force -file [file join ${reports_dir} hierarchical_utilizati
 if {$ACTIVE_STEP == "route_design"} {
     set timing_slack [get_property SLACK [get_timing_paths]]
     puts "Final timing slack: $timing_slack ns"
+    {% if incremental_checkpoint is defined and incremental_checkpoint -%}
+    report_incremental_reuse -file [file join ${reports_dir} incremental_reuse.rpt]
+    {%- endif %}
 
     {% if settings.qor_suggestions -%}
     report_qor_suggestions -file [file join ${reports_dir} qor_suggestions.rpt] 
@@ -47,6 +47,11 @@ puts "setting synthesis strategy to {{settings.synth.strategy}}"
 set_property strategy {{settings.synth.strategy}} [get_runs synth_1]
 {% endif %}
 
+{% if incremental_synth_checkpoint is defined and incremental_synth_checkpoint -%}
+puts "using {{incremental_synth_checkpoint}} as the reference checkpoint for incremental synthesis"
+set_property incremental_checkpoint {{incremental_synth_checkpoint}} [get_runs synth_1]
+{% endif -%}
+
 
 set avail_impl_strategies [join [list_property_value strategy [get_runs impl_1] ] " "]
 puts "available implementation strategies: $avail_impl_strategies"
@@ -56,6 +61,11 @@ puts "setting implementation strategy to {{settings.impl.strategy}}"
 set_property strategy {{settings.impl.strategy}} [get_runs impl_1]
 {% endif -%}
 
+{% if incremental_checkpoint is defined and incremental_checkpoint -%}
+puts "using {{incremental_checkpoint}} as the reference checkpoint for incremental implementation"
+set_property incremental_checkpoint {{incremental_checkpoint}} [get_runs impl_1]
+{% endif -%}
+
 {% for k,v in design.rtl.parameters.items() -%}
 {% set x = ("1'b%d" % v) if v is boolean else v if v is not string else v if v is match("\\d+'b[01]+") else "\\\"" + v + "\\\"" -%}
 set_property generic {% raw -%} { {%- endraw -%} {{ k }}={{ x }} {%- raw -%} } {%- endraw %} [current_fileset]
@@ -1,10 +1,16 @@
 import logging
-from typing import Any, Dict
+import re
+import shutil
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 from ..flow import FpgaSynthFlow
-from ...dataclass import validator
+from ...dataclass import Field, validator
+from ...tool import NonZeroExitCode, OutputCapture, in_context
 from . import Vivado
-from .vivado_synth import RunOptions, VivadoSynth
+from .vivado_synth import RunOptions, SynthCheckpointStore, VivadoSynth
 
 log = logging.getLogger(__name__)
 
@@ -252,6 +258,67 @@ def _vivado_steps(strategy: str, s: str):
     return {step: xeda_strategies[strategy].get(step) for step in steps}
 
 
+# estimated WNS reported by place, phys_opt and route steps, e.g. "Estimated Timing Summary | WNS=-0.123 | TNS=..."
+_ESTIMATED_WNS = re.compile(r"\bWNS=(-?\d+(?:\.\d+)?)")
+_FINAL_WNS = re.compile(r"^Final timing slack: (-?\d+(?:\.\d+)?)")
+
+
+class StrategyRun:
+    """A strategy competing in a race, and the WNS reported by its Vivado run"""
+
+    def __init__(self, strategy: str, run_dir: Path) -> None:
+        self.strategy = strategy
+        self.run_dir = run_dir
+        self.capture = OutputCapture(run_dir / "vivado_stdout.log", echo=False)
+        self.capture.add_callback(self.on_line)
+        self.wns: Optional[float] = None  # latest estimate
+        self.final_wns: Optional[float] = None
+        self.status = "running"  # running, done, failed, or cancelled
+        self._lock = threading.Lock()
+
+    def on_line(self, line: str) -> None:
+        m = _FINAL_WNS.match(line)
+        if m:
+            with self._lock:
+                self.final_wns = self.wns = float(m[1])
+            return
+        m = _ESTIMATED_WNS.search(line)
+        if m:
+            with self._lock:
+                self.wns = float(m[1])
+
+    @property
+    def met_timing(self) -> bool:
+        return (
+            self.status == "done" and self.final_wns is not None and self.final_wns >= 0
+        )
+
+    def _end(self, status: str) -> bool:
+        """change the status of a running strategy, returns False if it had already ended"""
+        with self._lock:
+            if self.status != "running":
+                return False
+            if status == "done" and self.final_wns is None:
+                self.final_wns = self.wns
+            self.status = status
+            return True
+
+    def finish(self) -> bool:
+        return self._end("done")
+
+    def fail(self) -> bool:
+        return self._end("failed")
+
+    def cancel(self, reason: str) -> None:
+        if self._end("cancelled"):
+            log.info("Cancelling strategy %s: %s", self.strategy, reason)
+            # called by the thread judging the race, which shouldn't wait for vivado to exit
+            self.capture.terminate(wait=False)
+
+    def score(self) -> float:
+        return self.final_wns if self.final_wns is not None else float("-inf")
+
+
 class VivadoAltSynth(Vivado, FpgaSynthFlow):
     """Synthesize with Xilinx Vivado using an alternative TCL-based flow"""
 
@@ -263,6 +330,34 @@ class VivadoAltSynth(Vivado, FpgaSynthFlow):
             strategy="Default", steps=_vivado_steps("Default", "impl")
         )
 
+        race_strategies: List[str] = Field(
+            [],
+            description="Race these strategies (from `xeda_strategies`) in parallel, splitting `nthreads` among them. The race ends as soon as a strategy meets timing, and strategies are cancelled once they fall behind a finished one by more than `race_margin`. The run directory gets the outputs of the strategy with the best WNS.",
+        )
+        race_margin: float = Field(
+            0.5,
+            description="Cancel a racing strategy when its estimated WNS is worse than the final WNS of a finished strategy by more than this (ns)",
+        )
+
+        @validator("race_strategies", pre=True, always=True)
+        def _validate_race_strategies(cls, value):  # pylint: disable=no-self-argument
+            if isinstance(value, str):
+                value = [s.strip() for s in value.split(",") if s.strip()]
+            for strategy in value:
+                if strategy not in xeda_strategies:
+                    raise ValueError(
+                        f"Unknown strategy: {strategy}. Available strategies: {', '.join(xeda_strategies)}"
+                    )
+            return value
+
+        @validator("incremental", "incremental_checkpoint")
+        def _no_incremental_impl(cls, value, field):  # pylint: disable=no-self-argument
+            if value:
+                raise ValueError(
+                    f"{field.name} is not supported by this flow (only incremental_synth is)"
+                )
+            return value
+
         # pylint: disable=no-self-argument,no-self-use
         @validator("synth")
         def validate_synth(cls, v: RunOptions):
@@ -305,8 +400,139 @@ class VivadoAltSynth(Vivado, FpgaSynthFlow):
             lambda d: " ".join([f"{k} {v}" if v else k for k, v in d.items()]),
         )
 
+        if ss.race_strategies:
+            if ss.incremental_synth:
+                log.warning("incremental_synth is not supported with race_strategies")
+            self.race(ss.race_strategies, clock_xdc_path)
+            return
+
+        synth_store = SynthCheckpointStore(self) if ss.incremental_synth else None
+        synth_ref = synth_store.reference() if synth_store else None
+        if synth_ref:
+            log.info("Incremental synthesis from %s", synth_ref)
+
         script_path = self.copy_from_template(
             "vivado_alt_synth.tcl",
             xdc_files=[clock_xdc_path],
+            incremental_synth_checkpoint=synth_ref,
         )
-        self.vivado.run("-source", script_path)
+        self.run_vivado(script_path)
+        if synth_store:
+            synth_store.update(Path(ss.checkpoints_dir) / "synth_design.dcp")
+            synth_store.add_results(self.results, synth_ref, Path("vivado.log"))
+
+    def race(self, strategies: List[str], clock_xdc_path) -> None:
+        """
+        Run all strategies concurrently, each in its own sub-directory, watching the WNS they report.
+        The outputs of the winner are moved to the run directory and all sub-directories are removed.
+        """
+        ss = self.settings
+        assert isinstance(ss, self.Settings)
+        nthreads = max(1, ss.nthreads // len(strategies))
+        template = self.jinja_env.get_template("vivado_alt_synth.tcl")
+        runs: List[StrategyRun] = []
+        for strategy in strategies:
+            run_dir = self.run_path / f"strategy_{strategy}"
+            run_dir.mkdir(exist_ok=True)
+            settings = ss.copy(
+                update=dict(
+                    synth=RunOptions(
+                        strategy=strategy, steps=_vivado_steps(strategy, "synth")
+                    ),
+                    impl=RunOptions(
+                        strategy=strategy, steps=_vivado_steps(strategy, "impl")
+                    ),
+                    nthreads=nthreads,
+                ),
+                deep=True,
+            )
+            if ss.out_of_context and settings.synth.steps.get("synth") is not None:
+                settings.synth.steps["synth"]["-mode"] = "out_of_context"
+            (run_dir / "vivado_alt_synth.tcl").write_text(
+                template.render(
+                    settings=settings,
+                    design=self.design,
+                    artifacts=self.artifacts,
+                    xdc_files=[self.run_path / clock_xdc_path],
+                    incremental_synth_checkpoint=None,
+                )
+            )
+            runs.append(StrategyRun(strategy, run_dir))
+
+        def run_strategy(run: StrategyRun) -> None:
+            try:
+                self.vivado.run(
+                    "-source",
+                    "vivado_alt_synth.tcl",
+                    capture=run.capture,
+                    cwd=run.run_dir,
+                )
+            except NonZeroExitCode as e:
+                if run.fail():
+                    log.warning(
+                        "Strategy %s failed (exit code %d)", run.strategy, e.exit_code
+                    )
+                return
+            # a cancelled run stays cancelled, even if vivado exited cleanly before it was killed
+            if run.finish():
+                log.info(
+                    "Strategy %s finished with WNS=%s", run.strategy, run.final_wns
+                )
+
+        log.info(
+            "Racing strategies %s, with %d thread(s) each",
+            ", ".join(strategies),
+            nthreads,
+        )
+        with ThreadPoolExecutor(max_workers=len(runs)) as executor:
+            futures = [executor.submit(in_context(run_strategy), run) for run in runs]
+            try:
+                pending = set(futures)
+                while pending:
+                    _, pending = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+                    self._judge_race(runs)
+                for f in futures:
+                    f.result()
+            except BaseException:
+                for f in futures:
+                    f.cancel()
+                for run in runs:
+                    run.capture.terminate()
+                raise
+
+        self.results.strategies = {
+            run.strategy: dict(status=run.status, wns=run.final_wns) for run in runs
+        }
+        finished = [run for run in runs if run.status == "done"]
+        if not finished:
+            raise NonZeroExitCode([self.vivado.executable], 1, "all strategies failed")
+        winner = max(finished, key=lambda run: run.score())
+        log.info("Winning strategy: %s (WNS=%s)", winner.strategy, winner.final_wns)
+        self.results.strategy = winner.strategy
+        for p in winner.run_dir.iterdir():
+            dst = self.run_path / p.name
+            if dst.is_dir():
+                shutil.rmtree(dst)
+            shutil.move(str(p), str(dst))
+        for run in runs:
+            shutil.rmtree(run.run_dir, ignore_errors=True)
+
+    def _judge_race(self, runs: List[StrategyRun]) -> None:
+        """cancel the strategies which can't win anymore"""
+        ss = self.settings
+        assert isinstance(ss, self.Settings)
+        winner = next((run for run in runs if run.met_timing), None)
+        if winner:
+            for run in runs:
+                run.cancel(f"{winner.strategy} met timing")
+            return
+        finished = [run for run in runs if run.status == "done"]
+        if not finished:
+            return
+        best = max(finished, key=lambda run: run.score())
+        for run in runs:
+            wns = run.wns
+            if wns is not None and wns < best.score() - ss.race_margin:
+                run.cancel(
+                    f"WNS={wns} is behind {best.strategy} (WNS={best.final_wns})"
+                )
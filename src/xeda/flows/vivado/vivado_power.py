@@ -1,8 +1,10 @@
-import html
 import logging
-from typing import Any, Dict
-from xml.etree import ElementTree
+from pathlib import Path
+from typing import Any, Dict, Optional
 
+from ...activity import analyze_vcd
+from ...dataclass import Field, validator
+from . import iter_xml_tables
 from .vivado_postsynthsim import VivadoPostsynthSim
 from .vivado_alt_synth import VivadoSynth
 
@@ -15,11 +17,36 @@ class VivadoPower(VivadoPostsynthSim):
         elab_debug = "typical"
         timing_sim = True
         power_report_xml: str = "power_impl_timing.xml"
+        activity_dump: Optional[str] = Field(
+            None,
+            description="Derive switching activity from this VCD (.vcd, .vcd.gz) or FST waveform dump, instead of running a post-synthesis simulation",
+        )
+        activity_scope: Optional[str] = Field(
+            None,
+            description="Only analyze signals under this scope of activity_dump, e.g. 'tb.uut'",
+        )
+        activity_json: Optional[str] = Field(
+            "activity.json",
+            description="Also write per-signal switching activity of activity_dump to this JSON file",
+        )
 
-    def run(self) -> None:
-        super().run()
+        @validator("activity_dump")
+        def _validate_activity_dump(cls, value):  # pylint: disable=no-self-argument
+            # relative to the current directory, not the run directory
+            return str(Path(value).absolute()) if value else None
 
+    def run(self) -> None:
         assert isinstance(self.settings, self.Settings)
+        ss = self.settings
+        if ss.activity_dump:
+            report = analyze_vcd(ss.activity_dump, ss.activity_scope)
+            report.write_saif(ss.saif)
+            if ss.activity_json:
+                report.write_json(ss.activity_json)
+                self.artifacts.activity = ss.activity_json
+        else:
+            super().run()
+
         dep_synth_flow = self.pop_dependency(VivadoSynth)
         assert self.design.tb
         # assert isinstance(dep_synth_flow.settings, VivadoSynth.Settings)
@@ -31,29 +58,22 @@ class VivadoPower(VivadoPostsynthSim):
             ),
         )
 
-        self.vivado.run("-source", script_path)
+        self.run_vivado(script_path)
 
     def parse_power_report(self, report_xml) -> Dict[str, Any]:
-        tree = ElementTree.parse(report_xml)
         results = {}
-        for tablerow in tree.findall("./section[@title='Summary']/table/tablerow"):
-            tablecells = tablerow.findall("tablecell")
-            key, value = (
-                html.unescape(x.attrib["contents"]).strip() for x in tablecells
-            )
-            results[key] = value
-
-        for tablerow in tree.findall(
-            "./section[@title='Summary']/section[@title='On-Chip Components']/table/tablerow"
+        summary = ("Summary",)
+        components = ("Summary", "On-Chip Components")
+        for sections, _, _, rows in iter_xml_tables(
+            report_xml, lambda sections, _: sections in (summary, components)
         ):
-            tablecells = tablerow.findall("tablecell")
-            if len(tablecells) >= 2:
-                contents = [
-                    html.unescape(x.attrib["contents"]).strip() for x in tablecells
-                ]
-                key = contents[0]
-                value = contents[1]
-                results[f"Component Power: {key}"] = value
+            for contents in rows:
+                if len(contents) >= 2:
+                    key, value = contents[0], contents[1]
+                    if sections == summary:
+                        results[key] = value
+                    else:
+                        results[f"Component Power: {key}"] = value
 
         return results
 
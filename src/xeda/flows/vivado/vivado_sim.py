@@ -56,4 +56,4 @@ class VivadoSim(Vivado, SimFlow):
             ss.elab_flags.append(f"-sdf{delay_type} {sdf_root}={sdf_file}")
 
         script_path = self.copy_from_template("vivado_sim.tcl")
-        self.vivado.run("-source", script_path)
+        self.run_vivado(script_path)
@@ -1,10 +1,16 @@
+import hashlib
+import json
 import logging
 import os
+import re
+import shutil
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from ...dataclass import Field, XedaBaseModel
-from ..flow import FpgaSynthFlow
+from pathvalidate import sanitize_filename  # pyright: reportPrivateImportUsage=none
+
+from ...dataclass import Field, XedaBaseModel, validator
+from ..flow import Flow, FpgaSynthFlow
 from ..vivado import Vivado
 
 log = logging.getLogger(__name__)
@@ -18,6 +24,83 @@ class RunOptions(XedaBaseModel):
     steps: Dict[str, StepsValType] = {}
 
 
+class SynthCheckpointStore:
+    """
+    Synthesized checkpoints of a design, used as the reference for incremental synthesis by later runs.
+    Stored as <xeda run directory>/synth_checkpoints/<design name>/<key>.dcp, where key is a hash of the settings
+    which affect synthesis, other than the RTL sources: flow, FPGA part, `synth` run options, top and generics.
+    """
+
+    def __init__(self, flow: Flow) -> None:
+        ss = flow.settings
+        assert isinstance(ss, VivadoSynth.Settings)
+        design = flow.design
+        self.root = (
+            flow.run_path.parent.parent
+            / "synth_checkpoints"
+            / sanitize_filename(design.name)
+        )
+        key = dict(
+            flow=flow.name,
+            part=ss.fpga.part if ss.fpga else None,
+            synth=ss.synth.dict(),
+            out_of_context=ss.out_of_context,
+            top=design.rtl.top,
+            generics=design.rtl.generics,
+            vhdl_std=design.language.vhdl.standard,
+        )
+        self.key = hashlib.sha256(
+            json.dumps(key, sort_keys=True, default=str).encode()
+        ).hexdigest()[:16]
+
+    @property
+    def path(self) -> Path:
+        return self.root / f"{self.key}.dcp"
+
+    def reference(self) -> Optional[Path]:
+        """checkpoint of the latest run with the same key, if any"""
+        return self.path if self.path.exists() else None
+
+    def update(self, checkpoint: Path) -> None:
+        """make checkpoint the reference for later runs"""
+        if not checkpoint.exists():
+            log.warning("Synthesized checkpoint %s was not found", checkpoint)
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        shutil.copyfile(checkpoint, tmp)
+        os.replace(tmp, self.path)
+        log.info("Stored %s as %s", checkpoint, self.path)
+
+    @staticmethod
+    def add_results(
+        results: Dict[str, Any], reference: Optional[Path], log_file: Path
+    ) -> None:
+        """record if incremental synthesis was used, as reported in the "Incremental Synthesis Report Summary" of the log"""
+        used: Optional[bool] = None
+        reason = None
+        if log_file.exists():
+            with open(log_file, errors="replace") as f:
+                for line in f:
+                    m = re.search(r"Incremental synthesis run\s*:\s*(yes|no)", line)
+                    if m:
+                        used = m[1] == "yes"
+                    m = re.search(
+                        r"Reason for not running incremental synthesis\s*:\s*(.*)", line
+                    )
+                    if m:
+                        reason = m[1].strip()
+        if used is None:
+            used = reference is not None
+        results["incremental_synth"] = used
+        if reference:
+            results["incremental_synth_checkpoint"] = str(reference)
+            if not used:
+                log.warning("Incremental synthesis was not used: %s", reason or "?")
+        if reason and not used:
+            results["incremental_synth_reason"] = reason
+
+
 class VivadoSynth(Vivado, FpgaSynthFlow):
     """Synthesize with Xilinx Vivado using a project-based flow"""
 
@@ -45,6 +128,22 @@ class VivadoSynth(Vivado, FpgaSynthFlow):
         write_netlist: bool = True
         write_bitstream: bool = False
         qor_suggestions: bool = False
+        dump_utilization: Optional[str] = Field(
+            None,
+            description="Write all tables of the utilization report to this JSON file (relative to the run directory)",
+        )
+        incremental: bool = Field(
+            False,
+            description="Incremental implementation, using the routed checkpoint of the most recent successful run of the same design and FPGA part (if any) as the reference.",
+        )
+        incremental_checkpoint: Optional[str] = Field(
+            None,
+            description="Routed checkpoint (.dcp) to use as the reference for incremental implementation, instead of searching previous runs.",
+        )
+        incremental_synth: bool = Field(
+            False,
+            description="Incremental synthesis, using the synthesized checkpoint of the latest run of the same design with the same FPGA part, synthesis options and generics (if any) as the reference. Synthesized checkpoints are kept in <xeda run directory>/synth_checkpoints.",
+        )
         synth: RunOptions = RunOptions(
             strategy="Flow_PerfOptimized_high",
             steps={
@@ -64,6 +163,66 @@ class VivadoSynth(Vivado, FpgaSynthFlow):
             },
         )
 
+        @validator("incremental_checkpoint")
+        def _abs_checkpoint(cls, value):  # pylint: disable=no-self-argument
+            if value:
+                value = str(Path(value).absolute())
+            return value
+
+    def find_incremental_checkpoint(self) -> Optional[Path]:
+        """
+        Routed checkpoint of the most recent successful run of this flow, on a design with the same name and FPGA part,
+        in the xeda run directory (including the backups of previous runs)
+        """
+        assert isinstance(self.settings, self.Settings)
+        part = self.settings.fpga.part if self.settings.fpga else None
+        run_dir = self.run_path.parent.parent
+        candidates = []
+        for flow_dir in run_dir.glob(f"*/{self.name}*"):
+            try:
+                with open(flow_dir / "settings.json") as f:
+                    prev_settings = json.load(f)
+                with open(flow_dir / "results.json") as f:
+                    prev_results = json.load(f)
+                if (
+                    not prev_results.get("success")
+                    or prev_settings.get("flow_name") != self.name
+                    or prev_settings["design"]["name"] != self.design.name
+                    or (prev_settings["flow_settings"].get("fpga") or {}).get("part")
+                    != part
+                ):
+                    continue
+            except (OSError, ValueError, KeyError, TypeError, AttributeError):
+                continue
+            candidates.extend(flow_dir.glob("*.runs/impl_1/*_routed.dcp"))
+        if not candidates:
+            return None
+        return max(candidates, key=lambda p: p.stat().st_mtime)
+
+    @staticmethod
+    def parse_incremental_reuse(report) -> Dict[str, float]:
+        """Reuse % of cells, nets, pins and ports, from the summary of `report_incremental_reuse`"""
+        reuse: Dict[str, float] = {}
+        col = None
+        with open(report) as f:
+            for line in f:
+                if not line.startswith("|"):
+                    if reuse:
+                        break
+                    continue
+                cells = [c.strip() for c in line.strip().strip("|").split("|")]
+                if col is None:
+                    col = next(
+                        (i for i, c in enumerate(cells) if c.startswith("Reuse %")),
+                        None,
+                    )
+                    continue
+                try:
+                    reuse[cells[0].lower()] = float(cells[col])
+                except (ValueError, IndexError):
+                    pass
+        return reuse
+
     def run(self):
         assert isinstance(self.settings, self.Settings)
         settings = self.settings
@@ -123,11 +282,46 @@ class VivadoSynth(Vivado, FpgaSynthFlow):
         if "dsp" in settings.blacklisted_resources:
             settings.synth.steps["SYNTH_DESIGN"]["MAX_DSP"] = 0
 
-        reports_tcl = self.copy_from_template("vivado_report_helper.tcl")
+        incremental_checkpoint = None
+        if settings.incremental_checkpoint:
+            incremental_checkpoint = Path(settings.incremental_checkpoint)
+        elif settings.incremental:
+            incremental_checkpoint = self.find_incremental_checkpoint()
+            if incremental_checkpoint is None:
+                log.warning(
+                    "No previous routed checkpoint of %s was found. Running a full implementation.",
+                    self.design.name,
+                )
+        if incremental_checkpoint:
+            if self.run_path in incremental_checkpoint.parents:
+                # the project is re-created, so keep a copy
+                ref = Path(settings.checkpoints_dir) / "incremental_reference.dcp"
+                ref.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(incremental_checkpoint, ref)
+                incremental_checkpoint = ref.absolute()
+            log.info("Incremental implementation from %s", incremental_checkpoint)
+            self.results.incremental_checkpoint = str(incremental_checkpoint)
+
+        synth_store = SynthCheckpointStore(self) if settings.incremental_synth else None
+        synth_ref = synth_store.reference() if synth_store else None
+        if synth_ref:
+            log.info("Incremental synthesis from %s", synth_ref)
+
+        reports_tcl = self.copy_from_template(
+            "vivado_report_helper.tcl", incremental_checkpoint=incremental_checkpoint
+        )
         script_path = self.copy_from_template(
-            "vivado_synth.tcl", xdc_files=[clock_xdc_path], reports_tcl=reports_tcl
+            "vivado_synth.tcl",
+            xdc_files=[clock_xdc_path],
+            reports_tcl=reports_tcl,
+            incremental_checkpoint=incremental_checkpoint,
+            incremental_synth_checkpoint=synth_ref,
         )
-        self.vivado.run("-source", script_path)
+        self.run_vivado(script_path)
+        if synth_store:
+            synth_run = Path(f"{self.design.rtl.top}.runs") / "synth_1"
+            synth_store.update(synth_run / f"{self.design.rtl.top}.dcp")
+            synth_store.add_results(self.results, synth_ref, synth_run / "runme.log")
 
     def parse_timing_report(self, reports_dir) -> bool:
         failed = False
@@ -173,9 +367,12 @@ class VivadoSynth(Vivado, FpgaSynthFlow):
 
         failed = not self.parse_timing_report(reports_dir)
 
+        reuse_report = reports_dir / "incremental_reuse.rpt"
+        if reuse_report.exists():
+            for k, v in self.parse_incremental_reuse(reuse_report).items():
+                self.results[f"reuse_{k}"] = v
+
         report_file = reports_dir / "utilization.xml"
-        utilization = self.parse_xml_report(report_file)
-        # ordered dict
         fields = [
             ("slice", ["Slice Logic Distribution", "Slice"]),
             ("slice", ["CLB Logic Distribution", "CLB"]),  # Ultrascale+
@@ -200,6 +397,17 @@ class VivadoSynth(Vivado, FpgaSynthFlow):
             ("dsp", ["DSP", "DSPs"]),
             ("dsp", ["ARITHMETIC", "DSPs"]),
         ]
+        assert isinstance(self.settings, self.Settings)
+        if self.settings.dump_utilization:
+            utilization = self.parse_xml_report(report_file)
+            if utilization is not None:
+                with open(self.settings.dump_utilization, "w") as f:
+                    json.dump(utilization, f, indent=1)
+                self.artifacts.utilization = self.settings.dump_utilization
+        else:
+            utilization = self.parse_xml_report(
+                report_file, tables={path[0] for _, path in fields}
+            )
         if utilization is not None:
             for k, path in fields:
                 if self.results.get(k) is None:
@@ -215,10 +423,6 @@ class VivadoSynth(Vivado, FpgaSynthFlow):
                             report_file,
                         )
 
-        self.results["_utilization"] = utilization
-
-        assert isinstance(self.settings, self.Settings)
-
         if not failed:
             for res in self.settings.blacklisted_resources:
                 res_util = self.results.get(res)
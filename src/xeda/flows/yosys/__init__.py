@@ -156,6 +156,10 @@ class Yosys(SynthFlow):
 
     def __init__(self, flow_settings: Settings, design: Design, run_path: Path):
         super().__init__(flow_settings, design, run_path)
+        self.yosys = Tool(
+            executable="yosys",
+            docker=Docker(image="hdlc/impl"),  # pyright: reportGeneralTypeIssues=none
+        )
         self.stat_report = "utilization.rpt"
         self.timing_report = "timing.rpt"
         self.artifacts = Box(
@@ -188,10 +192,7 @@ class Yosys(SynthFlow):
 
     def run(self) -> None:
         assert isinstance(self.settings, self.Settings)
-        yosys = Tool(
-            executable="yosys",
-            docker=Docker(image="hdlc/impl"),  # pyright: reportGeneralTypeIssues=none
-        )
+        yosys = self.yosys
         ss = self.settings
         if ss.sta:
             ss.flatten = True
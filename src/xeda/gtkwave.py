@@ -1,35 +1,133 @@
 import logging
 import os
 from pathlib import Path
-from typing import Union
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
 
 from vcd import gtkw
 
 log = logging.getLogger(__name__)
 
+__all__ = [
+    "SignalTrie",
+    "gen_gtkw",
+    "iter_wave_opt_signals",
+]
 
-def _add_sig(g: gtkw.GTKWSave, root_group, signals):
-    i = 0
-    while i < len(signals):
-        sig = signals[i]
-        if sig[: len(root_group)] == root_group:  # in this group
-            if len(sig) - len(root_group) > 1:
-                new_group = sig[len(root_group)]
-                with g.group(new_group, closed=True):
-                    i += _add_sig(g, root_group + [new_group], signals[i:])
+
+def iter_wave_opt_signals(
+    wave_opt_file: Union[str, os.PathLike], extra_top: Optional[str] = None
+) -> Iterator[List[str]]:
+    """Hierarchical names of the signals listed in a GHDL wave option file, read line by line"""
+    with open(wave_opt_file, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("/"):
+                sig = line[1:].split("/")
+                if extra_top:
+                    sig.insert(0, extra_top)
+                yield sig
+
+
+class _TrieNode:
+    __slots__ = ("children", "leaf")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.leaf = False
+
+
+class SignalTrie:
+    """
+    Prefix tree of the signal hierarchy. Siblings keep the order in which they were first added.
+    Building the trie and writing it out are linear in the total length of the signal names.
+    """
+
+    def __init__(self, signals: Iterable[Sequence[str]] = ()) -> None:
+        self.root = _TrieNode()
+        self.num_signals = 0
+        for sig in signals:
+            self.add(sig)
+
+    def add(self, sig: Sequence[str]) -> None:
+        node = self.root
+        for name in sig:
+            child = node.children.get(name)
+            if child is None:
+                child = node.children[name] = _TrieNode()
+            node = child
+        if not node.leaf:
+            node.leaf = True
+            self.num_signals += 1
+
+    def common_root(self) -> List[str]:
+        """longest common hierarchy (scope) of all signals (see utils.common_root)"""
+        root: List[str] = []
+        node = self.root
+        while len(node.children) == 1 and not node.leaf:
+            name, child = next(iter(node.children.items()))
+            if not child.children or child.leaf:
+                break
+            root.append(name)
+            node = child
+        return root
+
+    def _find(self, path: Sequence[str]) -> Optional[_TrieNode]:
+        node = self.root
+        for name in path:
+            child = node.children.get(name)
+            if child is None:
+                return None
+            node = child
+        return node
+
+    def write(
+        self, g: gtkw.GTKWSave, root_group: Sequence[str], strip_root: bool = False
+    ) -> None:
+        """Write the signals under root_group as traces, with a (closed) group for each level of hierarchy below it.
+        If strip_root, trace names are relative to root_group."""
+        node = self._find(root_group)
+        if node is None:
+            return
+        if node.leaf and root_group:
+            # root_group is a signal as well
+            g.trace(root_group[-1] if strip_root else ".".join(root_group))
+        path: List[str] = [] if strip_root else list(root_group)
+        stack = [iter(node.children.items())]
+        while stack:
+            for name, child in stack[-1]:
+                if child.leaf:
+                    g.trace(".".join(path + [name]))
+                if child.children:
+                    g.begin_group(name, closed=True)
+                    path.append(name)
+                    stack.append(iter(child.children.items()))
+                    break
             else:
-                g.trace(".".join(sig))
-                i += 1
-        else:
-            break
-    return i
+                stack.pop()
+                if stack:
+                    g.end_group(path.pop(), closed=True)
 
 
-def gen_gtkw(dump_file: Union[str, os.PathLike], signals, root_group):
-    root_group = root_group or []
+def gen_gtkw(
+    dump_file: Union[str, os.PathLike],
+    signals: Union[SignalTrie, Iterable[Sequence[str]]],
+    root_group: Optional[Sequence[str]] = None,
+    strip_root: bool = False,
+) -> Path:
+    """Generate a GTKWave save file for dump_file, tracing all signals, grouped by hierarchy below root_group.
+    signals can be any iterable, e.g. iter_wave_opt_signals. If root_group is None, the common root of all signals is used.
+    """
+    trie = signals if isinstance(signals, SignalTrie) else SignalTrie(signals)
+    if root_group is None:
+        root_group = trie.common_root()
     save_file = Path(dump_file).with_suffix(".gtkw")
-    log.info("generated gtkwave save file: %s", save_file.absolute())
     with open(save_file, "w") as f:
         g = gtkw.GTKWSave(f)
         g.dumpfile(str(dump_file), abspath=not os.path.isabs(dump_file))
-        _add_sig(g, root_group, signals)
+        trie.write(g, root_group, strip_root)
+    log.info(
+        "generated gtkwave save file: %s (%d signals)",
+        save_file.absolute(),
+        trie.num_signals,
+    )
+    return save_file
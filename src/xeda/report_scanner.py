@@ -0,0 +1,90 @@
+"""Regex scanning of (potentially very large) tool reports"""
+import logging
+import mmap
+import os
+import re
+from contextlib import AbstractContextManager
+from pathlib import Path
+from types import TracebackType
+from typing import Dict, Optional, Pattern, Tuple, Type, Union
+
+__all__ = [
+    "ReportScanner",
+    "PatternCache",
+]
+
+log = logging.getLogger(__name__)
+
+
+class PatternCache:
+    """Compiled (bytes) patterns, keyed by the pattern string and flags"""
+
+    def __init__(self) -> None:
+        self._patterns: Dict[Tuple[str, int], Pattern[bytes]] = {}
+
+    def get(self, pattern: str, flags: int) -> Pattern[bytes]:
+        key = (pattern, flags)
+        compiled = self._patterns.get(key)
+        if compiled is None:
+            compiled = re.compile(pattern.encode(), flags)
+            self._patterns[key] = compiled
+        return compiled
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+
+class ReportScanner(AbstractContextManager):
+    """
+    Memory-maps a report file and searches it with compiled bytes patterns.
+    Sequential searches continue from the end of the previous match, tracked as an offset into the mapping.
+    Only the pages touched by the regex engine are read from disk, so a search which matches early
+    does not read the remainder of the file.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        self.path = Path(path)
+        self.pos = 0
+        self._file = None
+        self._buf: Union[bytes, mmap.mmap] = b""
+
+    def __enter__(self) -> "ReportScanner":
+        self._file = open(self.path, "rb")  # pylint: disable=consider-using-with
+        try:
+            self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file, which can't be mapped
+            self._buf = b""
+        self.pos = 0
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+        self._buf = b""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __len__(self) -> int:
+        return len(self._buf)
+
+    def search(
+        self, pattern: Pattern[bytes], sequential: bool = False
+    ) -> Optional[Dict[str, Optional[str]]]:
+        """Named groups of the first match of pattern after the current position, or None if not found.
+        If sequential, the position is advanced to the end of the match."""
+        match = pattern.search(self._buf, self.pos)
+        if match is None:
+            return None
+        if sequential:
+            self.pos = match.end()
+            log.debug("report position: %d/%d", self.pos, len(self._buf))
+        return {
+            k: None if v is None else v.decode(errors="replace")
+            for k, v in match.groupdict().items()
+        }
@@ -1,26 +1,59 @@
 import contextlib
+import functools
+import hashlib
+import json
 import logging
 import os
 import re
+import shutil
+import signal
 import subprocess
 import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar, Token, copy_context
 from pathlib import Path
 from sys import stderr
-from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from types import TracebackType
+from typing import (
+    IO,
+    Any,
+    Callable,
+    ClassVar,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 from .dataclass import Field, XedaBaseModeAllowExtra, XedaBaseModel, validator
+from .tool_cache import ToolInfoCache
 from .utils import cached_property, unique
 
 log = logging.getLogger(__name__)
 
+R = TypeVar("R")
+
 
 __all__ = [
     "ToolException",
     "NonZeroExitCode",
     "ExecutableNotFound",
+    "ToolTimeout",
     "Docker",
     "Tool",
     "run_process",
+    "ProcessTimeout",
+    "in_context",
+    "OutputCapture",
 ]
 
 
@@ -34,6 +67,9 @@ class NonZeroExitCode(ToolException):
         self.exit_code = exit_code
         super().__init__(*args)
 
+    def __reduce__(self):
+        return (self.__class__, (self.command_args, self.exit_code, *self.args))
+
 
 class ExecutableNotFound(ToolException):
     def __init__(
@@ -44,6 +80,225 @@ class ExecutableNotFound(ToolException):
         self.tool = tool
         self.path = path
 
+    def __reduce__(self):
+        return (self.__class__, (self.exec, self.tool, self.path, *self.args))
+
+
+class ToolTimeout(ToolException):
+    def __init__(self, command_args: Any, timeout: float, *args: object) -> None:
+        self.command_args = command_args
+        self.timeout = timeout
+        super().__init__(*args)
+
+    def __reduce__(self):
+        return (self.__class__, (self.command_args, self.timeout, *self.args))
+
+    def __str__(self) -> str:
+        return (
+            f"{self.command_args[0]} did not finish within {self.timeout:.0f} seconds"
+        )
+
+
+# monotonic time after which running tool processes are killed, per thread (or asyncio task)
+# threads started within a ProcessTimeout only see its deadline when run through `in_context`
+_deadline: ContextVar[Optional[float]] = ContextVar("xeda_deadline", default=None)
+
+# seconds to wait after SIGTERM before sending SIGKILL to a process group
+TERMINATE_GRACE_PERIOD = 5.0
+
+
+class ProcessTimeout(contextlib.AbstractContextManager):
+    """All tool processes started within this context need to finish in timeout_seconds (in total)"""
+
+    def __init__(self, timeout_seconds: Optional[float]) -> None:
+        self.timeout_seconds = timeout_seconds
+        self._token: Optional[Token] = None
+
+    def __enter__(self) -> None:
+        deadline = _deadline.get()
+        if self.timeout_seconds is not None and self.timeout_seconds > 0:
+            new_deadline = time.monotonic() + self.timeout_seconds
+            deadline = new_deadline if deadline is None else min(deadline, new_deadline)
+        self._token = _deadline.set(deadline)
+
+    def __exit__(
+        self,
+        exception_type: Optional[Type[BaseException]],
+        exception_value: Optional[BaseException],
+        exception_traceback: Optional[TracebackType],
+    ) -> None:
+        assert self._token is not None
+        _deadline.reset(self._token)
+        self._token = None
+
+
+def in_context(fn: Callable[..., R]) -> Callable[..., R]:
+    """
+    fn, to be run in a copy of the current context, e.g. by another thread.
+    Tools started by fn are then subject to the deadline of the enclosing ProcessTimeout.
+    """
+    return functools.partial(copy_context().run, fn)
+
+
+def _remaining_time(timeout: Optional[float]) -> Optional[float]:
+    deadline = _deadline.get()
+    if deadline is None:
+        return timeout
+    remaining = max(0.0, deadline - time.monotonic())
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def _kill_process_group(
+    proc: subprocess.Popen,
+    process_group: bool = True,
+    grace_period: float = TERMINATE_GRACE_PERIOD,
+) -> None:
+    """SIGTERM and then, if still alive after grace_period, SIGKILL the process and all of its process group"""
+    group = proc.pid if process_group and hasattr(os, "killpg") else None
+
+    def send(sig: int) -> None:
+        try:
+            if group is not None:
+                os.killpg(group, sig)
+            elif sig == signal.SIGTERM:
+                proc.terminate()
+            else:
+                proc.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    log.warning("Terminating %s[%d]", proc.args[0], proc.pid)
+    send(signal.SIGTERM)
+    try:
+        proc.wait(timeout=grace_period)
+    except subprocess.TimeoutExpired:
+        log.warning("Killing %s[%d]", proc.args[0], proc.pid)
+    # helper processes could still be alive, even if the main process has exited
+    send(signal.SIGKILL)
+    proc.wait()
+
+
+LineCallback = Callable[[str], Any]
+
+
+class OutputCapture:
+    """
+    Streams stdout and stderr of a tool process, line by line, on background threads.
+    Every line is (optionally) echoed to the console, appended to `log_file`, kept in a ring buffer
+    of the last `tail_lines` lines, and passed to each of the `callbacks`.
+    A callback can abort the tool by raising an exception, which is then re-raised by `run_process`.
+    Memory usage is bounded, regardless of the size of the tool's output.
+    """
+
+    def __init__(
+        self,
+        log_file: Union[None, str, os.PathLike] = None,
+        tail_lines: int = 100,
+        callbacks: Optional[Sequence[LineCallback]] = None,
+        echo: bool = True,
+    ) -> None:
+        self.log_file = Path(log_file) if log_file else None
+        self.callbacks: List[LineCallback] = list(callbacks or [])
+        self.echo = echo
+        self.error: Optional[BaseException] = None  # raised by a callback
+        self._tail: Deque[str] = deque(maxlen=max(1, tail_lines))
+        self._lock = threading.Lock()
+        self._log: Optional[IO[str]] = None
+        self._threads: List[threading.Thread] = []
+        self._proc: Optional[subprocess.Popen] = None
+        self._process_group = True
+        self._started = False
+
+    def add_callback(self, callback: LineCallback) -> None:
+        self.callbacks.append(callback)
+
+    @property
+    def tail(self) -> List[str]:
+        """last lines of the output (stdout and stderr, as interleaved when received)"""
+        with self._lock:
+            return list(self._tail)
+
+    def start(self, proc: subprocess.Popen, process_group: bool = True) -> None:
+        """start reading from stdout/stderr pipes of proc"""
+        self._proc = proc
+        self._process_group = process_group
+        self.error = None
+        if self.log_file:
+            # successive runs are appended to the same log
+            self._log = open(self.log_file, "a" if self._started else "w")
+        self._started = True
+        streams = [(proc.stdout, sys.stdout), (proc.stderr, sys.stderr)]
+        self._threads = [
+            threading.Thread(
+                target=self._pump,
+                args=(stream, echo_to),
+                name=f"xeda:{proc.pid}:output",
+                daemon=True,
+            )
+            for stream, echo_to in streams
+            if stream is not None
+        ]
+        for t in self._threads:
+            t.start()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """wait for all output to be consumed"""
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+        # on a timeout, the readers could still be running and writing to the log
+        with self._lock:
+            if self._log:
+                self._log.close()
+                self._log = None
+
+    def _pump(self, stream: IO[str], echo_to: IO[str]) -> None:
+        with stream:
+            for line in stream:
+                with self._lock:
+                    if self._log:
+                        self._log.write(line)
+                    self._tail.append(line.rstrip("\r\n"))
+                if self.echo:
+                    echo_to.write(line)
+                    echo_to.flush()
+                if self.error is None:
+                    self._run_callbacks(line.rstrip("\r\n"))
+
+    def _run_callbacks(self, line: str) -> None:
+        for callback in self.callbacks:
+            try:
+                callback(line)
+            except Exception as e:  # pylint: disable=broad-except
+                self.error = e
+                self._abort()
+                return
+
+    def terminate(self, wait: bool = True) -> None:
+        """
+        terminate the process (and its process group) whose output is being captured.
+        Unless `wait`, the process is killed in the background, without waiting (up to TERMINATE_GRACE_PERIOD) for it to exit.
+        """
+        proc = self._proc
+        if proc is None or proc.poll() is not None:
+            return
+        if wait:
+            _kill_process_group(proc, self._process_group)
+        else:
+            threading.Thread(
+                target=_kill_process_group,
+                args=(proc, self._process_group),
+                daemon=True,
+            ).start()
+
+    def _abort(self) -> None:
+        proc = self._proc
+        if proc is None or proc.poll() is not None:
+            return
+        log.critical("Aborting %s[%d]: %s", proc.args[0], proc.pid, self.error)
+        # don't block this reader thread; the process needs its output drained to exit
+        self.terminate(wait=False)
+
 
 class RemoteSettings(XedaBaseModel):
     enabled: bool = False
@@ -59,6 +314,35 @@ OptionalPath = Union[None, str, os.PathLike]
 OptionalBoolOrPath = Union[None, bool, str, os.PathLike]
 
 
+# Pooled containers stay alive as long as a command is running or the pool dir was touched within ttl ($0) seconds
+_POOL_WATCHER = (
+    'd="${XEDA_POOL_DIR:-/tmp/.xeda_pool}"; mkdir -p "$d/active"; touch "$d/last"; '
+    "while sleep 1; do "
+    'if [ -n "$(ls -A "$d/active")" ]; then touch "$d/last"; '
+    'elif [ $(( $(date +%s) - $(stat -c %Y "$d/last") )) -ge "$0" ]; then exit 0; fi; '
+    "done"
+)
+# Wraps commands `docker exec`ed in a pooled container, marking the container as busy while they run.
+# The marker (named by the token in $0) holds the PID of the command, which is its own process group if setsid is
+# available. Not run in the background when attached to a terminal, which then delivers the signals itself.
+# The shell's own messages (e.g. "Terminated") are discarded, as its output pipe could be closed by then.
+_POOL_EXEC = (
+    'd="${XEDA_POOL_DIR:-/tmp/.xeda_pool}"; mkdir -p "$d/active"; a="$d/active/$0"; touch "$a"; '
+    'trap "rm -f \\"$a\\"; touch \\"$d/last\\"" EXIT; trap "exit 143" TERM INT HUP; '
+    'if [ -t 0 ]; then "$@"; exit; fi; '
+    'if command -v setsid >/dev/null 2>&1; then setsid "$@" & else "$@" & fi; '
+    'c=$!; echo "$c" > "$a"; wait "$c" 2>/dev/null'
+)
+# `docker exec` does not forward signals: terminates (SIGTERM, then after $1 seconds SIGKILL) the command of token $0
+_POOL_KILL = (
+    'd="${XEDA_POOL_DIR:-/tmp/.xeda_pool}"; c=$(cat "$d/active/$0" 2>/dev/null); [ -n "$c" ] || exit 0; '
+    'kill -TERM "-$c" 2>/dev/null || kill -TERM "$c" 2>/dev/null || exit 0; '
+    'i=0; while [ "$i" -lt "$1" ] && kill -0 "$c" 2>/dev/null; do sleep 1; i=$((i + 1)); done; '
+    'kill -KILL "-$c" 2>/dev/null || kill -KILL "$c" 2>/dev/null; exit 0'
+)
+POOL_LABEL = "xeda.pool"
+
+
 class Docker(XedaBaseModel):
     enabled: bool = False
     command: List[str] = []
@@ -67,18 +351,73 @@ class Docker(XedaBaseModel):
     tag: str = Field("latest", description="Docker image tag")
     registry: Optional[str] = Field(None, description="Docker image registry")
     mounts: Dict[str, str] = {}
+    pool: bool = Field(
+        False,
+        description="Run commands (docker exec) in a long-lived container, shared by all runs using the same image and mounts. Also enabled by the XEDA_DOCKER_POOL environment variable.",
+    )
+    pool_ttl: float = Field(
+        300.0, description="Seconds after which an idle pooled container exits"
+    )
+    pool_mount_root: Optional[str] = Field(
+        None,
+        description="Mount this host directory in pooled containers, instead of the current working directory, if it contains it. E.g., the xeda run directory, so the same container can be used by all flows.",
+    )
+
+    # host-side time of last use of pooled containers started by this process
+    _pool_last_used: ClassVar[Dict[str, float]] = {}
+
+    @property
+    def image_ref(self) -> str:
+        return f"{self.image}:{self.tag}"
+
+    @property
+    def pool_enabled(self) -> bool:
+        return self.pool or os.environ.get("XEDA_DOCKER_POOL", "").strip().lower() in (
+            "1",
+            "on",
+            "yes",
+            "true",
+        )
 
     # TODO this is only for a Linux container
     @cached_property
     def _cpuinfo(self) -> List[List[str]]:
-        ret = self._run_docker("cat", "/proc/cpuinfo", stdout=True)
-        assert ret
+        cache = ToolInfoCache.default()
+        key = None
+        if cache and self.image_id:
+            key = dict(probe="docker_cpuinfo", image=self.image_ref, id=self.image_id)
+        ret = cache.get(key) if cache and key else None
+        if not ret:
+            # no need for the pool, as this is only done once per image
+            ret = self._run_docker("cat", "/proc/cpuinfo", stdout=True, use_pool=False)
+            assert ret
+            if cache and key:
+                cache.put(key, ret)
         return [x.split("\n") for x in re.split(r"\n\s*\n", ret, re.MULTILINE)]
 
     @property
     def cpuinfo(self) -> List[List[str]]:
         return self._cpuinfo
 
+    @cached_property
+    def _image_id(self) -> Optional[str]:
+        try:
+            out = run_process(
+                "docker",
+                ["image", "inspect", "--format={{.Id}}", self.image_ref],
+                stdout=True,
+                check=False,
+            )
+        except ToolException as e:
+            log.debug("Could not inspect docker image %s: %s", self.image, e)
+            return None
+        return out.strip() if out and out.strip().startswith("sha256:") else None
+
+    @property
+    def image_id(self) -> Optional[str]:
+        """ID (digest) of the local docker image, or None if not available"""
+        return self._image_id
+
     @property
     def nproc(self) -> Optional[int]:
         return len(self._cpuinfo)
@@ -87,6 +426,29 @@ class Docker(XedaBaseModel):
     def name(self) -> str:
         return self.command[0] if self.command else "_"
 
+    @cached_property
+    def _cpuinfo_file(self) -> Path:
+        lines = []
+        for proc in self.cpuinfo:
+            for line in proc:
+                assert isinstance(line, str)
+                if line.startswith("Features"):
+                    line += " sse sse2"
+                lines.append(line + "\n")
+            lines.append("\n")
+        content = "".join(lines)
+        # content-addressed, so the same file (and mount) is used by all runs and processes
+        digest = hashlib.sha256(content.encode()).hexdigest()[:16]
+        cpuinfo_file = (
+            Path(tempfile.gettempdir()) / f"xeda-{os.getuid()}" / f"cpuinfo-{digest}"
+        )
+        if not cpuinfo_file.exists():
+            cpuinfo_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cpuinfo_file.with_suffix(f".{os.getpid()}")
+            tmp.write_text(content)
+            os.replace(tmp, cpuinfo_file)
+        return cpuinfo_file
+
     def run(
         self,
         *args: Any,
@@ -94,21 +456,18 @@ class Docker(XedaBaseModel):
         stdout: OptionalBoolOrPath = None,
         check: bool = True,
         root_dir: OptionalPath = None,
+        capture: Optional[OutputCapture] = None,
     ) -> Union[None, str]:
         """Run the tool from a docker container"""
-        cpuinfo_file = Path(".cpuinfo").resolve()
-        with open(cpuinfo_file, "w") as f:
-            for proc in self.cpuinfo:
-                for line in proc:
-                    assert isinstance(line, str)
-                    if line.startswith("Features"):
-                        line += " sse sse2"
-                    f.write(line + "\n")
-                f.write("\n")
-
-        self.mounts[str(cpuinfo_file)] = "/proc/cpuinfo"
         return self._run_docker(
-            *self.command, *args, env=env, stdout=stdout, check=check, root_dir=root_dir
+            *self.command,
+            *args,
+            env=env,
+            stdout=stdout,
+            check=check,
+            root_dir=root_dir,
+            capture=capture,
+            extra_mounts={str(self._cpuinfo_file): "/proc/cpuinfo"},
         )
 
     def _run_docker(
@@ -118,37 +477,165 @@ class Docker(XedaBaseModel):
         stdout: OptionalBoolOrPath = None,
         check: bool = True,
         root_dir: OptionalPath = None,
+        capture: Optional[OutputCapture] = None,
+        extra_mounts: Optional[Dict[str, str]] = None,
+        use_pool: bool = True,
     ) -> Union[None, str]:
         cwd = Path.cwd()
         wd = root_dir if root_dir else cwd
         if not isinstance(wd, Path):
             wd = Path(wd)
-        docker_args = [
-            "--rm",
-            f"--workdir={wd}",
-        ]
-        self.mounts[str(wd)] = str(wd)
-        self.mounts[str(cwd)] = str(cwd)
-        if not stdout and sys.stdout.isatty():
+        pooled = use_pool and self.pool_enabled
+        mounts = dict(self.mounts)
+        if extra_mounts:
+            mounts.update(extra_mounts)
+        for d in (wd, cwd):
+            if (
+                pooled
+                and self.pool_mount_root
+                and _is_relative_to(d, self.pool_mount_root)
+            ):
+                d = Path(self.pool_mount_root)
+            mounts[str(d)] = str(d)
+        interactive = not stdout and not capture and sys.stdout.isatty()
+        docker_args = [f"--workdir={wd}"]
+        if interactive:
             docker_args += ["--tty", "--interactive"]
-        if self.platform:
-            docker_args += ["--platform", self.platform]
-        for k, v in self.mounts.items():
-            docker_args.append(f"--volume={k}:{v}")
         if env:
             env_file = wd / f".{self.name}_docker.env"
             with open(env_file, "w") as f:
                 f.write("\n".join(f"{k}={v}" for k, v in env.items()))
             docker_args.extend(["--env-file", str(env_file)])
+        container = None
+        token = uuid.uuid4().hex
+        if pooled:
+            container = self._pool_container(mounts)
+            docker_cmd = ["exec", *docker_args, container, "sh", "-c", _POOL_EXEC]
+            docker_cmd += [token, *args]
+        else:
+            docker_args.insert(0, "--rm")
+            if self.platform:
+                docker_args += ["--platform", self.platform]
+            for k, v in mounts.items():
+                docker_args.append(f"--volume={k}:{v}")
+            docker_cmd = ["run", *docker_args, self.image_ref, *args]
+        try:
+            return run_process(
+                "docker",
+                docker_cmd,
+                env=None,
+                stdout=stdout,
+                check=check,
+                tool_name=self.name,
+                new_process_group=not interactive,
+                capture=capture,
+            )
+        except BaseException:
+            # e.g. on a timeout or interrupt, only the local `docker exec` process was terminated
+            if container:
+                self._pool_terminate(container, token)
+            raise
+        finally:
+            if container:
+                self._pool_last_used[container] = time.monotonic()
 
-        return run_process(
+    @staticmethod
+    def _pool_terminate(container: str, token: str) -> None:
+        """terminate the command of `token` in a pooled container, if it's still running"""
+        try:
+            subprocess.run(
+                ["docker", "exec", container, "sh", "-c", _POOL_KILL, token]
+                + [str(int(TERMINATE_GRACE_PERIOD))],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=TERMINATE_GRACE_PERIOD + 30,
+                check=False,
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            log.warning("Failed to terminate command in container %s: %s", container, e)
+
+    def _pool_container(self, mounts: Dict[str, str]) -> str:
+        """name of a running pooled container for this image and mounts, which is started if needed"""
+        key = dict(
+            image=self.image_ref,
+            platform=self.platform,
+            mounts=sorted(mounts.items()),
+            ttl=self.pool_ttl,
+        )
+        digest = hashlib.sha256(json.dumps(key).encode()).hexdigest()[:16]
+        name = f"xeda-pool-{digest}"
+        last_used = self._pool_last_used.get(name)
+        # leave enough margin for the container not to exit in the meantime
+        if last_used and time.monotonic() - last_used < self.pool_ttl - 2:
+            return name
+        for _ in range(2):
+            if self._container_running(name):
+                return name
+            docker_args = [
+                "--detach",
+                "--rm",
+                f"--name={name}",
+                f"--label={POOL_LABEL}",
+            ]
+            if self.platform:
+                docker_args += ["--platform", self.platform]
+            for k, v in mounts.items():
+                docker_args.append(f"--volume={k}:{v}")
+            log.info("Starting pooled docker container %s (%s)", name, self.image_ref)
+            try:
+                run_process(
+                    "docker",
+                    ["run", *docker_args, self.image_ref]
+                    + ["sh", "-c", _POOL_WATCHER, str(int(self.pool_ttl))],
+                    stdout=True,
+                    tool_name=self.name,
+                )
+                return name
+            except NonZeroExitCode:
+                # could have been started by another process, or been exiting
+                continue
+        if self._container_running(name):
+            return name
+        raise ToolException(f"Failed to start docker container {name}")
+
+    @staticmethod
+    def _container_running(name: str) -> bool:
+        out = run_process(
             "docker",
-            ["run", *docker_args, f"{self.image}:{self.tag}", *args],
-            env=None,
-            stdout=stdout,
-            check=check,
-            tool_name=self.name,
+            [
+                "ps",
+                "--quiet",
+                "--filter",
+                f"name=^{name}$",
+                "--filter",
+                "status=running",
+            ],
+            stdout=True,
+            check=False,
         )
+        return bool(out)
+
+    @classmethod
+    def stop_pooled_containers(cls) -> None:
+        """stop all pooled containers, including those started by other processes"""
+        out = run_process(
+            "docker",
+            ["ps", "--quiet", "--filter", f"label={POOL_LABEL}"],
+            stdout=True,
+            check=False,
+        )
+        containers = out.split() if out else []
+        if containers:
+            run_process("docker", ["rm", "--force", *containers], stdout=True)
+        cls._pool_last_used.clear()
+
+
+def _is_relative_to(path: Path, root: Union[str, os.PathLike]) -> bool:
+    try:
+        path.relative_to(root)
+        return True
+    except ValueError:
+        return False
 
 
 def run_process(
@@ -159,7 +646,17 @@ def run_process(
     check: bool = True,
     cwd: OptionalPath = None,
     tool_name: str = "",
+    timeout: Optional[float] = None,
+    new_process_group: bool = True,
+    capture: Optional[OutputCapture] = None,
 ) -> Union[None, str]:
+    """
+    Run executable and wait for it to finish.
+    The process is started in a new process group (unless new_process_group=False, e.g. for interactive use)
+    and the whole group is terminated on a timeout or KeyboardInterrupt.
+    The timeout is the minimum of `timeout` and the time remaining in the enclosing `ProcessTimeout` context.
+    If `capture` is given, stdout and stderr are streamed through it (and `stdout` is ignored).
+    """
     if args is None:
         args = []
     args = [str(a) for a in args]
@@ -168,6 +665,10 @@ def run_process(
     log.info("Running `%s`", " ".join([executable, *args]))
     if cwd:
         log.info("cwd=%s", cwd)
+    if capture is not None:
+        stdout = None
+        if capture.log_file:
+            log.info("Output is logged to: %s", capture.log_file)
     if stdout and isinstance(stdout, (str, os.PathLike)):
         stdout = Path(stdout)
         log.info("redirecting stdout to %s", stdout)
@@ -179,35 +680,62 @@ def run_process(
         cm = cm_call
     else:
         cm = contextlib.nullcontext
+    timeout = _remaining_time(timeout)
     with cm() as f:
         try:
             with subprocess.Popen(
                 [executable, *args],
                 cwd=cwd,
                 shell=False,
-                stdout=f if f else subprocess.PIPE if stdout else None,
+                stdout=f if f else subprocess.PIPE if stdout or capture else None,
+                stderr=subprocess.PIPE if capture else None,
                 bufsize=1,
                 universal_newlines=True,
                 encoding="utf-8",
                 errors="replace",
                 env=env,
+                start_new_session=new_process_group,
             ) as proc:
                 log.info("Started %s[%d]", executable, proc.pid)
-                if stdout:
-                    if isinstance(stdout, bool):
-                        out, err = proc.communicate(timeout=None)
+                if capture is not None:
+                    capture.start(proc, new_process_group)
+                try:
+                    if stdout and isinstance(stdout, bool):
+                        out, err = proc.communicate(timeout=timeout)
                         if check and proc.returncode != 0:
                             raise NonZeroExitCode(proc.args, proc.returncode)
                         if err:
                             print(err, file=stderr)
                         return out.strip()
-                    log.info("Standard output is logged to: %s", stdout)
-                else:
-                    proc.wait()
+                    if stdout:
+                        log.info("Standard output is logged to: %s", stdout)
+                    proc.wait(timeout=timeout)
+                except subprocess.TimeoutExpired:
+                    assert timeout is not None
+                    log.critical(
+                        "%s[%d] timed out after %.0f seconds",
+                        executable,
+                        proc.pid,
+                        timeout,
+                    )
+                    _kill_process_group(proc, new_process_group)
+                    raise ToolTimeout(proc.args, timeout) from None
+                except KeyboardInterrupt:
+                    _kill_process_group(proc, new_process_group)
+                    raise
+                finally:
+                    if capture is not None:
+                        capture.join(TERMINATE_GRACE_PERIOD)
         except FileNotFoundError as e:
             path = env["PATH"] if env and "PATH" in env else os.environ.get("PATH", "")
             raise ExecutableNotFound(e.filename, tool_name, path, *e.args) from None
+    if capture is not None and capture.error is not None:
+        raise capture.error
     if check and proc.returncode != 0:
+        if capture is not None and not capture.echo:
+            log.error(
+                "Last lines of %s output:\n%s", executable, "\n".join(capture.tail)
+            )
         raise NonZeroExitCode(proc.args, proc.returncode)
     return None
 
@@ -273,7 +801,9 @@ class Tool(XedaBaseModeAllowExtra):
     remote: Optional[RemoteSettings] = Field(None, hidden_from_schema=True)
     docker: Optional[Docker] = Field(None, hidden_from_schema=True)
     log_stdout: bool = Field(
-        False, description="Log stdout to a file", hidden_from_schema=True
+        False,
+        description="Log the output of the tool to <executable>_stdout.log",
+        hidden_from_schema=True,
     )
     log_stderr: bool = Field(
         False, description="Log stderr to a file", hidden_from_schema=True
@@ -281,6 +811,11 @@ class Tool(XedaBaseModeAllowExtra):
     bin_path: str = Field(
         None, description="Path to the tool binary", hidden_from_schema=True
     )
+    interactive: bool = Field(
+        False,
+        description="Tool interacts with the user through the terminal, so it should not run in a separate process group",
+        hidden_from_schema=True,
+    )
 
     def __init__(self, executable: Optional[str] = None, **kwargs):
         if executable:
@@ -301,12 +836,15 @@ class Tool(XedaBaseModeAllowExtra):
 
     @property  # pydantic can't handle cached_property as private
     def info(self) -> Dict[str, str]:
-        inf = self._info
+        inf = dict(self._cached_probe("info", lambda: self._info))
         inf["version"] = ".".join(self.version)
         return inf
 
     @cached_property
     def _version(self) -> Tuple[str, ...]:
+        return tuple(self._cached_probe("version", self._probe_version))
+
+    def _probe_version(self) -> Tuple[str, ...]:
         out = self.run_get_stdout(
             "--version",
         )
@@ -315,6 +853,68 @@ class Tool(XedaBaseModeAllowExtra):
         version_string = so[1] if len(so) > 1 else so[0] if len(so) > 0 else ""
         return tuple(version_string.split("."))
 
+    def _probe_key(self, probe: str) -> Optional[Dict[str, Any]]:
+        """
+        Identifies the result of `probe` in the ToolInfoCache: the tool class, its arguments, and the
+        path, mtime, inode and size of the executable or the ID of the docker image.
+        None if the tool can't be identified and should not be cached.
+        """
+        if self.remote and self.remote.enabled:
+            return None
+        key: Dict[str, Any] = dict(
+            tool=f"{type(self).__module__}.{type(self).__qualname__}",
+            probe=probe,
+            executable=self.executable,
+            default_args=self.default_args,
+        )
+        if self.docker and self.docker.enabled:
+            image_id = self.docker.image_id
+            if not image_id:
+                return None
+            key["docker"] = dict(
+                image=f"{self.docker.image}:{self.docker.tag}",
+                id=image_id,
+                command=self.docker.command,
+            )
+        else:
+            path = shutil.which(self.executable)
+            if not path:
+                return None
+            path = os.path.realpath(path)
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+            key["binary"] = dict(
+                path=path, mtime_ns=st.st_mtime_ns, inode=st.st_ino, size=st.st_size
+            )
+        return key
+
+    def _cached_probe(self, probe: str, fn: Callable[[], Any]) -> Any:
+        """return fn(), which queries the tool (e.g. its version), through the persistent ToolInfoCache"""
+        cache = ToolInfoCache.default()
+        key = self._probe_key(probe) if cache else None
+        if cache and key:
+            value = cache.get(key)
+            if value is not None:
+                log.debug("%s %s (cached): %s", self.executable, probe, value)
+                return value
+        value = fn()
+        if cache and key:
+            cache.put(key, value)
+        return value
+
+    def invalidate_cached_info(self) -> None:
+        """forget cached version and info of this tool, in this instance and in the ToolInfoCache"""
+        cache = ToolInfoCache.default()
+        if cache:
+            for probe in ("version", "info"):
+                key = self._probe_key(probe)
+                if key:
+                    cache.invalidate(key)
+        for attr in ("_version", "_info"):
+            self.__dict__.pop(attr, None)
+
     @property
     def version(self) -> Tuple[str, ...]:
         return self._version
@@ -348,6 +948,7 @@ class Tool(XedaBaseModeAllowExtra):
         stdout: OptionalBoolOrPath = None,
         check: bool = True,
         cwd: OptionalPath = None,
+        capture: Optional[OutputCapture] = None,
     ):
         return run_process(
             self.executable,
@@ -357,6 +958,8 @@ class Tool(XedaBaseModeAllowExtra):
             check=check,
             cwd=cwd,
             tool_name=self.__class__.__name__,
+            new_process_group=not self.interactive,
+            capture=capture,
         )
 
     def _run_system(
@@ -366,11 +969,14 @@ class Tool(XedaBaseModeAllowExtra):
         env: Optional[Dict[str, Any]] = None,
         cwd: OptionalPath = None,
         check: bool = True,
+        capture: Optional[OutputCapture] = None,
     ) -> Union[None, str]:
         """Run the tool if locally installed on the system and available on the current user's PATH"""
         if env is not None:
             env = {**os.environ, **env}
-        return self._run_process(args, env=env, stdout=stdout, check=check, cwd=cwd)
+        return self._run_process(
+            args, env=env, stdout=stdout, check=check, cwd=cwd, capture=capture
+        )
 
     def _run_remote(
         self,
@@ -453,18 +1059,42 @@ class Tool(XedaBaseModeAllowExtra):
         env: Optional[Dict[str, Any]] = None,
         stdout: OptionalBoolOrPath = None,
         check: bool = True,
+        capture: Optional[OutputCapture] = None,
+        cwd: OptionalPath = None,
     ) -> Union[None, str]:
         if self.default_args:
             args = tuple(unique(self.default_args + list(args)))
         if self.remote and self.remote.enabled:
-            self._run_remote(*args, env=env, stdout=stdout, check=check)
+            self._run_remote(*args, env=env, stdout=stdout, check=check, cwd=cwd)
             return None
         if self.docker and self.docker.enabled:
-            return self.docker.run(*args, env=env, stdout=stdout, check=check)
-        return self._run_system(*args, env=env, stdout=stdout, check=check)
+            return self.docker.run(
+                *args,
+                env=env,
+                stdout=stdout,
+                check=check,
+                capture=capture,
+                root_dir=cwd,
+            )
+        return self._run_system(
+            *args, env=env, stdout=stdout, check=check, capture=capture, cwd=cwd
+        )
 
-    def run(self, *args: Any, env: Optional[Dict[str, Any]] = None) -> None:
-        self._run(*args, env=env, stdout=None)
+    def run(
+        self,
+        *args: Any,
+        env: Optional[Dict[str, Any]] = None,
+        capture: Optional[OutputCapture] = None,
+        cwd: OptionalPath = None,
+    ) -> None:
+        """
+        Run the tool, in `cwd` if specified. Its output is streamed through `capture`, if specified,
+        or otherwise, if `log_stdout` is set, to `<executable>_stdout.log` (and the console).
+        """
+        if capture is None and self.log_stdout:
+            log_file = Path(cwd or ".") / f"{Path(self.executable).name}_stdout.log"
+            capture = OutputCapture(log_file)
+        self._run(*args, env=env, stdout=None, capture=capture, cwd=cwd)
 
     def run_get_stdout(self, *args: Any, env: Optional[Dict[str, Any]] = None) -> str:
         out = self._run(*args, env=env, stdout=True)
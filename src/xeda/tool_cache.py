@@ -0,0 +1,100 @@
+"""Persistent cache of tool version/info probes, shared by all xeda processes of a user"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+__all__ = [
+    "ToolInfoCache",
+    "TOOL_INFO_CACHE_ENV",
+]
+
+log = logging.getLogger(__name__)
+
+# path of the cache directory, or one of DISABLED_VALUES to disable the cache
+TOOL_INFO_CACHE_ENV = "XEDA_TOOL_INFO_CACHE"
+DISABLED_VALUES = ("", "0", "off", "no", "false", "none")
+
+
+def _default_root() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "xeda" / "tool_info"
+
+
+class ToolInfoCache:
+    """
+    JSON files under <root>/<digest[:2]>/<digest>.json, where digest is the hash of a key describing
+    the probe and the identity of the tool binary (path, mtime, inode, size) or docker image (digest).
+    Entries are written atomically, so concurrent processes can share the cache.
+    """
+
+    _instances: Dict[Path, "ToolInfoCache"] = {}
+
+    def __init__(self, root: Union[str, os.PathLike]) -> None:
+        self.root = Path(root)
+        self._mem: Dict[str, Any] = {}
+
+    @classmethod
+    def default(cls) -> Optional["ToolInfoCache"]:
+        """shared instance, as specified by the XEDA_TOOL_INFO_CACHE environment variable"""
+        value = os.environ.get(TOOL_INFO_CACHE_ENV)
+        if value is not None and value.strip().lower() in DISABLED_VALUES:
+            return None
+        root = Path(value).expanduser() if value else _default_root()
+        if root not in cls._instances:
+            cls._instances[root] = cls(root)
+        return cls._instances[root]
+
+    @staticmethod
+    def digest(key: Dict[str, Any]) -> str:
+        return hashlib.sha256(
+            json.dumps(key, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.json"
+
+    def get(self, key: Dict[str, Any]) -> Optional[Any]:
+        digest = self.digest(key)
+        if digest in self._mem:
+            return self._mem[digest]
+        try:
+            with open(self._path(digest)) as f:
+                value = json.load(f)["value"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log.debug("Ignoring invalid tool info cache entry %s: %s", digest, e)
+            return None
+        self._mem[digest] = value
+        return value
+
+    def put(self, key: Dict[str, Any], value: Any) -> None:
+        digest = self.digest(key)
+        self._mem[digest] = value
+        path = self._path(digest)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=f".{digest}.", dir=path.parent)
+            with os.fdopen(fd, "w") as f:
+                json.dump(dict(key=key, value=value), f, default=str)
+            os.replace(tmp, path)
+        except OSError as e:
+            log.debug("Failed to write tool info cache entry %s: %s", path, e)
+
+    def invalidate(self, key: Dict[str, Any]) -> None:
+        digest = self.digest(key)
+        self._mem.pop(digest, None)
+        try:
+            self._path(digest).unlink()
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        """remove all entries"""
+        self._mem.clear()
+        shutil.rmtree(self.root, ignore_errors=True)
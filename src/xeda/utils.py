@@ -23,9 +23,6 @@ from typing import (
     Union,
 )
 
-from typeguard.importhook import install_import_hook
-
-
 from varname import argname
 
 from .dataclass import XedaBaseModel
@@ -36,9 +33,6 @@ except ModuleNotFoundError:
     # python_version < "3.11":
     import tomli as tomllib  # type: ignore
 
-
-install_import_hook("xeda")
-
 __all__ = [
     "SDF",
     # utility functions
@@ -47,6 +41,9 @@ __all__ = [
     "cached_property",
     "unique",
     "WorkingDirectory",
+    "typecheck_enabled",
+    "enable_typecheck",
+    "typechecked",
 ]
 
 log = logging.getLogger(__name__)
@@ -54,6 +51,44 @@ log = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
+# Runtime type checking of xeda functions (typeguard) is slow and therefore opt-in
+TYPECHECK_ENV = "XEDA_TYPECHECK"
+
+_typecheck_hook: Any = None
+
+
+def typecheck_enabled() -> bool:
+    return os.environ.get(TYPECHECK_ENV, "").strip().lower() in (
+        "1",
+        "on",
+        "yes",
+        "true",
+    )
+
+
+def enable_typecheck() -> None:
+    """Install typeguard's import hook. Only xeda modules imported afterwards are instrumented.
+    Also sets XEDA_TYPECHECK, so that child processes are type-checked from their start."""
+    global _typecheck_hook  # pylint: disable=global-statement
+    os.environ[TYPECHECK_ENV] = "1"
+    if _typecheck_hook is None:
+        from typeguard.importhook import install_import_hook
+
+        _typecheck_hook = install_import_hook("xeda")
+
+
+def typechecked(obj: T) -> T:
+    """typeguard's @typechecked if runtime type checking is enabled, otherwise a no-op"""
+    if not typecheck_enabled():
+        return obj
+    from typeguard import typechecked as _typechecked
+
+    return _typechecked(obj)
+
+
+if typecheck_enabled():
+    enable_typecheck()
+
 
 class WorkingDirectory(AbstractContextManager):
     def __init__(self, wd: Union[None, str, os.PathLike]):
@@ -123,9 +158,11 @@ def backup_existing(path: Path) -> Optional[Path]:
     suffix = (
         f'.backup_{datetime.fromtimestamp(modifiedTime).strftime("%Y-%m-%d-%H%M%S")}'
     )
-    if path.suffix:
-        suffix += path.suffix
-    backup_path = path.with_suffix(suffix)
+    backup_path = path.with_suffix(suffix + path.suffix)
+    i = 1
+    while backup_path.exists():  # more than one backup in the same second
+        backup_path = path.with_suffix(f"{suffix}_{i}{path.suffix}")
+        i += 1
     typ = "file" if path.is_file() else "directory" if path.is_dir() else "???"
     log.warning(
         "Renaming existing %s from '%s' to '%s'", typ, path.name, backup_path.name
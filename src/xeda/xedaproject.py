@@ -5,8 +5,6 @@ import os
 from pathlib import Path
 from typing import Dict, List, Optional, Union
 
-import yaml
-
 from .dataclass import XedaBaseModel
 from .design import Design
 from .utils import WorkingDirectory, toml_load
@@ -31,6 +29,8 @@ class XedaProject(XedaBaseModel):
                 if ext == ".json":
                     data = json.load(f)
                 elif ext == ".yaml":
+                    import yaml  # pylint: disable=import-outside-toplevel
+
                     data = yaml.safe_load(f)
                 else:
                     raise ValueError(
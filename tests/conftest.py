@@ -0,0 +1,12 @@
+import pytest
+
+from xeda.file_hash_index import FILE_HASH_INDEX_ENV
+from xeda.tool_cache import TOOL_INFO_CACHE_ENV
+
+
+@pytest.fixture(autouse=True)
+def xdg_cache_home(monkeypatch, tmp_path):
+    """keep the tool info cache and file hash index of each test in its own directory, instead of ~/.cache/xeda"""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.delenv(TOOL_INFO_CACHE_ENV, raising=False)
+    monkeypatch.delenv(FILE_HASH_INDEX_ENV, raising=False)
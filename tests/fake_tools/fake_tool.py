@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 
 import inspect
+import json
 import logging
 import os
+import re
+import sys
 from pathlib import Path
 from time import sleep
 from typing import (
@@ -24,6 +27,36 @@ log = logging.getLogger()
 
 RESOURCE_DIR = Path(__file__).parent.absolute() / "resource"
 
+INCREMENTAL_SYNTH_SUMMARY = """
+Incremental Synthesis Report Summary:
+
+1. Incremental synthesis run: yes
+
+   Reference Checkpoint Information
+"""
+
+INCREMENTAL_REUSE_RPT = """Incremental Implementation Information
+
+1. Reuse Summary
+----------------
+
++-------+----------------------+--------------------+--------------------+-------+
+|  Type | Matched % (of Total) | Reuse % (of Total) | Fixed % (of Total) | Total |
++-------+----------------------+--------------------+--------------------+-------+
+| Cells |                95.73 |              93.60 |               0.00 |  4567 |
+| Nets  |                96.18 |              90.11 |               0.00 |  5678 |
+| Pins  |                    - |              89.47 |                  - | 23456 |
+| Ports |               100.00 |             100.00 |             100.00 |    30 |
++-------+----------------------+--------------------+--------------------+-------+
+
+2. Reference Checkpoint Information
+-----------------------------------
+
++----------------+-------+
+| DCP Location:  | x.dcp |
++----------------+-------+
+"""
+
 
 def write_file(path, data):
     path.parent.mkdir(parents=True, exist_ok=True)
@@ -122,14 +155,115 @@ class FakeVivado(FakeTool):
         print("cwd =", Path.cwd())
         tcl = kwargs.get("source")
         if tcl:
-            sleep(0.3)
-            with ZipFile(RESOURCE_DIR / "fake_vivado_reports") as zf:
-                for file in zf.namelist():
-                    if os.path.isdir(file):
-                        continue
-                    with zf.open(file) as rf:
-                        data = rf.read()
-                        write_file(Path("reports") / "route_design" / file, data)
+            sys.exit(self.source(tcl))
+        elif kwargs.get("mode") == "tcl":
+            self.session()
+
+    @staticmethod
+    def source(tcl) -> int:
+        """fake run of the script, which can ask for an exit code with a `# fake: exit N` line"""
+        print("pid =", os.getpid())
+        sleep(0.3)
+        with ZipFile(RESOURCE_DIR / "fake_vivado_reports") as zf:
+            for file in zf.namelist():
+                if os.path.isdir(file):
+                    continue
+                with zf.open(file) as rf:
+                    data = rf.read()
+                    write_file(Path("reports") / "route_design" / file, data)
+        script = Path(tcl).read_text()
+        top = re.search(r"^set_property top (\S+)", script, re.MULTILINE)
+        if top:
+            runs = Path(f"{top[1]}.runs")
+            write_file(runs / "impl_1" / f"{top[1]}_routed.dcp", b"fake routed")
+            write_file(runs / "synth_1" / f"{top[1]}.dcp", b"fake synthesized")
+            if re.search(r"incremental_checkpoint .* \[get_runs synth_1\]", script):
+                write_file(runs / "synth_1" / "runme.log", INCREMENTAL_SYNTH_SUMMARY)
+        if re.search(r"incremental_checkpoint .* \[get_runs impl_1\]", script):
+            write_file(
+                Path("reports") / "route_design" / "incremental_reuse.rpt",
+                INCREMENTAL_REUSE_RPT,
+            )
+        if "write_checkpoint -force ${checkpoints_dir}/synth_design" in script:
+            write_file(Path("checkpoints") / "synth_design.dcp", b"fake synthesized")
+        if "read_checkpoint -incremental" in script:
+            print(INCREMENTAL_SYNTH_SUMMARY)
+            with open("vivado.log", "a") as f:
+                f.write(INCREMENTAL_SYNTH_SUMMARY)
+        # FAKE_VIVADO_WNS: {route_design directive: [estimated WNS, ...]} reported 0.2s apart, the last one is final
+        route = re.search(
+            r"^eval route_design .*-directive (\w+)", script, re.MULTILINE
+        )
+        wns_list = json.loads(os.environ.get("FAKE_VIVADO_WNS", "{}")).get(
+            route[1] if route else None
+        )
+        for wns in wns_list or []:
+            print(
+                f"Phase 4.1 Global Iteration 0 | Checksum: 0 | WNS={wns:.3f} |",
+                flush=True,
+            )
+            sleep(0.2)
+        if wns_list:
+            print(f"Final timing slack: {wns_list[-1]:.3f} ns", flush=True)
+        m = re.search(r"^# fake: exit (\d+)$", script, re.MULTILINE)
+        return int(m.group(1)) if m else 0
+
+    def session(self) -> None:
+        """serve ::xeda::run_script commands of a persistent session, and ignore anything else"""
+        run_script = re.compile(r"^::xeda::run_script (\w+) \{(.*)\} \{(.*)\} \d$")
+        for line in sys.stdin:
+            if line.startswith("::xeda::exit"):
+                return
+            m = run_script.match(line.strip())
+            if m:
+                token, cwd, script = m.groups()
+                print(f"@@xeda:begin:{token}", flush=True)
+                os.chdir(cwd)
+                if os.environ.get("FAKE_VIVADO_SESSION_CRASH"):
+                    sys.exit(3)
+                rc = self.source(script)
+                print(f"@@xeda:end:{token}:{rc}", flush=True)
+
+
+class FakeQuartusDse(FakeTool):
+    options = {"--use-dse-file": dict(type=click.Path(exists=True), required=True)}
+    arguments = {"project": dict(required=True)}
+
+    def execute(self, **kwargs):
+        """report the points of a seed sweep one by one, as they complete"""
+        dse = dict(
+            line.split("=", 1)
+            for line in Path(kwargs["use_dse_file"]).read_text().splitlines()
+            if "=" in line and not line.startswith("#")
+        )
+        period = re.search(r"-period ([\d.]+)", Path("clock.sdc").read_text())
+        # FAKE_QUARTUS_DSE_FMAX: [Fmax (MHz) of seed 1, ...]
+        fmax_list = json.loads(os.environ.get("FAKE_QUARTUS_DSE_FMAX", "[]"))
+        report = Path(dse["report_filename"])
+        points: List[Dict[str, Any]] = []
+        for seed in range(1, int(dse["num_seeds"]) + 1):
+            sleep(0.1)
+            point: Dict[str, Any] = {"Point": f"dse{seed}", "Seed": seed}
+            if seed <= len(fmax_list):
+                fmax = fmax_list[seed - 1]
+                point["Status"] = "Completed"
+                point["Slow 1200mV 85C Model Fmax (clock)"] = f"{fmax:.2f} MHz"
+                if period:
+                    point["Worst-case Setup Slack"] = round(
+                        float(period[1]) - 1000.0 / fmax, 3
+                    )
+            else:
+                point["Status"] = "Failed"
+            points.append(point)
+            write_file(report.with_suffix(".tmp"), json.dumps({"points": points}))
+            os.replace(report.with_suffix(".tmp"), report)
+            print(f"Point dse{seed}: {point['Status']}", flush=True)
+            if (
+                dse.get("stop_after_timing_met") == "True"
+                and point.get("Worst-case Setup Slack", -1) >= 0
+            ):
+                break
+        return 0
 
 
 fake_tools: Dict[str, FakeTool] = dict(
@@ -142,6 +276,7 @@ fake_tools: Dict[str, FakeTool] = dict(
             "reports/Timing_Analyzer/Multicorner_Timing_Analysis_Summary.csv",
         ),
     ),
+    quartus_dse=FakeQuartusDse(),  # type: ignore
     xtclsh=FakeTool(
         arguments={"script": dict(required=False, type=click.Path(exists=True))}
     ),
@@ -0,0 +1,96 @@
+"""test switching activity analysis of VCD dumps"""
+import gzip
+import io
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from xeda.activity import ActivityAnalyzer, analyze_vcd
+
+VCD = b"""$date today $end
+$timescale 1 ns $end
+$scope module tb $end
+$var wire 1 ! clk $end
+$var real 64 # r $end
+$scope module uut $end
+$var wire 4 " d [3:0] $end
+$var wire 1 ! clk_alias $end
+$upscope $end
+$upscope $end
+$enddefinitions $end
+#0
+$dumpvars
+0!
+bx "
+r0.5 #
+$end
+#5
+1!
+#10
+0!
+b101 "
+$comment b0 " $end
+#15
+1!
+#20
+0!
+b110 "
+b111 "
+r1.5 #
+#30
+b110 "
+"""
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1 << 20])
+def test_activity(chunk_size):
+    analyzer = ActivityAnalyzer(chunk_size=chunk_size)
+    analyzer.BLOCK_SIZE = 7  # split tokens across blocks
+    report = analyzer.analyze(io.BytesIO(VCD), duration=40)
+    assert report.timescale == "1 ns" and report.duration == 40
+    assert report.bit("tb.clk") == dict(T0=30, T1=10, TX=0, TC=4, IG=0)
+    assert report.bit("tb.uut.clk_alias") == report.bit("tb.clk")
+    # 1 -> 0 -> 1 at 20 is a glitch
+    assert report.bit("tb.uut.d[0]") == dict(T0=10, T1=20, TX=10, TC=3, IG=1)
+    assert report.bit("tb.uut.d[1]") == dict(T0=10, T1=20, TX=10, TC=1, IG=0)
+    assert report.bit("tb.uut.d[2]") == dict(T0=0, T1=30, TX=10, TC=0, IG=0)
+    assert report.bit("tb.uut.d[3]") == dict(T0=30, T1=0, TX=10, TC=0, IG=0)
+    with pytest.raises(KeyError):
+        report.bit("tb.r")
+    signals = report.signals(per_bit=True)
+    assert set(signals) == {"tb.clk", "tb.uut.d", "tb.uut.clk_alias"}
+    d = signals["tb.uut.d"]
+    assert d["width"] == 4 and d["TC"] == 4 and d["TX"] == 40
+    assert d["toggle_rate"] == 4 / (4 * 40)
+    assert d["bits"]["d[0]"]["IG"] == 1
+
+
+def test_activity_scope_and_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        vcd_gz = Path(tmp) / "dump.vcd.gz"
+        with gzip.open(vcd_gz, "wb") as f:
+            f.write(VCD)
+        report = analyze_vcd(vcd_gz, scope="tb.uut")
+        assert report.duration == 30
+        assert set(report.signals()) == {"tb.uut.d", "tb.uut.clk_alias"}
+        assert report.totals()["TC"] == 4 + 4
+
+        saif = Path(tmp) / "activity.saif"
+        report.write_saif(saif)
+        content = saif.read_text()
+        assert content.count("(") == content.count(")")
+        assert "(TIMESCALE 1 ns)" in content and "(DURATION 30)" in content
+        assert "(INSTANCE tb\n  (INSTANCE uut\n" in content
+        assert (
+            "(d\\[0\\]\n        (T0 0) (T1 20) (TX 10)\n        (TC 3) (IG 1)"
+            in content
+        )
+
+        activity_json = Path(tmp) / "activity.json"
+        report.write_json(activity_json)
+        with open(activity_json) as f:
+            data = json.load(f)
+        assert data["totals"] == report.totals()
+        assert data["signals"]["tb.uut.d"]["T1"] == 20 + 10 + 20
@@ -0,0 +1,153 @@
+"""test batch runs of several designs and flows"""
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from xeda import Design
+from xeda.cli import cli
+from xeda.flow_runner import DefaultRunner
+from xeda.flow_runner.batch import Batch, select_designs
+from xeda.flows.flow import Flow
+from xeda.xedaproject import XedaProject
+
+TESTS_DIR = Path(__file__).parent.absolute()
+EXAMPLES_DIR = TESTS_DIR.parent / "examples"
+
+
+class BatchTestFlow(Flow):
+    """Test flow which takes some time and fails on request"""
+
+    class Settings(Flow.Settings):
+        fail: bool = False
+
+    def run(self) -> None:
+        assert isinstance(self.settings, self.Settings)
+        self.results.start = time.time()
+        time.sleep(0.3)
+        self.results.end = time.time()
+        self.results.score = len(self.design.name)
+
+    def parse_reports(self) -> bool:
+        assert isinstance(self.settings, self.Settings)
+        return not self.settings.fail
+
+
+class BatchInitErrorFlow(Flow):
+    """Test flow which can't be initialized"""
+
+    def init(self) -> None:
+        raise ValueError("no way")
+
+    def run(self) -> None:
+        pass
+
+
+def test_select_designs() -> None:
+    project = XedaProject.from_file(EXAMPLES_DIR / "vhdl" / "xedaproject.toml")
+    sqrt = Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+    designs = [*project.designs, sqrt]
+    assert select_designs(designs, []) == designs
+    assert select_designs(designs, ["sq*"]) == [sqrt]
+    assert select_designs(designs, ["*add*", "sqrt"]) == designs
+    assert select_designs(designs, ["nothing"]) == []
+
+
+def test_batch() -> None:
+    project = XedaProject.from_file(EXAMPLES_DIR / "vhdl" / "xedaproject.toml")
+    sqrt = Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+    designs = [*project.designs, sqrt]
+    with tempfile.TemporaryDirectory() as run_dir:
+        runner = DefaultRunner(
+            run_dir, display_results=False, max_cpus=4, max_memory_gb=3
+        )
+        batch = Batch(
+            runner,
+            designs,
+            [BatchTestFlow, BatchInitErrorFlow],
+            {BatchTestFlow.name: {"memory_gb": 2}},
+            metrics=["score"],
+        )
+        jobs = batch.run()
+        assert [(j.design.name, j.flow_class, j.status) for j in jobs] == [
+            ("full-adder", BatchTestFlow, "OK"),
+            ("full-adder", BatchInitErrorFlow, "ERROR"),
+            ("sqrt", BatchTestFlow, "OK"),
+            ("sqrt", BatchInitErrorFlow, "ERROR"),
+        ]
+        assert jobs[1].error == "no way"
+        assert jobs[2].flow and jobs[2].flow.results.score == len("sqrt")
+        assert all(j.settings["nthreads"] == 1 for j in jobs)
+        assert batch.exit_code == 1
+        # the memory budget does not allow both flows to run at the same time
+        first, second = sorted(
+            (j.flow for j in jobs if j.flow), key=lambda f: f.results.start
+        )
+        assert second.results.start >= first.results.end
+        table = batch.results_table()
+        assert [c.header for c in table.columns] == [
+            "Design",
+            "Flow",
+            "Status",
+            "score",
+            "runtime",
+        ]
+
+        runner = DefaultRunner(run_dir, display_results=False, max_cpus=2)
+        batch = Batch(
+            runner, designs, [BatchTestFlow], {BatchTestFlow.name: {"fail": True}}
+        )
+        batch.run()
+        assert [j.status for j in batch.jobs] == ["FAILED", "FAILED"]
+        # running concurrently, each with 1 of the 2 CPUs
+        a, b = (j.flow for j in batch.jobs)
+        assert a and b
+        assert a.results.start < b.results.end and b.results.start < a.results.end
+
+
+def test_cli_batch(monkeypatch) -> None:
+    monkeypatch.setenv(
+        "PATH", os.environ["PATH"] + os.pathsep + str(TESTS_DIR / "fake_tools")
+    )
+    with tempfile.TemporaryDirectory() as run_dir:
+        result = CliRunner().invoke(
+            cli,
+            [
+                "batch",
+                "vivado_synth",
+                "--xedaproject",
+                str(EXAMPLES_DIR / "vhdl" / "xedaproject.toml"),
+                "--design",
+                "full-*",
+                "--xeda-run-dir",
+                run_dir,
+                "--settings",
+                "vivado_synth.clock_period=4.5",
+                "--metric",
+                "lut",
+            ],
+        )
+        assert result.exit_code == 0, result.output
+        assert "1 of 1 succeeded" in result.output
+        assert "4123" in result.output
+        settings = (
+            Path(run_dir) / "full-adder" / "vivado_synth" / "settings.json"
+        ).read_text()
+        assert '"clock_period": 4.5' in settings
+
+        result = CliRunner().invoke(
+            cli,
+            [
+                "batch",
+                "vivado_synth",
+                "--xedaproject",
+                str(EXAMPLES_DIR / "vhdl" / "xedaproject.toml"),
+                "--design",
+                "none",
+                "--xeda-run-dir",
+                run_dir,
+            ],
+        )
+        assert result.exit_code == 2
@@ -1,5 +1,13 @@
+import os
+import subprocess
+import sys
+
 from click.testing import CliRunner
+
+import xeda.flows
 from xeda.cli import cli
+from xeda.flows import FLOW_MANIFEST, load_flow_class
+from xeda.flows.flow import registered_flows
 
 flows = ["ghdl_sim", "nextpnr", "vivado_sim", "vivado_synth"]
 
@@ -11,6 +19,27 @@ def test_cli_run_help():
     assert "Usage: " in result.output
 
 
+def test_cli_dse_help():
+    runner = CliRunner()
+    result = runner.invoke(cli, ["dse", "--help"])
+    assert result.exit_code == 0
+    assert "--explore" in result.output
+
+
+def test_cli_help_envvars():
+    runner = CliRunner()
+    result = runner.invoke(cli, ["--help"])
+    assert result.exit_code == 0
+    assert "XEDA_TYPECHECK" in result.output
+    result = runner.invoke(cli, ["batch", "--help"], terminal_width=200)
+    assert result.exit_code == 0
+    assert "env var: XEDA_MAX_CPUS" in result.output
+    assert "env var: XEDA_MAX_MEMORY" in result.output
+    result = runner.invoke(cli, ["dse", "--help"], terminal_width=200)
+    assert result.exit_code == 0
+    assert "env var: XEDA_MAX_CPUS" in result.output
+
+
 def test_cli_list_flows():
     runner = CliRunner()
     result = runner.invoke(cli, ["list-flows"])
@@ -25,3 +54,42 @@ def test_cli_list_settings():
         result = runner.invoke(cli, ["list-settings", flow_name])
         assert result.exit_code == 0
         # assert result.output.count("Usage: run") > 0
+
+
+def test_cli_startup_does_not_import_flows():
+    """guards the start-up time of the CLI, see benchmarks/startup.py"""
+    code = "import sys, xeda.cli; print('\\n'.join(sys.modules))"
+    out = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    modules = set(out.split())
+    eager = {m for m in modules if m.startswith("xeda.flows.")}
+    assert eager <= {"xeda.flows.flow", "xeda.flows.cocotb"}
+    assert not modules & {"junitparser", "vcd"}
+
+
+def test_flow_manifest():
+    for name, entry in FLOW_MANIFEST.items():
+        module_name, class_name = entry.split(":")
+        flow_class = load_flow_class(name)
+        assert flow_class is not None
+        assert flow_class.name == name
+        assert (flow_class.__module__, flow_class.__name__) == (module_name, class_name)
+        assert getattr(xeda.flows, class_name) is flow_class
+    # all flows defined in xeda modules need to be in the manifest
+    for name, (module_name, _) in registered_flows.items():
+        if module_name.startswith("xeda."):
+            assert name in FLOW_MANIFEST
+
+
+def test_typecheck_opt_in():
+    code = "import sys, xeda.cli; print('typeguard.importhook' in sys.modules)"
+    for env, expected in (("0", "False"), ("1", "True")):
+        out = subprocess.run(
+            [sys.executable, "-c", code],
+            check=True,
+            capture_output=True,
+            text=True,
+            env={**os.environ, "XEDA_TYPECHECK": env},
+        ).stdout
+        assert out.strip() == expected
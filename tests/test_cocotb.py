@@ -1,7 +1,12 @@
+import sys
+import tempfile
 from pathlib import Path
 from typing import Any, Dict
 
-from xeda.flows.flow import Cocotb
+from xeda import Design
+from xeda.flow_runner import DefaultRunner
+from xeda.flows.flow import Cocotb, SimFlow
+from xeda.tool import Tool
 from xeda.utils import WorkingDirectory
 
 TESTS_DIR = Path(__file__).parent.absolute()
@@ -41,6 +46,118 @@ def test_cocotb_parse_xml():
             raise AssertionError()
 
 
+# stands in for a simulator running a cocotb testbench
+FAKE_SIM = """
+import os
+seed = os.environ["RANDOM_SEED"]
+cases = "".join(
+    f'<testcase name="{t}" classname="{seed}" time="0.1">'
+    + ('<failure message="failed"/>' if "fail" in t else "")
+    + "</testcase>"
+    for t in os.environ["TESTCASE"].split(",")
+)
+with open(os.environ["COCOTB_RESULTS_FILE"], "w") as f:
+    f.write(f'<testsuites><testsuite name="all">{cases}</testsuite></testsuites>')
+"""
+
+TB = """
+import cocotb
+from cocolight import cocotest
+
+@cocotb.test()
+async def test_a(dut):
+    pass
+
+@cocotest
+async def test_fail(dut):
+    pass
+
+@cocotb.test
+async def test_c(dut):
+    pass
+
+async def helper(dut):
+    pass
+
+def test_not_a_test():
+    pass
+"""
+
+
+class ShardedSim(SimFlow):
+    """runs FAKE_SIM as the simulator"""
+
+    cocotb_sim_name = "dummy"
+
+    def run(self) -> None:
+        Path("sim.py").write_text(FAKE_SIM)
+        self.run_sim(Tool(sys.executable), "sim.py")
+
+    def parse_reports(self) -> bool:
+        assert self.cocotb
+        return self.cocotb.add_results(self.results)
+
+
+def _design(tmp: Path) -> Design:
+    (tmp / "top.vhd").write_text("entity top is end;")
+    (tmp / "tb_top.py").write_text(TB)
+    return Design(
+        name="top",
+        rtl=dict(sources=[str(tmp / "top.vhd")], top="top"),
+        tb=dict(sources=[str(tmp / "tb_top.py")], cocotb=True, top="top"),
+    )
+
+
+def test_cocotb_discover_testcases():
+    with tempfile.TemporaryDirectory() as tmp:
+        tb = Path(tmp) / "tb.py"
+        tb.write_text(TB)
+        assert Cocotb.discover_testcases(tb) == ["test_a", "test_fail", "test_c"]
+        tb.write_text(TB + "\nfactory = TestFactory(test_a)\n")
+        assert Cocotb.discover_testcases(tb) is None
+        tb.write_text("def (")
+        assert Cocotb.discover_testcases(tb) is None
+
+
+def test_cocotb_shard_envs():
+    with tempfile.TemporaryDirectory() as tmp:
+        design = _design(Path(tmp))
+        cocotb = Cocotb(sim_name="dummy", random_seed=7)  # type: ignore
+        assert not cocotb.shard_envs(design)
+        cocotb = Cocotb(sim_name="dummy", random_seed=7, shards=2)  # type: ignore
+        envs = cocotb.shard_envs(design)
+        assert [(e["TESTCASE"], e["RANDOM_SEED"]) for e in envs] == [
+            ("test_a,test_c", 7),
+            ("test_fail", 8),
+        ]
+        assert [e["COCOTB_RESULTS_FILE"] for e in envs] == [
+            "results.shard0.xml",
+            "results.shard1.xml",
+        ]
+        assert all(e["MODULE"] == "tb_top" for e in envs)
+        cocotb = Cocotb(sim_name="dummy", shards=4, testcase="x,y")  # type: ignore
+        assert [e["TESTCASE"] for e in cocotb.shard_envs(design)] == ["x", "y"]
+
+
+def test_cocotb_sharded_sim():
+    with tempfile.TemporaryDirectory() as tmp:
+        design = _design(Path(tmp))
+        runner = DefaultRunner(Path(tmp) / "run", display_results=False)
+        flow = runner.run_flow(
+            ShardedSim,
+            design,
+            {"nthreads": 2, "cocotb": {"shards": 3, "random_seed": 100}},
+        )
+        assert not flow.succeeded
+        assert flow.results["cocotb.tests"] == 3
+        assert flow.results["cocotb.failures"] == 1
+        assert flow.cocotb
+        with WorkingDirectory(flow.run_path):
+            seeds = {tc["name"]: tc["classname"] for tc in flow.cocotb.result_testcases}
+        assert seeds == {"test_a": "100", "test_fail": "101", "test_c": "102"}
+        assert (flow.run_path / "cocotb_shard2.log").exists()
+
+
 if __name__ == "__main__":
     test_cocotb_version()
     test_cocotb_parse_xml()
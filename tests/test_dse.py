@@ -0,0 +1,93 @@
+import tempfile
+import time
+from pathlib import Path
+
+from xeda import Design
+from xeda.flow_runner import DefaultRunner
+from xeda.flow_runner.dse import Dse, FmaxSearch, expand_search_space
+from xeda.flows.flow import Flow, SynthFlow
+
+TESTS_DIR = Path(__file__).parent.absolute()
+EXAMPLES_DIR = TESTS_DIR.parent / "examples"
+
+
+class ScoreFlow(Flow):
+    """Test flow with a result which depends on the settings"""
+
+    class Settings(Flow.Settings):
+        x: int = 0
+        y: int = 0
+
+    def run(self) -> None:
+        assert isinstance(self.settings, self.Settings)
+        self.results.start = time.time()
+        time.sleep(0.3)
+        self.results.end = time.time()
+        self.results.score = self.settings.x * 10 - (self.settings.y - 2) ** 2
+
+
+def test_expand_search_space() -> None:
+    variants = expand_search_space({"a": [1, 2], "b.c": ["x", "y", "z"]})
+    assert len(variants) == 6
+    assert {"a": 2, "b.c": "y"} in variants
+
+
+def test_dse() -> None:
+    design = Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+    max_cpus = 2
+    with tempfile.TemporaryDirectory() as run_dir:
+        runner = DefaultRunner(run_dir, display_results=False, max_cpus=max_cpus)
+        dse = Dse(runner, ScoreFlow, design, optimize="score")
+        flows = dse.run({"x": [1, 2], "y": [1, 2, 3]})
+        assert len(flows) == 6
+        assert all(f.succeeded for f in flows)
+        assert len({f.run_path for f in flows}) == 6
+        assert all(f.settings.nthreads == 1 for f in flows)
+        # never more than max_cpus variants running at the same time
+        for f in flows:
+            t = f.results.start + 0.01
+            running = [g for g in flows if g.results.start <= t < g.results.end]
+            assert len(running) <= max_cpus
+        best = dse.best()
+        assert best is not None
+        assert (best.settings.x, best.settings.y) == (2, 2)
+
+
+class FakeSynth(SynthFlow):
+    """Test synthesis flow with a critical path delay depending on the target clock period"""
+
+    class Settings(SynthFlow.Settings):
+        base_delay: float = 3.0
+        effort: float = 0.1
+
+    def run(self) -> None:
+        assert isinstance(self.settings, self.Settings)
+        ss = self.settings
+        assert ss.clock_period and ss.clocks["main_clock"].period == ss.clock_period
+        delay = ss.base_delay + ss.effort * ss.clock_period
+        self.results.wns = round(ss.clock_period - delay, 3)
+        self.results.Fmax = 1000.0 / delay
+
+    def parse_reports(self) -> bool:
+        return self.results.wns >= 0
+
+
+def test_fmax_search() -> None:
+    design = Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+    with tempfile.TemporaryDirectory() as run_dir:
+        runner = DefaultRunner(run_dir, display_results=False, max_cpus=3)
+        search = FmaxSearch(
+            runner,
+            FakeSynth,
+            design,
+            {"clock_period": 5.0, "clocks": {"main_clock": {"freq": 200}}},
+            tolerance=0.01,
+            candidates=3,
+        )
+        best = search.search()
+        assert best is not None
+        assert search.converged
+        assert len(search.flows) <= 3 * search.max_rounds
+        # exact fmax: period = 3.0 + 0.1 * period
+        assert abs(best.settings.clock_period - 3.0 / 0.9) <= 0.01 + 0.001
+        assert best.results.wns >= 0
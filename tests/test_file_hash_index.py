@@ -0,0 +1,61 @@
+"""test the persistent file hash index and content-based design hashes"""
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from xeda import Design
+from xeda.file_hash_index import FileHashIndex, file_digest
+from xeda.flow_runner import _semantic_hash
+
+
+def test_file_hash_index(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        files = [Path(tmp) / f"f{i}.vhd" for i in range(20)]
+        for i, f in enumerate(files):
+            f.write_text(f"-- file {i}\n" * (i + 1))
+        index_path = Path(tmp) / "index.sqlite"
+        index = FileHashIndex(index_path)
+        digests = index.digests(files)
+        assert len(digests) == len(files)
+        for f in files:
+            assert digests[str(f)] == hashlib.sha256(f.read_bytes()).hexdigest()
+            assert file_digest(f) == digests[str(f)]
+
+        # a new instance (process) reuses the persisted hashes, unless a file changed
+        hashed = []
+        monkeypatch.setattr(
+            "xeda.file_hash_index.file_digest",
+            lambda p: hashed.append(p) or file_digest(p),
+        )
+        index = FileHashIndex(index_path)
+        assert index.digests(files) == digests
+        assert not hashed
+        files[3].write_text("modified")
+        st = files[5].stat()
+        os.utime(files[5], ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+        new_digests = index.digests(files)
+        assert hashed == [str(files[3]), str(files[5])]
+        assert new_digests[str(files[3])] != digests[str(files[3])]
+        assert new_digests[str(files[5])] == digests[str(files[5])]
+
+        monkeypatch.setenv("XEDA_FILE_HASH_INDEX", "off")
+        assert FileHashIndex.default().path is None
+        assert FileHashIndex.default().digest(files[0]) == digests[str(files[0])]
+
+
+def test_design_hash_tracks_content(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        monkeypatch.setenv("XEDA_FILE_HASH_INDEX", str(Path(tmp) / "index.sqlite"))
+        src = Path(tmp) / "top.vhd"
+        src.write_text("entity top is end;")
+
+        def design() -> Design:
+            return Design(name="top", rtl=dict(sources=[str(src)], top="top"))
+
+        d = design()
+        h = _semantic_hash(d)
+        assert d.rtl.sources[0]._content_hash is not None
+        assert _semantic_hash(design()) == h
+        src.write_text("entity top is end entity;")
+        assert _semantic_hash(design()) != h
@@ -0,0 +1,231 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from xeda import Design
+from xeda.flow_runner import DefaultRunner
+from xeda.flows.flow import Flow, FlowDependencyFailure
+from xeda.tool import NonZeroExitCode, Tool
+
+TESTS_DIR = Path(__file__).parent.absolute()
+EXAMPLES_DIR = TESTS_DIR.parent / "examples"
+
+
+class SleepyFlow(Flow):
+    """Test flow which only sleeps"""
+
+    class Settings(Flow.Settings):
+        duration: float = 0.5
+        label: str = ""
+        fail: bool = False
+
+    def run(self) -> None:
+        assert isinstance(self.settings, self.Settings)
+        self.results.pid = os.getpid()
+        self.results.start = time.time()
+        time.sleep(self.settings.duration)
+        self.results.end = time.time()
+        if self.settings.fail:
+            raise NonZeroExitCode(["sleepy"], 1)
+
+
+class SleepyParentFlow(Flow):
+    """Test flow depending on a number of SleepyFlow's"""
+
+    class Settings(Flow.Settings):
+        dependencies: List[SleepyFlow.Settings] = []
+
+    def init(self) -> None:
+        assert isinstance(self.settings, self.Settings)
+        for dep_settings in self.settings.dependencies:
+            self.add_dependency(SleepyFlow, dep_settings)
+
+    def run(self) -> None:
+        self.results.dependencies = [dep.results for dep in self.completed_dependencies]
+
+
+class MutatingFlow(SleepyFlow):
+    """Test flow which changes its design and settings while running"""
+
+    def run(self) -> None:
+        assert isinstance(self.settings, self.Settings)
+        super().run()
+        self.settings.label += "_done"
+        self.design.rtl.parameters = dict(CHANGED=True)
+
+
+def _design() -> Design:
+    return Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+
+
+def _overlap(a, b) -> bool:
+    return a.start < b.end and b.start < a.end
+
+
+def test_parallel_dependencies() -> None:
+    deps = [SleepyFlow.Settings(label=str(i), nthreads=1) for i in range(2)]
+    with tempfile.TemporaryDirectory() as run_dir:
+        runner = DefaultRunner(run_dir, display_results=False, max_cpus=2)
+        flow = runner.run_flow(SleepyParentFlow, _design(), {"dependencies": deps})
+        assert flow.succeeded
+        dep_results = flow.results.dependencies
+        assert len(dep_results) == 2
+        assert all(r.success for r in dep_results)
+        assert dep_results[0].pid != dep_results[1].pid
+        assert _overlap(dep_results[0], dep_results[1])
+        run_paths = {dep.run_path for dep in flow.completed_dependencies}
+        assert len(run_paths) == 2
+        for p in run_paths:
+            assert (p / "results.json").exists()
+
+
+def test_parallel_dependencies_default_settings(monkeypatch) -> None:
+    # as on a 4-core machine: by default, each flow would use all of the cores
+    nthreads = SleepyFlow.Settings.__fields__["nthreads"]
+    monkeypatch.setattr(nthreads, "default_factory", lambda: 4)
+    deps = [SleepyFlow.Settings(label=str(i)) for i in range(2)]
+    with tempfile.TemporaryDirectory() as run_dir:
+        runner = DefaultRunner(run_dir, display_results=False, max_cpus=4)
+        flow = runner.run_flow(SleepyParentFlow, _design(), {"dependencies": deps})
+        assert flow.succeeded
+        assert [dep.settings.nthreads for dep in flow.completed_dependencies] == [2, 2]
+        a, b = flow.results.dependencies
+        assert _overlap(a, b)
+
+
+def test_cpu_budget() -> None:
+    deps = [SleepyFlow.Settings(label=str(i), nthreads=2) for i in range(3)]
+    with tempfile.TemporaryDirectory() as run_dir:
+        runner = DefaultRunner(run_dir, display_results=False, max_cpus=2)
+        flow = runner.run_flow(SleepyParentFlow, _design(), {"dependencies": deps})
+        assert flow.succeeded
+        dep_results = flow.results.dependencies
+        for i, a in enumerate(dep_results):
+            # nothing to run alongside, so executed in this process
+            assert a.pid == os.getpid()
+            for b in dep_results[i + 1 :]:
+                assert not _overlap(a, b)
+
+
+def test_common_dependency_runs_once() -> None:
+    deps = [SleepyFlow.Settings(duration=0.1, nthreads=1)] * 2
+    with tempfile.TemporaryDirectory() as run_dir:
+        runner = DefaultRunner(run_dir, display_results=False, max_cpus=4)
+        flow = runner.run_flow(SleepyParentFlow, _design(), {"dependencies": deps})
+        assert flow.succeeded
+        assert len(flow.completed_dependencies) == 2
+        assert flow.completed_dependencies[0] is flow.completed_dependencies[1]
+
+
+def test_failed_dependency() -> None:
+    deps = [
+        SleepyFlow.Settings(label="ok", duration=0.1, nthreads=1),
+        SleepyFlow.Settings(label="bad", duration=0.1, nthreads=1, fail=True),
+    ]
+    with tempfile.TemporaryDirectory() as run_dir:
+        runner = DefaultRunner(run_dir, display_results=False, max_cpus=2)
+        with pytest.raises(FlowDependencyFailure):
+            runner.run_flow(SleepyParentFlow, _design(), {"dependencies": deps})
+
+
+def test_run_flows_default_settings() -> None:
+    with tempfile.TemporaryDirectory() as run_dir:
+        runner = DefaultRunner(run_dir, display_results=False, max_cpus=2)
+        flows = runner.run_flows(
+            [(MutatingFlow, _design(), dict(label=label)) for label in "ab"],
+            hashed_run_paths=True,
+        )
+        a, b = flows
+        assert a.succeeded and b.succeeded
+        # each gets a share of the CPUs and runs in a worker process
+        assert a.settings.nthreads == b.settings.nthreads == 1
+        assert a.results.pid != os.getpid() and b.results.pid != os.getpid()
+        assert _overlap(a.results, b.results)
+        # same as when run in this process
+        assert [f.settings.label for f in flows] == ["a_done", "b_done"]
+        assert all(f.design.rtl.parameters == dict(CHANGED=True) for f in flows)
+
+
+def test_run_flows_keep_going() -> None:
+    design = _design()
+    completed = []
+    with tempfile.TemporaryDirectory() as run_dir:
+        runner = DefaultRunner(run_dir, display_results=False, max_cpus=3)
+        flows = runner.run_flows(
+            [
+                (SleepyFlow, design, dict(label="a", nthreads=1)),
+                (SleepyFlow, design, dict(label="b", nthreads=1, fail=True)),
+                (
+                    SleepyParentFlow,
+                    design,
+                    dict(dependencies=[dict(label="c", fail=True)]),
+                ),
+            ],
+            keep_going=True,
+            on_complete=completed.append,
+        )
+        assert [f.succeeded for f in flows] == [True, False, False]
+        assert len(completed) == 3
+        # variants of the same flow and design get distinct run directories
+        assert flows[0].run_path != flows[1].run_path
+
+
+class ArtifactFlow(Flow):
+    """Test flow generating an artifact"""
+
+    class Settings(Flow.Settings):
+        counter_file: str
+
+    def run(self) -> None:
+        assert isinstance(self.settings, self.Settings)
+        with open(self.settings.counter_file, "a") as f:
+            f.write("run\n")
+        out = Path(self.settings.outputs_dir)
+        out.mkdir()
+        (out / "netlist.v").write_text("module top; endmodule\n")
+        self.artifacts.netlist = str(out / "netlist.v")
+        self.artifacts.abs_netlist = self.run_path / out / "netlist.v"
+        self.results.answer = 42
+
+
+def test_artifact_cache() -> None:
+    design = _design()
+    with tempfile.TemporaryDirectory() as tmp:
+        counter_file = Path(tmp) / "counter"
+        settings = dict(counter_file=str(counter_file))
+        flows = []
+        for i in range(2):
+            runner = DefaultRunner(
+                Path(tmp) / f"run{i}",
+                display_results=False,
+                artifact_cache=Path(tmp) / "cache",
+            )
+            flows.append(runner.run_flow(ArtifactFlow, design, settings))
+        assert counter_file.read_text() == "run\n"
+        cached = flows[1]
+        assert cached.succeeded
+        assert cached.results.answer == 42
+        assert (cached.run_path / cached.artifacts.netlist).exists()
+        assert Path(cached.artifacts.abs_netlist).parent.parent == cached.run_path
+        assert (cached.run_path / "results.json").exists()
+
+
+class StuckFlow(Flow):
+    """Test flow running a tool which never finishes"""
+
+    def run(self) -> None:
+        Tool("sleep").run("30")
+
+
+def test_flow_timeout() -> None:
+    with tempfile.TemporaryDirectory() as run_dir:
+        runner = DefaultRunner(run_dir, display_results=False)
+        start = time.monotonic()
+        flow = runner.run_flow(StuckFlow, _design(), dict(timeout_seconds=1))
+        assert time.monotonic() - start < 10
+        assert not flow.succeeded
+        assert flow.results.timed_out
@@ -0,0 +1,92 @@
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from xeda import Design
+from xeda.flow_runner import DefaultRunner
+from xeda.flows.ghdl import GhdlSim, GhdlSynth
+
+TESTS_DIR = Path(__file__).parent.absolute()
+EXAMPLES_DIR = TESTS_DIR.parent / "examples"
+
+FAKE_GHDL = """#!{python}
+import json, os, sys
+if sys.argv[1:] == ["--version"]:
+    print("GHDL 2.0.0 (fake)\\n Compiled with GNAT\\n mcode code generator")
+    sys.exit(0)
+with open(os.environ["FAKE_GHDL_LOG"], "a") as f:
+    f.write(json.dumps(sys.argv[1:]) + "\\n")
+if sys.argv[1] == "find-top":
+    print("tb_top")
+"""
+
+
+def fake_ghdl(monkeypatch, tmp_path: Path) -> Path:
+    """install the fake ghdl and return the path of its log"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake = bin_dir / "ghdl"
+    fake.write_text(FAKE_GHDL.format(python=sys.executable))
+    fake.chmod(0o755)
+    log_file = tmp_path / "ghdl.log"
+    monkeypatch.setenv("PATH", str(bin_dir) + os.pathsep + os.environ["PATH"])
+    monkeypatch.setenv("FAKE_GHDL_LOG", str(log_file))
+    monkeypatch.setenv("XEDA_TOOL_INFO_CACHE", str(tmp_path / "cache"))
+    return log_file
+
+
+def test_ghdl_incremental(monkeypatch) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        log_file = fake_ghdl(monkeypatch, tmp_path)
+
+        design = Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+        src = tmp_path / "sqrt.vhdl"
+        src.write_text(design.rtl.sources[0].file.read_text())
+        design.rtl.sources[0].file = src
+        settings = dict(incremental=True, clock_period=10.0)
+
+        def imported_files():
+            calls = [json.loads(l) for l in log_file.read_text().splitlines()]
+            log_file.unlink()
+            workdirs = {a for c in calls for a in c if a.startswith("--workdir=")}
+            assert len(workdirs) == 1
+            imports = [c for c in calls if c[0] == "import"]
+            return [a for c in imports for a in c if a.endswith(".vhdl")]
+
+        for expected in ([str(src)], []):
+            runner = DefaultRunner(tmp_path / "run", display_results=False)
+            flow = runner.run_flow(GhdlSynth, design, settings)
+            assert flow.succeeded
+            assert imported_files() == expected
+        src.write_text(src.read_text() + "\n-- modified\n")
+        design.rtl.sources[0]._content_hash = None
+        runner = DefaultRunner(tmp_path / "run", display_results=False)
+        runner.run_flow(GhdlSynth, design, settings)
+        assert imported_files() == [str(src)]
+
+
+def test_ghdl_sim_incremental_find_top(monkeypatch) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        log_file = fake_ghdl(monkeypatch, tmp_path)
+        src = tmp_path / "tb.vhdl"
+        src.write_text("entity tb_top is end;")
+        for expected_steps in (
+            ["import", "find-top", "make", "run"],
+            ["find-top", "make", "run"],  # nothing to import
+        ):
+            # the flow sets tb.top
+            design = Design(
+                name="tb", rtl=dict(sources=[str(src)], top="tb_top"), tb=dict()
+            )
+            runner = DefaultRunner(tmp_path / "run", display_results=False)
+            flow = runner.run_flow(GhdlSim, design, dict(incremental=True))
+            assert flow.succeeded
+            calls = [json.loads(l) for l in log_file.read_text().splitlines()]
+            log_file.unlink()
+            assert [c[0] for c in calls] == expected_steps
+            assert calls[-2][-1] == "tb_top"  # make
+            assert "tb_top" in calls[-1]  # run
@@ -1,5 +1,10 @@
+import io
 from pathlib import Path
+
+from vcd import gtkw
+
 from xeda.flows.ghdl import gen_gtkw, _get_wave_opt_signals, common_root
+from xeda.gtkwave import SignalTrie, iter_wave_opt_signals
 
 
 TESTS_DIR = Path(__file__).parent.absolute()
@@ -28,5 +33,53 @@ def test_common_root():
     assert cr == [1, 2, 3]
 
 
+def _legacy_add_sig(g, root_group, signals):
+    """original (quadratic) implementation, as reference"""
+    i = 0
+    while i < len(signals):
+        sig = signals[i]
+        if sig[: len(root_group)] == root_group:
+            if len(sig) - len(root_group) > 1:
+                new_group = sig[len(root_group)]
+                with g.group(new_group, closed=True):
+                    i += _legacy_add_sig(g, root_group + [new_group], signals[i:])
+            else:
+                g.trace(".".join(sig))
+                i += 1
+        else:
+            break
+    return i
+
+
+def test_signal_trie():
+    opt_file = RESOURCES_DIR / "wave.opt"
+    signals = list(iter_wave_opt_signals(opt_file, "top"))
+    trie = SignalTrie(signals)
+    root_group = common_root(signals)
+    assert trie.common_root() == root_group
+    assert trie.num_signals == len(signals)
+    expected = io.StringIO()
+    _legacy_add_sig(gtkw.GTKWSave(expected), root_group, signals)
+    out = io.StringIO()
+    trie.write(gtkw.GTKWSave(out), root_group)
+    assert out.getvalue() == expected.getvalue()
+    # non-contiguous members of a group are merged
+    out = io.StringIO()
+    SignalTrie([["t", "a", "x"], ["t", "b"], ["t", "a", "y"]]).write(
+        gtkw.GTKWSave(out), ["t"], strip_root=True
+    )
+    traces = [l for l in out.getvalue().splitlines() if not l.startswith("@")]
+    assert traces == ["-a", "a.x", "a.y", "-a", "b"]
+    # a signal which is also the scope of other signals
+    signals = [["a", "b"], ["a", "b", "c"]]
+    trie = SignalTrie(signals)
+    assert trie.common_root() == common_root(signals) == ["a"]
+    for root_group in (["a"], ["a", "b"]):
+        out = io.StringIO()
+        trie.write(gtkw.GTKWSave(out), root_group)
+        traces = [l for l in out.getvalue().splitlines() if not l.startswith("@")]
+        assert "a.b" in traces and "a.b.c" in traces
+
+
 if __name__ == "__main__":
     test_gen_gtkw()
@@ -0,0 +1,137 @@
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from xeda import Design
+from xeda.flow_runner import DefaultRunner
+from xeda.flows.nextpnr import Nextpnr
+
+TESTS_DIR = Path(__file__).parent.absolute()
+EXAMPLES_DIR = TESTS_DIR.parent / "examples"
+
+# Fmax improves with the seed, seed 4 fails to route
+FAKE_NEXTPNR = """#!{python}
+import json, os, sys, time
+if sys.argv[1:] == ["--version"]:
+    print("nextpnr-ecp5 {version}")
+    sys.exit(0)
+args = dict(a[2:].split("=", 1) for a in sys.argv[1:] if a.startswith("--") and "=" in a)
+seed = int(args["seed"])
+with open(os.environ["FAKE_NEXTPNR_LOG"], "a") as f:
+    f.write(f"start {{seed}} {{time.time()}}\\n")
+time.sleep(0.3)
+with open(os.environ["FAKE_NEXTPNR_LOG"], "a") as f:
+    f.write(f"end {{seed}} {{time.time()}}\\n")
+if seed == 4:
+    sys.exit(1)
+with open(args["textcfg"], "w") as f:
+    f.write(f"seed {{seed}}\\n")
+report = dict(
+    fmax=dict(clk=dict(achieved=90.0 + 10 * seed, constraint=float(args["freq"]))),
+    utilization=dict(TRELLIS_SLICE=dict(used=100 + seed, available=12144)),
+)
+if not os.environ.get("FAKE_NEXTPNR_NO_REPORT"):
+    with open(args["report"], "w") as f:
+        json.dump(report, f)
+"""
+
+
+class NoSynthNextpnr(Nextpnr):
+    """Nextpnr with a fixed netlist, instead of the Yosys dependency"""
+
+    def init(self) -> None:
+        pass
+
+    def netlist_json(self) -> Path:
+        return Path(os.environ["FAKE_NETLIST_JSON"])
+
+
+def fake_nextpnr(monkeypatch, tmp_path: Path, version: str = "0.4") -> Path:
+    """install (or upgrade) the fake nextpnr-ecp5 and return the path of its log"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir(exist_ok=True)
+    fake = bin_dir / "nextpnr-ecp5"
+    fake.write_text(FAKE_NEXTPNR.format(python=sys.executable, version=version))
+    fake.chmod(0o755)
+    log_file = tmp_path / "nextpnr.log"
+    netlist = tmp_path / "netlist.json"
+    netlist.write_text("{}")
+    monkeypatch.setenv("PATH", str(bin_dir) + os.pathsep + os.environ["PATH"])
+    monkeypatch.setenv("FAKE_NEXTPNR_LOG", str(log_file))
+    monkeypatch.setenv("FAKE_NETLIST_JSON", str(netlist))
+    return log_file
+
+
+def test_nextpnr_seeds(monkeypatch) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        log_file = fake_nextpnr(monkeypatch, tmp_path)
+
+        design = Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+        settings = dict(
+            fpga=dict(part="LFE5U-25F-6BG256C"),
+            clock_period=10.0,
+            seeds=4,
+            max_parallel_seeds=2,
+        )
+        runner = DefaultRunner(tmp_path / "run", display_results=False)
+        flow = runner.run_flow(NoSynthNextpnr, design, settings)
+        assert flow.succeeded
+        assert flow.results.seed == 3
+        assert flow.results.Fmax == 120.0
+        assert flow.results.wns > 0
+        assert flow.results.utilization.TRELLIS_SLICE == 103
+        assert not flow.results.seeds["4"]["success"]
+        assert (flow.run_path / "config.txt").read_text() == "seed 3\n"
+        assert not list(flow.run_path.glob("seed_*"))
+
+        events = [l.split() for l in log_file.read_text().splitlines()]
+        assert len(events) == 8
+        running, max_running = 0, 0
+        for kind, _, _ in sorted(events, key=lambda e: float(e[2])):
+            running += 1 if kind == "start" else -1
+            max_running = max(max_running, running)
+        assert max_running == 2
+
+
+def test_nextpnr_single_seed(monkeypatch) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        fake_nextpnr(monkeypatch, tmp_path)
+        design = Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+        # Fmax of seed 1 (100 MHz) misses the 5 ns clock; nextpnr decides on failing the run, not the report
+        settings = dict(fpga=dict(part="LFE5U-25F-6BG256C"), clock_period=5.0, seed=1)
+        runner = DefaultRunner(tmp_path / "run", display_results=False)
+        flow = runner.run_flow(NoSynthNextpnr, design, settings)
+        assert flow.succeeded
+        assert flow.results.wns < 0
+        monkeypatch.setenv("FAKE_NEXTPNR_NO_REPORT", "1")
+        flow = runner.run_flow(NoSynthNextpnr, design, settings)
+        assert flow.succeeded
+        assert "wns" not in flow.results
+
+
+def test_nextpnr_version_in_cache_key(monkeypatch) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        log_file = fake_nextpnr(monkeypatch, tmp_path)
+        design = Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+        settings = dict(fpga=dict(part="LFE5U-25F-6BG256C"), clock_period=10.0, seed=1)
+        runner = DefaultRunner(
+            tmp_path / "run", display_results=False, artifact_cache=tmp_path / "cache"
+        )
+
+        def runs() -> int:
+            return log_file.read_text().count("start")
+
+        assert runner.run_flow(NoSynthNextpnr, design, settings).succeeded
+        assert runs() == 1
+        assert runner.run_flow(NoSynthNextpnr, design, settings).succeeded
+        assert runs() == 1  # restored from the cache
+        fake_nextpnr(monkeypatch, tmp_path, version="0.10")
+        flow = runner.run_flow(NoSynthNextpnr, design, settings)
+        assert flow.succeeded
+        assert runs() == 2
+        assert flow.nextpnr.version == ("0", "10")
@@ -6,9 +6,9 @@ from pathlib import Path
 
 from xeda import Design
 from xeda.flow_runner import DefaultRunner
-from xeda.flows import Quartus
+from xeda.flows import Quartus, QuartusDse
 from xeda.flows.flow import FPGA
-from xeda.flows.quartus import parse_csv, try_num
+from xeda.flows.quartus import parse_csv, parse_dse_report, try_num
 
 TESTS_DIR = Path(__file__).parent.absolute()
 RESOURCES_DIR = TESTS_DIR / "resources"
@@ -137,6 +137,52 @@ def test_quartus_synth_py() -> None:
         assert flow.succeeded
 
 
+def test_quartus_dse(monkeypatch) -> None:
+    monkeypatch.setenv(
+        "PATH", os.environ["PATH"] + os.pathsep + str(TESTS_DIR / "fake_tools")
+    )
+    monkeypatch.setattr("xeda.flows.quartus.REPORT_POLL_INTERVAL", 0.05)
+    # seed 4 fails
+    monkeypatch.setenv("FAKE_QUARTUS_DSE_FMAX", "[180, 210, 150]")
+    design = Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+    settings = dict(
+        fpga=FPGA("10CL016YU256C6G"), clock_period=6, nthreads=4, num_seeds=4
+    )
+    with tempfile.TemporaryDirectory() as run_dir:
+        flow = DefaultRunner(run_dir).run_flow(QuartusDse, design, settings)
+        assert flow.succeeded
+        dse = (flow.run_path / "settings.dse").read_text()
+        assert "num_seeds=4\n" in dse
+        assert "num_concurrent=4\n" in dse
+        assert "num_parallel_processors=1\n" in dse
+        assert "time_limit_value" not in dse
+        points = flow.results.dse_points
+        assert list(points) == ["dse1", "dse2", "dse3", "dse4"]
+        assert points["dse4"]["status"] == "Failed"
+        assert points["dse3"]["wns"] == -0.667
+        assert flow.results.best_point == "dse2"
+        assert flow.results.seed == 2
+        assert flow.results.Fmax == 210.0
+        assert flow.results.wns == 1.238
+        assert parse_dse_report(flow.dse_report) == points
+
+        monkeypatch.setenv("FAKE_QUARTUS_DSE_FMAX", "[150, 180, 210]")
+        settings.update(stop_after_timing_met=True, timeout="01:30:00")
+        flow = DefaultRunner(run_dir).run_flow(QuartusDse, design, settings)
+        assert flow.succeeded
+        assert (
+            "time_limit_value=01:30:00\n"
+            in (flow.run_path / "settings.dse").read_text()
+        )
+        assert list(flow.results.dse_points) == ["dse1", "dse2"]
+        assert flow.results.best_point == "dse2"
+
+        monkeypatch.setenv("FAKE_QUARTUS_DSE_FMAX", "[150]")
+        flow = DefaultRunner(run_dir).run_flow(QuartusDse, design, settings)
+        assert not flow.succeeded
+        assert flow.results.best_point == "dse1"
+
+
 if __name__ == "__main__":
     _test_parse_reports()
     # test_quartus_synth_py()
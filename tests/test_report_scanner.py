@@ -0,0 +1,95 @@
+"""test regex parsing of reports"""
+import re
+import tempfile
+from pathlib import Path
+
+from xeda import Design
+from xeda.flows.flow import Flow
+from xeda.report_scanner import ReportScanner
+from xeda.utils import try_convert
+
+TESTS_DIR = Path(__file__).parent.absolute()
+EXAMPLES_DIR = TESTS_DIR.parent / "examples"
+
+REPORT = """\
+=== design hierarchy ===
+  Number of cells:   120
+     FDRE   10
+     FDSE   2
+=== design hierarchy ===
+  Number of cells:   240
+     FDRE   20
+     FDSE   4
+     LUT6   7
+Timing: WNS = -0.25 ns   TNS=-1.5
+"""
+
+PATTERNS = [
+    r"=== design hierarchy ===",
+    r"FDRE\s*(?P<_FDRE>\d+)",
+    [r"FDSE\s*(?P<_FDSE>\d+)", r"LUT6\s*(?P<lut6>\d+)"],
+    r"WNS\s*=\s*(?P<wns>\-?\d+(?:\.\d+)?)\s*ns(\s+TNS=(?P<tns>\S+))?(\s+THS=(?P<ths>\S+))?",
+]
+
+
+class ReportFlow(Flow):
+    """only parses reports"""
+
+    def run(self) -> None:
+        pass
+
+
+def _flow(run_path: Path) -> ReportFlow:
+    design = Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+    return ReportFlow(ReportFlow.Settings(), design, run_path)
+
+
+def _reference(content: str, patterns, sequential: bool) -> dict:
+    """results of the original, string-based implementation"""
+    flags = re.MULTILINE | re.IGNORECASE | re.DOTALL
+    results = {}
+    for pat in patterns:
+        for subpat in pat if isinstance(pat, list) else [pat]:
+            match = re.search(subpat, content, flags)
+            if match:
+                for k, v in match.groupdict().items():
+                    results[k] = try_convert(v)
+                if sequential:
+                    content = content[match.end() :]
+    return results
+
+
+def test_parse_report_regex():
+    with tempfile.TemporaryDirectory() as tmp:
+        report = Path(tmp) / "report.txt"
+        report.write_text(REPORT)
+        for sequential in (False, True):
+            flow = _flow(Path(tmp))
+            flow.results.clear()
+            assert flow.parse_report_regex(report, *PATTERNS, sequential=sequential)
+            assert dict(flow.results) == _reference(REPORT, PATTERNS, sequential)
+        assert flow.results._FDRE == 10 and flow.results.lut6 == 7
+        assert flow.results.wns == -0.25 and flow.results.ths == "None"
+        assert not flow.parse_report_regex(
+            report, r"Fmax\s*(?P<fmax>\S+)", required=True
+        )
+        assert len(ReportFlow._report_patterns) == len(PATTERNS) + 2
+        assert "fmax" not in flow.results
+        assert not flow.parse_report_regex(Path(tmp) / "missing.txt", r".*")
+
+
+def test_report_scanner():
+    with tempfile.TemporaryDirectory() as tmp:
+        empty = Path(tmp) / "empty.txt"
+        empty.touch()
+        with ReportScanner(empty) as scanner:
+            assert len(scanner) == 0
+            assert scanner.search(re.compile(rb"(?P<x>\d+)")) is None
+        report = Path(tmp) / "report.txt"
+        report.write_text("a=1 b=2 a=3\n")
+        with ReportScanner(report) as scanner:
+            pat = re.compile(rb"a=(?P<a>\d)")
+            assert scanner.search(pat, sequential=True) == {"a": "1"}
+            assert scanner.pos == 3
+            assert scanner.search(pat, sequential=True) == {"a": "3"}
+            assert scanner.search(pat, sequential=True) is None
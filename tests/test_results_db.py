@@ -0,0 +1,127 @@
+"""test the results database and `xeda results`"""
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from xeda import Design
+from xeda.cli import cli
+from xeda.flow_runner import DefaultRunner, ResultsDB
+from xeda.flow_runner.results_db import flatten_metrics, parse_filter, parse_since
+from xeda.flows.flow import Flow
+
+TESTS_DIR = Path(__file__).parent.absolute()
+EXAMPLES_DIR = TESTS_DIR.parent / "examples"
+
+
+class FakeSynthFlow(Flow):
+    """Test flow reporting synthesis-like results"""
+
+    class Settings(Flow.Settings):
+        clock_period: float = 10.0
+        lut: int = 100
+
+    def run(self) -> None:
+        assert isinstance(self.settings, self.Settings)
+        self.results.Fmax = 1000.0 / self.settings.clock_period
+        self.results.lut = self.settings.lut
+        self.results.utilization = {"ff": self.settings.lut * 2}
+        self.results.note = "not a metric"
+        Path("netlist.v").write_text("")
+        self.artifacts.netlist = "netlist.v"
+
+    def parse_reports(self) -> bool:
+        assert isinstance(self.settings, self.Settings)
+        return self.settings.lut < 1000
+
+
+def test_flatten_and_parse():
+    assert flatten_metrics({"a": 1, "b": {"c": 2.5, "d": "x"}, "e": True}) == {
+        "a": 1.0,
+        "b.c": 2.5,
+    }
+    assert parse_filter("Fmax>=100") == ("Fmax", ">=", 100.0)
+    assert parse_filter("lut < 5") == ("lut", "<", 5.0)
+    assert parse_filter("design=sqrt") == ("design", "=", "sqrt")
+    with pytest.raises(ValueError):
+        parse_filter("Fmax")
+    assert datetime.now() - parse_since("7d") > timedelta(days=6.9)
+    assert parse_since("2022-10-01") == datetime(2022, 10, 1)
+
+
+def test_results_db():
+    design = Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "results.sqlite"
+        runner = DefaultRunner(tmp, display_results=False, results_db=db_path)
+        for period, lut in [(10.0, 100), (5.0, 300), (4.0, 2000)]:
+            runner.run_flow(FakeSynthFlow, design, {"clock_period": period, "lut": lut})
+        db = ResultsDB(db_path)
+        runs = db.query(design=design.name, metrics=["Fmax", "lut"])
+        # newest first, failed run excluded
+        assert [r["lut"] for r in runs] == [300, 100]
+        runs = db.query(success=None, metrics=["Fmax"], sort="Fmax", limit=1)
+        assert runs[0]["Fmax"] == 250.0 and not runs[0]["success"]
+        runs = db.query(filters=[parse_filter("Fmax>150")], metrics=["utilization.ff"])
+        assert len(runs) == 1 and runs[0]["utilization.ff"] == 600
+        assert db.query(flow="other_flow") == []
+        assert db.query(since=datetime.now() + timedelta(hours=1)) == []
+
+        run = db.get(runs[0]["id"])
+        assert run is not None
+        assert run["design_hash"] and run["flow_hash"]
+        assert run["settings"]["clock_period"] == 5.0
+        assert run["results"]["note"] == "not a metric"
+        assert Path(run["artifacts"]["netlist"]).exists()
+        assert "note" not in run["metrics"] and "Fmax" in run["metrics"]
+        assert {"Fmax", "lut", "runtime", "utilization.ff"} <= set(db.metric_names())
+
+        cli_runner = CliRunner()
+        result = cli_runner.invoke(
+            cli,
+            ["results", "--results-db", str(db_path), "--sort", "Fmax", "--all"],
+        )
+        assert result.exit_code == 0, result.output
+        assert "FAILED" in result.output and "250" in result.output
+        result = cli_runner.invoke(
+            cli,
+            [
+                "results",
+                "--results-db",
+                str(db_path),
+                "--compare",
+                "1",
+                "--compare",
+                "2",
+            ],
+        )
+        assert result.exit_code == 0, result.output
+        assert "clock_period" in result.output and "lut" in result.output
+        result = cli_runner.invoke(
+            cli, ["results", "--results-db", str(db_path), "--where", "Fmax"]
+        )
+        assert result.exit_code != 0
+
+
+def test_results_db_closes_connections(monkeypatch):
+    connections = []
+    connect = sqlite3.connect
+
+    def tracked_connect(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        connections.append(conn)
+        return conn
+
+    monkeypatch.setattr(sqlite3, "connect", tracked_connect)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ResultsDB(Path(tmp) / "results.sqlite")
+        db.query()
+        db.get(1)
+        db.metric_names()
+        assert len(connections) == 4
+        for conn in connections:
+            with pytest.raises(sqlite3.ProgrammingError):  # closed
+                conn.execute("SELECT 1")
@@ -0,0 +1,198 @@
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from xeda.tool import (
+    Docker,
+    NonZeroExitCode,
+    OutputCapture,
+    ProcessTimeout,
+    Tool,
+    ToolTimeout,
+    in_context,
+    run_process,
+)
+from xeda.utils import WorkingDirectory
+
+TESTS_DIR = Path(__file__).parent.absolute()
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(")")[-1].split()[0] != "Z"
+    except FileNotFoundError:
+        return True
+
+
+def test_run_ProcessTimeout_kills_group() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        pid_file = Path(tmp) / "child.pid"
+        start = time.monotonic()
+        with pytest.raises(ToolTimeout) as exc_info:
+            run_process(
+                "sh",
+                ["-c", f"sleep 30 & echo $! > {pid_file}; wait"],
+                timeout=1,
+            )
+        assert time.monotonic() - start < 10
+        assert exc_info.value.timeout == 1
+        child_pid = int(pid_file.read_text())
+        time.sleep(0.2)
+        assert not _is_alive(child_pid)
+
+
+def test_ProcessTimeout_context() -> None:
+    tool = Tool("sleep")
+    with ProcessTimeout(1):
+        tool.run("0.1")  # well within the timeout
+        with pytest.raises(ToolTimeout):
+            tool.run("30")
+    tool.run("0.1")
+
+
+def test_ProcessTimeout_threads() -> None:
+    tool = Tool("sleep")
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with ProcessTimeout(1):
+            # the deadline of this thread does not leak into other threads
+            executor.submit(tool.run, "1.5").result()
+            with pytest.raises(ToolTimeout):
+                executor.submit(in_context(tool.run), "30").result()
+
+
+def test_output_capture() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        log_file = Path(tmp) / "tool.log"
+        lines = []
+        capture = OutputCapture(
+            log_file, tail_lines=3, callbacks=[lines.append], echo=False
+        )
+        with pytest.raises(NonZeroExitCode):
+            run_process(
+                "sh",
+                [
+                    "-c",
+                    "for i in $(seq 1 1000); do echo line$i; done; echo oops >&2; exit 3",
+                ],
+                capture=capture,
+            )
+        assert len(lines) == 1001
+        logged = log_file.read_text().splitlines()
+        assert len(logged) == 1001
+        assert "oops" in logged
+        # stdout and stderr are read concurrently, but stdout lines stay in order
+        assert [l for l in logged if l != "oops"][-1] == "line1000"
+        assert capture.tail == logged[-3:]
+
+
+def test_output_capture_callback_aborts() -> None:
+    class ToolError(Exception):
+        pass
+
+    def find_error(line: str) -> None:
+        if line.startswith("ERROR"):
+            raise ToolError(line)
+
+    capture = OutputCapture(callbacks=[find_error], echo=False)
+    start = time.monotonic()
+    with pytest.raises(ToolError, match="ERROR: bad"):
+        Tool("sh").run("-c", "echo 'ERROR: bad'; sleep 30", capture=capture)
+    assert time.monotonic() - start < 10
+
+
+def test_tool_info_cache(monkeypatch) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        monkeypatch.setenv("XEDA_TOOL_INFO_CACHE", str(Path(tmp) / "cache"))
+        counter = Path(tmp) / "counter"
+        exe = Path(tmp) / "mytool"
+        exe.write_text(f"#!/bin/sh\necho run >> {counter}\necho 'mytool 1.2.3'\n")
+        exe.chmod(0o755)
+
+        def probes() -> int:
+            return len(counter.read_text().splitlines())
+
+        assert Tool(str(exe)).version == ("1", "2", "3")
+        assert Tool(str(exe)).version == ("1", "2", "3")
+        assert Tool(str(exe)).version_gte(1, 2)
+        assert probes() == 1
+        # modifying the executable invalidates its entries
+        exe.write_text(f"#!/bin/sh\necho run >> {counter}\necho 'mytool 1.3'\n")
+        os.utime(exe, ns=(time.time_ns(), time.time_ns() + 1_000_000_000))
+        tool = Tool(str(exe))
+        assert tool.version == ("1", "3")
+        assert probes() == 2
+        tool.invalidate_cached_info()
+        assert tool.version == ("1", "3")
+        assert probes() == 3
+        monkeypatch.setenv("XEDA_TOOL_INFO_CACHE", "off")
+        assert Tool(str(exe)).version == ("1", "3")
+        assert probes() == 4
+
+
+def test_docker_pool(monkeypatch) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        monkeypatch.setenv(
+            "PATH", str(TESTS_DIR / "fake_tools") + os.pathsep + os.environ["PATH"]
+        )
+        monkeypatch.setenv("FAKE_DOCKER_STATE", str(tmp_path / "docker"))
+        monkeypatch.setenv("XEDA_TOOL_INFO_CACHE", str(tmp_path / "cache"))
+        calls_log = tmp_path / "docker" / "calls.log"
+
+        def docker_calls(prefix: str) -> int:
+            return sum(
+                1 for l in calls_log.read_text().splitlines() if l.startswith(prefix)
+            )
+
+        docker = Docker(image="fake", enabled=True, pool=True, pool_ttl=2)
+        with WorkingDirectory(tmp):
+            for i in range(3):
+                tool = Tool("sh", docker=docker.copy())
+                tool.run("-c", f"echo {i} >> out.txt")
+            assert Path("out.txt").read_text().split() == ["0", "1", "2"]
+            assert docker_calls("run --detach") == 1
+            assert docker_calls("exec") == 3
+            # tool failures are propagated through docker exec
+            with pytest.raises(NonZeroExitCode):
+                tool.run("-c", "exit 3")
+            # idle container exits after pool_ttl
+            time.sleep(4)
+            tool.run("-c", "true")
+            assert docker_calls("run --detach") == 2
+            Docker.stop_pooled_containers()
+            assert docker_calls("rm --force") == 1
+
+
+def test_docker_pool_timeout(monkeypatch) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        monkeypatch.setenv(
+            "PATH", str(TESTS_DIR / "fake_tools") + os.pathsep + os.environ["PATH"]
+        )
+        monkeypatch.setenv("FAKE_DOCKER_STATE", str(tmp_path / "docker"))
+        monkeypatch.setenv("XEDA_TOOL_INFO_CACHE", str(tmp_path / "cache"))
+        docker = Docker(image="fake", enabled=True, pool=True, pool_ttl=10)
+        with WorkingDirectory(tmp):
+            tool = Tool("sh", docker=docker)
+            with pytest.raises(ToolTimeout), ProcessTimeout(1.5):
+                tool.run("-c", "sh -c 'echo $$ > child.pid; exec sleep 30' & wait")
+            # docker exec does not forward signals: the command (and its children) in the container are terminated
+            pid = int(Path("child.pid").read_text())
+            assert not _is_alive(pid)
+            # and the container is not marked as busy anymore
+            (pool_dir,) = (tmp_path / "docker" / "containers").glob("*/pool")
+            for _ in range(20):
+                if not list((pool_dir / "active").iterdir()):
+                    break
+                time.sleep(0.1)
+            assert not list((pool_dir / "active").iterdir())
+            Docker.stop_pooled_containers()
@@ -1,11 +1,23 @@
+import json
 import os
 import tempfile
+import threading
+import time
+from html import unescape
 from pathlib import Path
+from xml.etree import ElementTree
+from zipfile import ZipFile
+
+import pytest
 
 from xeda import Design
 from xeda.flow_runner import DefaultRunner
-from xeda.flows import VivadoSynth
-from xeda.flows.flow import FPGA
+from xeda.flows import VivadoAltSynth, VivadoPower, VivadoSynth
+from xeda.flows.flow import FPGA, FlowSettingsError
+from xeda.flows.vivado.session import VivadoSession, VivadoSessionError
+from xeda.flows.vivado.vivado_alt_synth import StrategyRun
+from xeda.flows.vivado.vivado_synth import SynthCheckpointStore
+from xeda.tool import NonZeroExitCode, Tool
 
 TESTS_DIR = Path(__file__).parent.absolute()
 RESOURCES_DIR = TESTS_DIR / "resources"
@@ -52,6 +64,326 @@ def test_vivado_synth_py() -> None:
         assert results_json.exists()
         assert flow.succeeded
         assert 0.3 < flow.results.runtime  # type: ignore
+        assert flow.results.lut == "4123"  # type: ignore
+        assert "_utilization" not in flow.results
+        assert not (flow.run_path / "utilization.json").exists()
+        settings["dump_utilization"] = "utilization.json"
+        flow = xeda_runner.run_flow(VivadoSynth, design, settings)
+        with open(flow.run_path / "utilization.json") as f:
+            assert json.load(f)["CLB Logic"]["CLB LUTs"]["Used"] == "4123"
+
+
+def test_vivado_synth_incremental(monkeypatch) -> None:
+    monkeypatch.setenv(
+        "PATH", os.environ["PATH"] + os.pathsep + str(TESTS_DIR / "fake_tools")
+    )
+    design = Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+    settings = dict(fpga=FPGA("xc7a12tcsg325-1"), clock_period=5.5, incremental=True)
+    with tempfile.TemporaryDirectory() as run_dir:
+        xeda_runner = DefaultRunner(run_dir)
+        flow = xeda_runner.run_flow(VivadoSynth, design, settings)
+        assert flow.succeeded
+        assert "incremental_checkpoint" not in flow.results
+        assert "reuse_cells" not in flow.results
+        first_dcp = flow.run_path / "sqrt.runs" / "impl_1" / "sqrt_routed.dcp"
+        assert first_dcp.exists()
+
+        # the previous run directory is backed up
+        flow = xeda_runner.run_flow(VivadoSynth, design, settings)
+        assert flow.succeeded
+        ref = Path(flow.results.incremental_checkpoint)  # type: ignore
+        assert ref.name == "sqrt_routed.dcp" and ".backup_" in str(ref)
+        assert flow.results.reuse_cells == 93.6  # type: ignore
+        assert flow.results.reuse_nets == 90.11  # type: ignore
+        assert flow.results.reuse_ports == 100.0  # type: ignore
+        script = (flow.run_path / "vivado_synth.tcl").read_text()
+        assert f"set_property incremental_checkpoint {ref} [get_runs impl_1]" in script
+
+        # the latest successful run on the same part is used
+        latest = flow.run_path / "sqrt.runs" / "impl_1" / "sqrt_routed.dcp"
+        assert flow.find_incremental_checkpoint() == latest
+        (flow.run_path / "results.json").write_text('{"success": false}')
+        assert flow.find_incremental_checkpoint() == ref
+        settings["fpga"] = FPGA("xc7a35tcsg325-1")
+        flow = xeda_runner.run_flow(VivadoSynth, design, settings)
+        assert "incremental_checkpoint" not in flow.results
+
+
+@pytest.mark.parametrize("flow_class", [VivadoSynth, VivadoAltSynth])
+def test_vivado_incremental_synth(monkeypatch, flow_class) -> None:
+    monkeypatch.setenv(
+        "PATH", os.environ["PATH"] + os.pathsep + str(TESTS_DIR / "fake_tools")
+    )
+    design = Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+    settings = dict(
+        fpga=FPGA("xc7a12tcsg325-1"), clock_period=5.5, incremental_synth=True
+    )
+    with tempfile.TemporaryDirectory() as run_dir:
+        xeda_runner = DefaultRunner(run_dir)
+        flow = xeda_runner.run_flow(flow_class, design, settings)
+        assert flow.results.incremental_synth is False  # type: ignore
+        assert "incremental_synth_checkpoint" not in flow.results
+        store = SynthCheckpointStore(flow)
+        assert store.reference() == store.path
+        assert store.path.parent == Path(run_dir) / "synth_checkpoints" / "sqrt"
+        assert store.path.read_bytes() == b"fake synthesized"
+
+        flow = xeda_runner.run_flow(flow_class, design, settings)
+        assert flow.succeeded
+        assert flow.results.incremental_synth is True  # type: ignore
+        assert flow.results.incremental_synth_checkpoint == str(store.path)  # type: ignore
+
+        # different generics are not compatible
+        design.rtl.generics["G_IN_WIDTH"] = 16
+        flow = xeda_runner.run_flow(flow_class, design, settings)
+        assert flow.results.incremental_synth is False  # type: ignore
+        assert SynthCheckpointStore(flow).key != store.key
+        assert len(list(store.root.glob("*.dcp"))) == 2
+
+
+def test_vivado_alt_synth_race(monkeypatch) -> None:
+    monkeypatch.setenv(
+        "PATH", os.environ["PATH"] + os.pathsep + str(TESTS_DIR / "fake_tools")
+    )
+    # keyed by the route_design directive of each strategy
+    wns = {
+        "RuntimeOptimized": [-3.0] * 20,  # Runtime: far behind Default
+        "Default": [-0.4],  # Default: finishes first, but fails timing
+        "AggressiveExplore": [-0.3, -0.1, 0.05, 0.02],  # Timing: meets timing
+        "NoTimingRelaxation": [-0.2] * 20,  # ExtraTiming: still running
+    }
+    monkeypatch.setenv("FAKE_VIVADO_WNS", json.dumps(wns))
+    design = Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+    settings = dict(
+        fpga=FPGA("xc7a12tcsg325-1"),
+        clock_period=5.5,
+        nthreads=8,
+        race_strategies="Runtime,Default,Timing,ExtraTiming",
+    )
+    with tempfile.TemporaryDirectory() as run_dir:
+        xeda_runner = DefaultRunner(run_dir)
+        start = time.monotonic()
+        flow = xeda_runner.run_flow(VivadoAltSynth, design, settings)
+        assert time.monotonic() - start < 4.0
+        assert flow.succeeded
+        assert flow.results.strategy == "Timing"  # type: ignore
+        assert flow.results.strategies == {  # type: ignore
+            "Runtime": dict(status="cancelled", wns=None),
+            "Default": dict(status="done", wns=-0.4),
+            "Timing": dict(status="done", wns=0.02),
+            "ExtraTiming": dict(status="cancelled", wns=None),
+        }
+        script = (flow.run_path / "vivado_alt_synth.tcl").read_text()
+        assert "set_param general.maxThreads 2" in script
+        assert "eval route_design -directive AggressiveExplore" in script
+        assert (
+            "Final timing slack: 0.020 ns"
+            in (flow.run_path / "vivado_stdout.log").read_text()
+        )
+        assert not list(flow.run_path.glob("strategy_*"))
+
+        # no strategy meets timing: the best one wins
+        wns["AggressiveExplore"] = [-0.6]
+        wns["NoTimingRelaxation"] = [-0.2, -0.1]
+        monkeypatch.setenv("FAKE_VIVADO_WNS", json.dumps(wns))
+        settings["race_strategies"] = ["Default", "Timing", "ExtraTiming"]
+        flow = xeda_runner.run_flow(VivadoAltSynth, design, settings)
+        assert flow.results.strategy == "ExtraTiming"  # type: ignore
+        assert [s["status"] for s in flow.results.strategies.values()] == [  # type: ignore
+            "done"
+        ] * 3
+
+    with pytest.raises(FlowSettingsError):
+        VivadoAltSynth.Settings(
+            fpga=FPGA("xc7a12tcsg325-1"), race_strategies=["NoSuchStrategy"]
+        )
+
+
+def test_strategy_run_cancel(tmp_path) -> None:
+    run = StrategyRun("Default", tmp_path)
+    started = threading.Event()
+    run.capture.add_callback(lambda line: line == "started" and started.set())
+
+    def run_vivado() -> None:
+        # ignores SIGTERM, so it's only killed after the grace period
+        try:
+            Tool("sh").run(
+                "-c", "trap '' TERM; echo started; sleep 30", capture=run.capture
+            )
+        except NonZeroExitCode:
+            run.fail()
+        else:
+            run.finish()
+
+    thread = threading.Thread(target=run_vivado)
+    thread.start()
+    assert started.wait(10)
+    start = time.monotonic()
+    run.cancel("test")
+    assert time.monotonic() - start < 1.0
+    thread.join(20)
+    assert not thread.is_alive()
+    assert run.status == "cancelled"
+    assert not run.finish()
+    assert run.status == "cancelled"
+
+
+@pytest.mark.parametrize(
+    "setting", [dict(incremental=True), dict(incremental_checkpoint="routed.dcp")]
+)
+def test_vivado_alt_synth_no_incremental_impl(setting) -> None:
+    with pytest.raises(FlowSettingsError):
+        VivadoAltSynth.Settings(fpga=FPGA("xc7a12tcsg325-1"), **setting)
+    VivadoAltSynth.Settings(fpga=FPGA("xc7a12tcsg325-1"), incremental=False)
+
+
+def test_incremental_synth_summary() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        log_file = Path(tmp) / "runme.log"
+        log_file.write_text(
+            "Incremental Synthesis Report Summary:\n\n"
+            "1. Incremental synthesis run: no\n\n"
+            "   Reason for not running incremental synthesis : Design is not big enough\n"
+        )
+        results = {}
+        SynthCheckpointStore.add_results(results, Path("ref.dcp"), log_file)
+        assert results == {
+            "incremental_synth": False,
+            "incremental_synth_checkpoint": "ref.dcp",
+            "incremental_synth_reason": "Design is not big enough",
+        }
+
+
+def test_vivado_session(monkeypatch) -> None:
+    monkeypatch.setenv(
+        "PATH", os.environ["PATH"] + os.pathsep + str(TESTS_DIR / "fake_tools")
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        session = VivadoSession()
+        logs = []
+        for i, script in enumerate(["puts ok\n", "puts failing\n# fake: exit 3\n"]):
+            run_dir = Path(tmp) / f"run{i}"
+            run_dir.mkdir()
+            (run_dir / "script.tcl").write_text(script)
+            rc = session.run_script(
+                "script.tcl", cwd=run_dir, log_file=run_dir / "vivado.log"
+            )
+            assert rc == 3 * i
+            assert (run_dir / "reports" / "route_design" / "utilization.xml").exists()
+            logs.append((run_dir / "vivado.log").read_text())
+        assert logs[0] == logs[1] == f"pid = {session.pid}\n"
+        assert session.alive
+        session.close()
+        assert not session.alive
+
+        monkeypatch.setenv("FAKE_VIVADO_SESSION_CRASH", "1")
+        with pytest.raises(VivadoSessionError):
+            session.run_script(Path(tmp) / "run0" / "script.tcl")
+        assert not session.alive
+
+
+def test_vivado_synth_session(monkeypatch) -> None:
+    monkeypatch.setenv(
+        "PATH", os.environ["PATH"] + os.pathsep + str(TESTS_DIR / "fake_tools")
+    )
+    monkeypatch.setenv("XEDA_VIVADO_SESSION", "1")
+    design = Design.from_toml(EXAMPLES_DIR / "vhdl" / "sqrt" / "sqrt.toml")
+    settings = dict(fpga=FPGA("xc7a12tcsg325-1"), clock_period=5.5)
+    try:
+        with tempfile.TemporaryDirectory() as run_dir:
+            xeda_runner = DefaultRunner(run_dir)
+            logs = []
+            for _ in range(2):
+                flow = xeda_runner.run_flow(VivadoSynth, design, settings)
+                assert flow.succeeded
+                assert flow.results.lut == "4123"  # type: ignore
+                logs.append((flow.run_path / "vivado.log").read_text())
+            # both ran in the same Vivado process
+            assert logs[0] == logs[1] and logs[0].startswith("pid = ")
+
+            # falls back to batch mode
+            VivadoSession.close_all()
+            monkeypatch.setenv("FAKE_VIVADO_SESSION_CRASH", "1")
+            flow = xeda_runner.run_flow(VivadoSynth, design, settings)
+            assert flow.succeeded
+    finally:
+        VivadoSession.close_all()
+
+
+def _parse_xml_report_dom(report_xml):
+    """reference implementation building the whole tree"""
+    data = {}
+    for section in ElementTree.parse(report_xml).findall("./section"):
+        for table in section.findall("./table"):
+            table_data = {}
+            header = [
+                unescape(col.attrib["contents"]).strip()
+                for col in table.findall("./tablerow/tableheader")
+            ]
+            for tablerow in table.findall("./tablerow"):
+                cells = [
+                    unescape(cell.attrib["contents"]).strip()
+                    for cell in tablerow.findall("./tablecell")
+                ]
+                cell_data = {h: c for h, c in zip(header[1:], cells[1:]) if c}
+                if cells and cell_data:
+                    table_data[cells[0]] = cell_data
+            if table_data:
+                title = section.get("title", "<section>")
+                if table.get("title"):
+                    title += ":" + table.get("title")
+                data[title] = table_data
+    return data
+
+
+def test_parse_xml_report() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        with ZipFile(
+            TESTS_DIR / "fake_tools" / "resource" / "fake_vivado_reports"
+        ) as zf:
+            report_xml = zf.extract("utilization.xml", tmp)
+        utilization = VivadoSynth.parse_xml_report(report_xml)
+        assert utilization == _parse_xml_report_dom(report_xml)
+        assert utilization["CLB Logic"]["CLB LUTs"]["Used"] == "4123"
+        tables = ["CLB Logic", "ARITHMETIC", "no such table"]
+        selected = VivadoSynth.parse_xml_report(report_xml, tables)
+        assert selected == {k: utilization[k] for k in tables if k in utilization}
+        bad_xml = Path(tmp) / "bad.xml"
+        bad_xml.write_text("<RptDoc><section title='x'>")
+        assert VivadoSynth.parse_xml_report(bad_xml) is None
+
+
+def test_parse_power_report() -> None:
+    def table(*rows):
+        return "<table title=''>{}</table>".format(
+            "".join(
+                "<tablerow>{}</tablerow>".format(
+                    "".join(f"<tablecell contents='{c}'/>" for c in row)
+                )
+                for row in rows
+            )
+        )
+
+    power_xml = (
+        "<RptDoc><section title='Summary'>"
+        + table(
+            ["Total On-Chip Power (W)", "0.081"], ["Junction Temperature (C)", "25.4"]
+        )
+        + "<section title='On-Chip Components'>"
+        + table(["Clocks", "0.002", "3"], ["Signals", "&lt;0.001", "1"])
+        + "</section></section><section title='Environment'>"
+        + table(["Ambient Temp (C)", "25.0"])
+        + "</section></RptDoc>"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        report_xml = Path(tmp) / "power.xml"
+        report_xml.write_text(power_xml)
+        assert VivadoPower.parse_power_report(None, report_xml) == {  # type: ignore
+            "Total On-Chip Power (W)": "0.081",
+            "Junction Temperature (C)": "25.4",
+            "Component Power: Clocks": "0.002",
+            "Component Power: Signals": "<0.001",
+        }
 
 
 if __name__ == "__main__":